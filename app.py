@@ -1,26 +1,144 @@
-from fastapi import FastAPI, HTTPException
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-import pandas as pd
-import lightgbm as lgb
-import joblib
-from sklearn.preprocessing import LabelEncoder
-from feature_creation import create_features
-from pre_processing import preprocess_data
+import numpy as np
+from batching import MicroBatcher
+from columnar import predict_columnar
+from explain import ExplanationUnavailableError, explain_records, format_explanations
+from fast_path import SingleRowPredictor
+from instrumentation import STAGE_METRICS, SamplingProfiler
+from prediction_cache import PredictionCache
+from prediction_grid import load_grid
+from registry import ArtifactRegistry, ArtifactVersionError
+from serving import predict_records
+from streaming import DEFAULT_CHUNK_SIZE, format_chunk, iter_chunks, score_chunks
+from wire_format import CONTENT_TYPES, MEDIA_TYPES, decode_columns, encode_predictions
+
 
+# Per-stage latency histograms and row counters, served at /metrics; SALARY_METRICS=0 turns the hooks off
+STAGE_METRICS.enable(os.environ.get('SALARY_METRICS', '1') == '1')
+# Sampling profiler, started with /admin/profiler/start or at startup with SALARY_PROFILER=1
+profiler = SamplingProfiler(interval=float(os.environ.get('SALARY_PROFILER_INTERVAL_MS', '5')) / 1000)
+# Errors caused by the request rows (a missing field, a value of the wrong type), answered with a 422
+INVALID_INPUT_ERRORS = (KeyError, TypeError, ValueError)
 
-# Load the trained model
+# Load the trained model, encoder and density stats once; every request shares them
+MANIFEST_PATH = os.environ.get('SALARY_ARTIFACT_MANIFEST', 'artifacts.json')
+# Serve the compiled trees (cli.py compile-model) so LightGBM is never imported
+COMPILED_MODEL = os.environ.get('SALARY_COMPILED_MODEL', '0') == '1'
 try:
-    model = joblib.load('lightgbm_tunned_model.joblib')  # Load your model
-except FileNotFoundError:
-    raise Exception("Model file 'lightgbm_tunned_model.joblib' not found. Make sure it's in the correct path.")
+    registry = ArtifactRegistry(MANIFEST_PATH, compiled=COMPILED_MODEL)
+except FileNotFoundError as e:
+    raise Exception(f"Could not load the model artifacts: {e}")
+
+# Pandas-free predictor for one-record requests, rebuilt when the artifacts are swapped
+single_row_predictor = SingleRowPredictor(registry.current())
+
+
+def get_single_row_predictor(bundle):
+    global single_row_predictor
+    predictor = single_row_predictor
+    if predictor.bundle is not bundle:
+        predictor = single_row_predictor = SingleRowPredictor(bundle)
+    return predictor
+
+
+# Predictions of repeated request rows, emptied when another model version is loaded
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('SALARY_CACHE_MAX_ENTRIES', '100000')),
+    ttl_seconds=float(os.environ['SALARY_CACHE_TTL_S']) if os.environ.get('SALARY_CACHE_TTL_S') else None,
+)
+
+
+# Feature contributions of repeated request rows, kept apart from the predictions: a row
+# costs about a hundred times more to explain than to predict
+explanation_cache = PredictionCache(
+    max_entries=int(os.environ.get('SALARY_EXPLAIN_CACHE_MAX_ENTRIES', '10000')),
+    ttl_seconds=float(os.environ['SALARY_CACHE_TTL_S']) if os.environ.get('SALARY_CACHE_TTL_S') else None,
+)
+
+
+# Optional precomputed predictions (cli.py build-grid), memory-mapped; only used while the
+# served model is the version the grid was built with
+GRID_PATH = os.environ.get('SALARY_PREDICTION_GRID')
+prediction_grid = load_grid(GRID_PATH) if GRID_PATH else None
+
+
+def lookup_predictions(bundle, records):
+    """
+    Serves records from the prediction grid, then from the cache.
+
+    Returns:
+    - tuple: (predictions, missing), None in predictions for the rows still to be scored.
+    """
+    if prediction_grid is not None and prediction_grid.version == bundle.version:
+        with STAGE_METRICS.time('grid_lookup', len(records)):
+            predictions, missing = prediction_grid.lookup(records)
+    else:
+        predictions, missing = [None] * len(records), list(range(len(records)))
+    if missing:
+        with STAGE_METRICS.time('cache_lookup', len(missing)):
+            cached, still_missing = prediction_cache.lookup(bundle, [records[i] for i in missing])
+        for i, value in zip(missing, cached):
+            predictions[i] = value
+        missing = [missing[i] for i in still_missing]
+    return predictions, missing
+
+
+def score_records(bundle, records):
+    if len(records) == 1:
+        # Single record: skip the DataFrame pipeline
+        return [get_single_row_predictor(bundle).predict_one(records[0])]
+    # Preprocess, create features, encode with the training encoders and predict
+    return predict_records(bundle, records).tolist()
+
+
+def predict_batch(records):
+    """
+    Scores one micro-batch of cache misses, on a worker thread, and caches the predictions.
+    """
+    bundle = registry.current()
+    with STAGE_METRICS.time('score', len(records)):
+        return prediction_cache.fill(bundle, records, lambda rows: score_records(bundle, rows))
+
+
+# Concurrent requests are grouped for up to SALARY_BATCH_WINDOW_MS or SALARY_BATCH_MAX_ROWS rows
+batcher = MicroBatcher(
+    predict_batch,
+    max_wait_ms=float(os.environ.get('SALARY_BATCH_WINDOW_MS', '5')),
+    max_batch_rows=int(os.environ.get('SALARY_BATCH_MAX_ROWS', '2048')),
+    max_workers=int(os.environ.get('SALARY_BATCH_WORKERS', '2')),
+)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    batcher.start()
+    if os.environ.get('SALARY_PROFILER', '0') == '1':
+        profiler.start()
+    yield
+    await batcher.stop()
+    profiler.stop()
+
 
 # Initialize FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Define the structure of the expected JSON
 class PredictionRequest(BaseModel):
     data: list  # List of dictionaries containing the input data
 
+
+class ReloadRequest(BaseModel):
+    manifest_path: Optional[str] = None  # Defaults to the manifest currently loaded
+
+
 @app.post("/predict")
 async def predict(payload: PredictionRequest):
     """
@@ -30,28 +148,292 @@ async def predict(payload: PredictionRequest):
     - payload: JSON containing the input data.
 
     Returns:
-    - JSON with the predictions.
+    - JSON with the predictions; a 422 if a row is invalid, a 500 for server errors.
     """
+    bundle = registry.current()
+    model_version = bundle.version
+    status = 200
     try:
-        # Convert the JSON into a DataFrame
-        input_data = pd.DataFrame(payload.data)
-        input_data_pre = preprocess_data(input_data)
-        input_data_feat = create_features(input_data_pre)
-        
-        catcol = ["experience_level", "employment_type", "job_title", 
-                "employee_residence", "remote_ratio", "company_location", "company_size"]
+        if not all(isinstance(record, dict) for record in payload.data):
+            raise TypeError("Every row of 'data' must be an object.")
+        with STAGE_METRICS.time('request', len(payload.data)):
+            # Rows in the grid or the cache are served right away; only the misses are scored,
+            # together with other concurrent requests and off the event loop
+            predictions, missing = lookup_predictions(bundle, payload.data)
+            if missing:
+                with STAGE_METRICS.time('batch_round_trip', len(missing)):
+                    scored = await batcher.submit([payload.data[i] for i in missing])
+                for i, value in zip(missing, scored):
+                    predictions[i] = value
 
-        # Apply same Label Encoding from train to each categorical column
-        for col in catcol:
-            le = joblib.load("data_encoder.pkl")  
-            input_data_feat[col] = le.fit_transform(input_data_feat[col])
+        # Return the predictions
+        return {"predictions": predictions, "model_version": model_version}
 
+    except KeyError as e:
+        status = 422
+        raise HTTPException(status_code=status, detail=f"Missing field {e.args[0]!r} in a row of 'data'.")
+    except INVALID_INPUT_ERRORS as e:
+        status = 422
+        raise HTTPException(status_code=status, detail=str(e))
+    except Exception as e:
+        status = 500
+        raise HTTPException(status_code=status, detail=str(e))
+    finally:
+        STAGE_METRICS.count_request("/predict", status)
 
-        # Make predictions
-        predictions = model.predict(input_data_feat)
 
-        # Return the predictions
-        return {"predictions": predictions.tolist()}
-    
+def score_columns(bundle, body, wire_format):
+    """
+    Decodes a column batch and scores it, on a worker thread: rows in the prediction grid are
+    looked up, the others go through the columnar pipeline in one call.
+    """
+    with STAGE_METRICS.time('decode'):
+        table = decode_columns(body, wire_format, bundle.plan.source_columns())
+    if prediction_grid is not None and prediction_grid.version == bundle.version:
+        with STAGE_METRICS.time('grid_lookup', len(table)):
+            predictions = prediction_grid.lookup_table(table)
+        missing = np.isnan(predictions)
+        if missing.any():
+            predictions[missing] = score_distinct_rows(bundle, table.filter(missing))
+        return predictions
+    return score_distinct_rows(bundle, table)
+
+
+def score_distinct_rows(bundle, table):
+    # Large batches repeat rows; each distinct row goes through the model once
+    with STAGE_METRICS.time('score', len(table)):
+        distinct, inverse = table.distinct_rows()
+        return predict_columnar(bundle, distinct)[inverse]
+
+
+@app.post("/predict/columns")
+async def predict_columns(request: Request):
+    """
+    Endpoint for large batches sent column by column, with the semantics of /predict.
+
+    Parameters:
+    - request: A column batch, one array per field: JSON or msgpack {"columns": {...}}, or an
+      Arrow IPC stream, with a matching Content-Type header.
+
+    Returns:
+    - The predictions in the format of the request; a 415 for another content type, a 422 if
+      the batch is invalid, a 500 for server errors.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    wire_format = CONTENT_TYPES.get(content_type)
+    if wire_format is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type '{content_type}'; use one of {list(CONTENT_TYPES)}.")
+
+    bundle = registry.current()
+    status = 200
+    try:
+        body = await request.body()
+        with STAGE_METRICS.time('request'):
+            # Decoding and scoring a large batch would block the event loop
+            predictions = await run_in_threadpool(score_columns, bundle, body, wire_format)
+            content = encode_predictions(predictions, bundle.version, wire_format)
+        return Response(content, media_type=MEDIA_TYPES[wire_format], headers={"X-Model-Version": bundle.version})
+
+    except INVALID_INPUT_ERRORS as e:
+        status = 422
+        raise HTTPException(status_code=status, detail=str(e))
+    except Exception as e:
+        status = 500
+        raise HTTPException(status_code=status, detail=str(e))
+    finally:
+        STAGE_METRICS.count_request("/predict/columns", status)
+
+
+def explain_batch(bundle, records):
+    """
+    Explains records on a worker thread: cached rows are served from the explanation cache
+    and the others are explained together, each distinct row once.
+    """
+    def score(rows):
+        contributions, predictions = explain_records(bundle, rows, return_predictions=True)
+        return list(zip(contributions.tolist(), predictions.tolist()))
+
+    with STAGE_METRICS.time('explain', len(records)):
+        explained = explanation_cache.predict(bundle, records, score)
+    return format_explanations(bundle.model.feature_name(), [row for row, _ in explained],
+                               [prediction for _, prediction in explained])
+
+
+@app.post("/explain")
+async def explain(payload: PredictionRequest):
+    """
+    Endpoint explaining predictions: the contribution of every model feature to the
+    prediction of each row (SHAP values, from the LightGBM booster).
+
+    Parameters:
+    - payload: JSON containing the input data, as for /predict.
+
+    Returns:
+    - JSON with one explanation per row (prediction, base value and contributions by feature);
+      a 422 if a row is invalid, a 501 when serving the compiled model, a 500 for server errors.
+    """
+    bundle = registry.current()
+    status = 200
+    try:
+        if not all(isinstance(record, dict) for record in payload.data):
+            raise TypeError("Every row of 'data' must be an object.")
+        with STAGE_METRICS.time('request', len(payload.data)):
+            explanations = await run_in_threadpool(explain_batch, bundle, payload.data)
+        # Plain floats and strings only: skip FastAPI's encoder, which walks every value
+        return JSONResponse({"explanations": explanations, "model_version": bundle.version})
+
+    except ExplanationUnavailableError as e:
+        status = 501
+        raise HTTPException(status_code=status, detail=str(e))
+    except KeyError as e:
+        status = 422
+        raise HTTPException(status_code=status, detail=f"Missing field {e.args[0]!r} in a row of 'data'.")
+    except INVALID_INPUT_ERRORS as e:
+        status = 422
+        raise HTTPException(status_code=status, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        status = 500
+        raise HTTPException(status_code=status, detail=str(e))
+    finally:
+        STAGE_METRICS.count_request("/explain", status)
+
+
+# Content types accepted by /predict/stream
+STREAM_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+}
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request, output_format: str = "ndjson", chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Endpoint for scoring large files. The body is spooled to disk, scored in chunks and
+    the predictions are streamed back as each chunk is done.
+
+    Parameters:
+    - request: Body in NDJSON, CSV or Parquet, with a matching Content-Type header.
+    - output_format: 'ndjson' (default) or 'csv'.
+    - chunk_size: Rows scored at a time.
+
+    Returns:
+    - The input rows with a 'prediction' column, in the requested format.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    input_format = STREAM_CONTENT_TYPES.get(content_type)
+    if input_format is None:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type '{content_type}'; use one of {list(STREAM_CONTENT_TYPES)}.")
+    if output_format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported output format '{output_format}'; use one of {list(STREAM_MEDIA_TYPES)}.")
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be at least 1.")
+
+    bundle = registry.current()
+
+    # Spool the body as it arrives: it stays in memory up to 64 MB and spills to disk past that
+    body = tempfile.SpooledTemporaryFile(max_size=64 << 20)
+    async for part in request.stream():
+        body.write(part)
+    body.seek(0)
+
+    def scored_rows():
+        # Runs in a worker thread, one chunk in memory at a time
+        with body:
+            chunks = score_chunks(bundle, iter_chunks(body, input_format, chunk_size))
+            for i, chunk in enumerate(chunks):
+                yield format_chunk(chunk, output_format, first=i == 0)
+
+    return StreamingResponse(scored_rows(), media_type=STREAM_MEDIA_TYPES[output_format],
+                             headers={"X-Model-Version": bundle.version})
+
+
+@app.post("/admin/reload")
+def reload_artifacts(payload: ReloadRequest):
+    """
+    Endpoint for hot-swapping the model artifacts without restarting the server.
+
+    Parameters:
+    - payload: JSON with an optional manifest_path.
+
+    Returns:
+    - JSON with the version now being served.
+    """
+    try:
+        bundle = registry.swap(payload.manifest_path)
+    except (FileNotFoundError, ArtifactVersionError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"model_version": bundle.version, "manifest_path": registry.manifest_path}
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Endpoint exposing the micro-batching metrics (queue depth, batch sizes, errors) and the
+    prediction cache, explanation cache and grid metrics (hits, misses, evictions).
+
+    Returns:
+    - JSON with the metrics and the model version being served.
+    """
+    return {"model_version": registry.current().version, "batcher": batcher.stats(),
+            "cache": prediction_cache.stats(),
+            "explanation_cache": explanation_cache.stats(),
+            "grid": prediction_grid.stats() if prediction_grid is not None else None,
+            "stages": STAGE_METRICS.snapshot()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Endpoint for Prometheus: latency histograms and row counters of every pipeline stage
+    (feature plan steps, encoding, model, grid and cache lookups, batching) and request
+    counts by status code.
+
+    Returns:
+    - The metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(STAGE_METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/profiler/start")
+def start_profiler(reset: bool = True):
+    """
+    Endpoint starting the sampling profiler.
+
+    Parameters:
+    - reset: Drop the samples of earlier runs.
+
+    Returns:
+    - JSON with the profiler state.
+    """
+    if reset:
+        profiler.reset()
+    profiler.start()
+    return {"running": True, "interval_ms": profiler.interval * 1000}
+
+
+@app.post("/admin/profiler/stop")
+def stop_profiler(top: int = 20):
+    """
+    Endpoint stopping the sampling profiler.
+
+    Parameters:
+    - top: Functions listed in the summary.
+
+    Returns:
+    - JSON with the number of samples and the functions most often running.
+    """
+    profiler.stop()
+    return {"running": False, "samples": profiler.samples,
+            "top": [{"function": function, "share": share} for function, share in profiler.top(top)]}
+
+
+@app.get("/admin/profiler", response_class=PlainTextResponse)
+def profiler_stacks():
+    """
+    Endpoint returning the sampled stacks in the folded format (one 'frame;frame;frame count'
+    line per stack), for flame graph tools.
+    """
+    return PlainTextResponse(profiler.folded())
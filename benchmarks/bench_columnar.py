@@ -0,0 +1,90 @@
+"""
+Wall time and peak RSS of batch scoring: pandas path (preprocess_data, create_features,
+encoding, predict) against the columnar path (columnar.predict_columnar), on a synthetic
+expansion of data/salaries.csv.
+
+Each mode runs in its own process so peak RSS is measured independently.
+
+Usage:
+    python benchmarks/bench_columnar.py --rows 10000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from common import ROOT_DIR, load_salaries, upsample
+
+RAW_COLUMNS = ["work_year", "experience_level", "employment_type", "job_title", "employee_residence",
+               "remote_ratio", "company_location", "company_size"]
+
+
+def current_rss_mb():
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def pandas_model_input(bundle, dataset):
+    """The DataFrame pipeline (preprocess_data, create_features, encoding) the columnar path replaced."""
+    from feature_creation import create_features
+    from pre_processing import preprocess_data
+    from serving import SERVING_FEATURE_ALIASES
+
+    dataset = create_features(preprocess_data(dataset), job_salary_density=bundle.job_density)
+    dataset = bundle.encoder.transform(dataset)
+    return dataset[[SERVING_FEATURE_ALIASES.get(name, name) for name in bundle.model.feature_name()]]
+
+
+def run_mode(mode, n_rows):
+    from registry import load_artifacts
+
+    bundle = load_artifacts(os.path.join(ROOT_DIR, 'artifacts.json'))
+    data = upsample(load_salaries()[RAW_COLUMNS], n_rows)
+    baseline = current_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'pandas':
+        predictions = bundle.model.predict(pandas_model_input(bundle, data))
+    else:
+        from columnar import ColumnarTable, predict_columnar
+        predictions = predict_columnar(bundle, ColumnarTable.from_pandas(data))
+    elapsed = time.perf_counter() - start
+
+    return {'mode': mode, 'rows': n_rows, 'seconds': elapsed, 'ns_per_row': elapsed / n_rows * 1e9,
+            'peak_rss_mb': peak_rss_mb(), 'peak_over_input_mb': peak_rss_mb() - baseline,
+            'output_rows': len(predictions)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--modes', nargs='+', default=['pandas', 'columnar'], choices=['pandas', 'columnar'])
+    parser.add_argument('--child', choices=['pandas', 'columnar'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.rows)))
+        return
+
+    print(f"{'mode':>9} {'rows':>11} {'seconds':>9} {'ns/row':>8} {'peak RSS MB':>12} {'over input MB':>14}")
+    for mode in args.modes:
+        completed = subprocess.run([sys.executable, __file__, '--child', mode, '--rows', str(args.rows)],
+                                   capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{mode:>9} {args.rows:>11} failed (exit code {completed.returncode}, possibly out of memory)")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{mode:>9} {result['rows']:>11} {result['seconds']:>9.2f} {result['ns_per_row']:>8.0f} "
+              f"{result['peak_rss_mb']:>12.0f} {result['peak_over_input_mb']:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
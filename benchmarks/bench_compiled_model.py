@@ -0,0 +1,57 @@
+"""
+Cold start, peak memory and prediction throughput of a serving process that loads the LightGBM
+booster against one that loads the compiled model (cli.py compile-model). Each model runs in
+its own process, so the start time includes its imports and the peak RSS is its own.
+
+Usage:
+    python benchmarks/bench_compiled_model.py --rows 100000
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+START = time.perf_counter()
+
+from common import ROOT_DIR, best_time, load_salaries, upsample
+
+
+def run(model, n_rows, repeat):
+    from registry import load_artifacts
+    from serving import build_model_input
+
+    bundle = load_artifacts(f'{ROOT_DIR}/artifacts.json', compiled=model == 'compiled')
+    start_seconds = time.perf_counter() - START
+    data = upsample(load_salaries()[bundle.plan.source_columns()], n_rows)
+    matrix = build_model_input(bundle, data).to_numpy()
+    rates = []
+    for batch in (1, 100, n_rows):
+        seconds = best_time(lambda: bundle.model.predict(matrix[:batch]), repeat)
+        rates.append(batch / seconds)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    imported = ','.join(name for name in ('lightgbm', 'sklearn', 'scipy') if name in sys.modules) or '-'
+    print(f"{model:>9} {start_seconds:>8.2f} {peak_mb:>8.0f} " + ' '.join(f"{rate:>12,.0f}" for rate in rates)
+          + f"  {imported}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--model', choices=['booster', 'compiled'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.model:
+        run(args.model, args.rows, args.repeat)
+        return
+
+    print(f"{'':>9} {'start s':>8} {'peak MB':>8} {'1 row/s':>12} {'100 rows/s':>12} {f'{args.rows} rows/s':>12}"
+          f"  imported")
+    for model in ('booster', 'compiled'):
+        subprocess.run([sys.executable, __file__, '--model', model, '--rows', str(args.rows),
+                        '--repeat', str(args.repeat)], check=True)
+
+
+if __name__ == '__main__':
+    main()
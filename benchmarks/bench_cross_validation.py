@@ -0,0 +1,71 @@
+"""
+Wall time of model evaluation: the former regression metrics (scikit-learn, one pass per
+metric) against the fused metrics, k-fold cross-validation with the folds trained by 1..N
+worker processes, and bootstrap confidence intervals of the out-of-fold predictions.
+
+Usage:
+    python benchmarks/bench_cross_validation.py --folds 5 --workers 1 2 5 --metric-rows 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from common import best_time, load_training_data
+from cross_validation import cross_validate_lgb
+from metrics import bootstrap_metrics, calculate_regression_metrics
+
+
+def legacy_regression_metrics(y_true, y_pred):
+    """The metrics as computed before, kept as the baseline."""
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    return {
+        "RMSE": np.sqrt(mean_squared_error(y_true, y_pred)),
+        "MAE": mean_absolute_error(y_true, y_pred),
+        "R^2": r2_score(y_true, y_pred),
+        "MAPE (%)": np.mean(np.abs((y_true - y_pred) / y_true)) * 100,
+        "SMAPE (%)": np.mean(2 * np.abs(y_true - y_pred) / (np.abs(y_true) + np.abs(y_pred))) * 100,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 5])
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--bootstrap', type=int, default=1000)
+    parser.add_argument('--metric-rows', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    y_true = rng.lognormal(11, 0.5, args.metric_rows)
+    y_pred = y_true * rng.normal(1, 0.1, args.metric_rows)
+    print(f"{'metrics':>28} {'seconds':>9}")
+    print(f"{f'scikit-learn, {args.metric_rows} rows':>28} {best_time(lambda: legacy_regression_metrics(y_true, y_pred)):>9.3f}")
+    print(f"{f'fused, {args.metric_rows} rows':>28} {best_time(lambda: calculate_regression_metrics(y_true, y_pred)):>9.3f}")
+
+    X_train, X_test, y_train, y_test = load_training_data()
+    X, y = pd.concat([X_train, X_test]), pd.concat([y_train, y_test])
+    print(f"\n{'cross-validation':>28} {'seconds':>9} {'OOF RMSE':>10}")
+    for n_workers in args.workers:
+        start = time.perf_counter()
+        result = cross_validate_lgb(X, y, n_splits=args.folds, num_boost_round=args.rounds, n_workers=n_workers,
+                                    n_bootstrap=0)
+        elapsed = time.perf_counter() - start
+        print(f"{f'{args.folds} folds, {n_workers} worker(s)':>28} {elapsed:>9.2f} {result['out_of_fold']['RMSE']:>10.1f}")
+
+    print(f"\n{'bootstrap':>28} {'seconds':>9} {'OOF RMSE':>10} {'95% interval':>22}")
+    for n_workers in args.workers:
+        start = time.perf_counter()
+        intervals = bootstrap_metrics(y, result['predictions'], args.bootstrap, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        rmse = intervals['RMSE']
+        interval = f"[{rmse['lower']:.1f}, {rmse['upper']:.1f}]"
+        print(f"{f'{args.bootstrap} resamples, {n_workers} worker(s)':>28} {elapsed:>9.2f} "
+              f"{rmse['estimate']:>10.1f} {interval:>22}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Time spent binning the training data: lgb.Dataset built from the DataFrame (what every
+train_and_predict_lgb / random_search_lgb call did) against DatasetCache on a miss
+(bin + save) and on a hit (load the binary file), on a synthetic expansion of the
+notebook's training split.
+
+Usage:
+    python benchmarks/bench_dataset_cache.py --rows 100000 1000000
+"""
+import argparse
+import shutil
+import tempfile
+
+import lightgbm as lgb
+
+from common import best_time, load_training_data, upsample
+from dataset_cache import DatasetCache
+
+PARAMS = {'seed': 42, 'verbosity': -1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    X_train, _, y_train, _ = load_training_data()
+    train = X_train.assign(salary_in_usd=y_train)
+    print(f"{'rows':>10} {'rebuild s':>10} {'miss s':>8} {'hit s':>8} {'speedup':>8}")
+    for n_rows in args.rows:
+        data = upsample(train, n_rows)
+        X, y = data.drop(columns=['salary_in_usd']), data['salary_in_usd']
+        cache_dir = tempfile.mkdtemp()
+        try:
+            cache = DatasetCache(cache_dir)
+            rebuild = best_time(lambda: lgb.Dataset(X, label=y, params=PARAMS).construct(), args.repeat)
+            miss = best_time(lambda: (cache.clear(), cache.dataset(X, y, PARAMS)), args.repeat)
+            hit = best_time(lambda: cache.dataset(X, y, PARAMS), args.repeat)
+        finally:
+            shutil.rmtree(cache_dir)
+        print(f"{n_rows:>10} {rebuild:>10.3f} {miss:>8.3f} {hit:>8.3f} {rebuild / hit:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Wall time of explaining a batch of rows: one predict call, the booster's pred_contrib called
+row by row (extrapolated from --per-row-sample rows) and on the whole batch, explain_records
+(each distinct row once) and explanations served from the cache.
+
+Usage:
+    python benchmarks/bench_explain.py --rows 10000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from common import ROOT_DIR, best_time, load_salaries
+from explain import explain_records
+from prediction_cache import PredictionCache
+from registry import load_artifacts
+from serving import build_model_input, predict_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--per-row-sample', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bundle = load_artifacts(f'{ROOT_DIR}/artifacts.json')
+    columns = bundle.plan.source_columns()
+    rows = load_salaries()[columns].sample(args.rows, replace=True, random_state=1)
+    records = rows.to_dict(orient='records')
+    print(f"{args.rows} rows, {len(rows.drop_duplicates())} distinct")
+    print(f"{'':>28} {'seconds':>9}")
+
+    print(f"{'predict_records':>28} {best_time(lambda: predict_records(bundle, records), args.repeat):>9.3f}")
+
+    sample = records[:args.per_row_sample]
+    start = time.perf_counter()
+    for record in sample:
+        bundle.model.predict(build_model_input(bundle, pd.DataFrame([record])), pred_contrib=True)
+    per_row = (time.perf_counter() - start) / len(sample) * len(records)
+    print(f"{'pred_contrib, row by row':>28} {per_row:>9.3f}")
+
+    start = time.perf_counter()
+    bundle.model.predict(build_model_input(bundle, rows), pred_contrib=True)
+    print(f"{'pred_contrib, one call':>28} {time.perf_counter() - start:>9.3f}")
+
+    print(f"{'explain_records':>28} {best_time(lambda: explain_records(bundle, records), args.repeat):>9.3f}")
+
+    cache = PredictionCache(max_entries=len(records))
+    score = lambda batch: explain_records(bundle, batch).tolist()
+    cache.predict(bundle, records, score)
+    print(f"{'cached':>28} {best_time(lambda: cache.predict(bundle, records, score), args.repeat):>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-row cost of add_inflation_index, before (row-wise apply) and after (vectorized lookup table).
+
+Usage:
+    python benchmarks/bench_inflation_index.py --rows 1000 100000 10000000
+"""
+import argparse
+
+import numpy as np
+
+from common import best_time, load_salaries, upsample
+from feature_creation import add_inflation_index
+
+
+def add_inflation_index_apply(dataset, year_column='work_year', residence_column='employee_residence'):
+    """The row-wise implementation replaced by the lookup table, kept as the baseline."""
+    us_inflation_rates = {2019: 0.0181, 2020: 0.0123, 2021: 0.0470, 2022: 0.065, 2023: 0.034}
+    global_inflation_rates = {2019: 0.0219, 2020: 0.0192, 2021: 0.0350, 2022: 0.088, 2023: 0.070}
+
+    def calculate_index(year, residence):
+        if residence == "United States":
+            inflation_rate = us_inflation_rates.get(year, 0)
+        else:
+            inflation_rate = global_inflation_rates.get(year, 0)
+        return 1 + inflation_rate
+
+    dataset['inflation_index'] = dataset.apply(
+        lambda row: calculate_index(row[year_column], row[residence_column]), axis=1
+    )
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000, 10_000_000])
+    parser.add_argument('--legacy-max-rows', type=int, default=None,
+                        help='Skip the row-wise baseline above this size (it takes minutes at 10M rows).')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    base = load_salaries(preprocessed=True)[['work_year', 'employee_residence']]
+
+    print(f"{'rows':>12} {'apply ns/row':>14} {'lookup ns/row':>14} {'speedup':>9}")
+    for n_rows in args.rows:
+        data = upsample(base, n_rows)
+        vectorized = best_time(lambda: add_inflation_index(data), args.repeat)
+
+        if args.legacy_max_rows is not None and n_rows > args.legacy_max_rows:
+            print(f"{n_rows:>12} {'skipped':>14} {vectorized / n_rows * 1e9:>14.1f} {'-':>9}")
+            continue
+
+        # The baseline is slow enough that one run is representative at large sizes
+        legacy = best_time(lambda: add_inflation_index_apply(data), args.repeat if n_rows <= 100_000 else 1)
+        np.testing.assert_allclose(add_inflation_index_apply(data.copy())['inflation_index'],
+                                   add_inflation_index(data.copy())['inflation_index'])
+        print(f"{n_rows:>12} {legacy / n_rows * 1e9:>14.1f} {vectorized / n_rows * 1e9:>14.1f} {legacy / vectorized:>8.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Load generator for the prediction API: latency percentiles (p50, p90, p99, p99.9) and
+throughput of POST /predict under concurrent clients.
+
+By default the app is started with uvicorn on a free local port (the prediction cache
+disabled, so every row is scored; pass --cache to keep it), loaded, then stopped. Pass --url
+to load a server that is already running instead. Each client is a thread with its own
+keep-alive connection, sending rows sampled from data/salaries.csv.
+
+Without --rate, every client sends its next request as soon as the previous one is answered
+(closed loop), which measures the highest throughput. With --rate, requests are scheduled at
+that total rate and latency is measured from the scheduled time, so time spent waiting for a
+free client counts as latency (no coordinated omission).
+
+The load generator shares the machine with a local server; on few cores, use --url to load a
+server on another machine. Results are saved as JSON, by default to
+benchmarks/results/load-<commit>.json; compare two runs with benchmarks/compare_results.py.
+
+Usage:
+    python benchmarks/bench_load.py --rows-per-request 1 100 --clients 8 --duration 20
+    python benchmarks/bench_load.py --url http://127.0.0.1:8000 --rate 200 --duration 60
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from common import LIB_DIR, ROOT_DIR, default_results_path, free_port, load_salaries, save_results, wait_ready
+
+RAW_COLUMNS = ['work_year', 'experience_level', 'employment_type', 'job_title', 'employee_residence',
+               'remote_ratio', 'company_location', 'company_size']
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def request_bodies(rows_per_request, n_bodies=500, seed=42):
+    """
+    Builds /predict bodies of rows_per_request rows sampled from data/salaries.csv.
+    """
+    rows = load_salaries()[RAW_COLUMNS]
+    rng = np.random.default_rng(seed)
+    return [json.dumps({'data': rows.iloc[rng.integers(0, len(rows), rows_per_request)].to_dict(orient='records')})
+            for _ in range(n_bodies)]
+
+
+def start_server(args):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT_DIR, LIB_DIR]),
+               SALARY_COMPILED_MODEL='1' if args.model == 'compiled' else '0')
+    if not args.cache:
+        env['SALARY_CACHE_MAX_ENTRIES'] = '0'
+    command = [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(port), '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, '127.0.0.1', port
+
+
+def run_load(host, port, bodies, n_clients, duration, n_requests=None, rate=None):
+    """
+    Sends requests from n_clients threads for duration seconds (or n_requests requests).
+
+    Returns:
+    - tuple: (latencies in seconds of the answered requests, Counter of status codes, elapsed seconds).
+    """
+    counter = itertools.count()
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+    start = time.perf_counter()
+    end = start + duration
+
+    def client():
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+        own_latencies, own_statuses = [], Counter()
+        while True:
+            i = next(counter)
+            if n_requests is not None and i >= n_requests:
+                break
+            if rate is not None:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            if n_requests is None and scheduled >= end:
+                break
+            try:
+                connection.request('POST', '/predict', bodies[i % len(bodies)], {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                status = 'connection error'
+            own_statuses[status] += 1
+            if status == 200:
+                own_latencies.append(time.perf_counter() - scheduled)
+        connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            statuses.update(own_statuses)
+
+    threads = [threading.Thread(target=client) for _ in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - start
+
+
+def summarize(latencies, statuses, elapsed, rows_per_request):
+    answered = len(latencies)
+    milliseconds = np.asarray(latencies) * 1000
+    summary = {
+        'requests': sum(statuses.values()),
+        'errors': sum(count for status, count in statuses.items() if status != 200),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'seconds': elapsed,
+        'requests_per_second': answered / elapsed,
+        'rows_per_second': answered * rows_per_request / elapsed,
+    }
+    if answered:
+        summary['mean_ms'] = float(milliseconds.mean())
+        summary['max_ms'] = float(milliseconds.max())
+        for percentile, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+            summary[f'p{percentile:g}_ms'.replace('.', '_')] = float(value)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Server to load, e.g. http://127.0.0.1:8000 (default: start one).')
+    parser.add_argument('--model', choices=['compiled', 'booster'], default='booster', help='Model of the started server.')
+    parser.add_argument('--cache', action='store_true', help='Keep the prediction cache of the started server.')
+    parser.add_argument('--rows-per-request', type=int, nargs='+', default=[1, 100])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load per scenario.')
+    parser.add_argument('--requests', type=int, help='Requests per scenario, instead of --duration.')
+    parser.add_argument('--rate', type=float, help='Total requests per second (open loop); default: closed loop.')
+    parser.add_argument('--warmup', type=int, default=50, help='Requests sent before each scenario, not measured.')
+    parser.add_argument('-o', '--output', help='Results file (default: benchmarks/results/load-<commit>.json).')
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        process, host, port = start_server(args)
+
+    results = []
+    try:
+        print(f"{'rows/request':>12} {'clients':>8} {'requests/s':>11} {'rows/s':>11} {'p50 ms':>8} {'p90 ms':>8} "
+              f"{'p99 ms':>8} {'p99.9 ms':>9} {'errors':>7}")
+        for rows_per_request in args.rows_per_request:
+            bodies = request_bodies(rows_per_request)
+            run_load(host, port, bodies, args.clients, duration=float('inf'), n_requests=args.warmup)
+            latencies, statuses, elapsed = run_load(host, port, bodies, args.clients, args.duration,
+                                                    args.requests, args.rate)
+            summary = summarize(latencies, statuses, elapsed, rows_per_request)
+            mode = f'rate={args.rate:g}' if args.rate else f'clients={args.clients}'
+            results.append({'name': f'POST /predict[{mode}]', 'rows': rows_per_request, 'clients': args.clients,
+                            **summary})
+            print(f"{rows_per_request:>12} {args.clients:>8} {summary['requests_per_second']:>11,.0f} "
+                  f"{summary['rows_per_second']:>11,.0f} {summary.get('p50_ms', float('nan')):>8.2f} "
+                  f"{summary.get('p90_ms', float('nan')):>8.2f} {summary.get('p99_ms', float('nan')):>8.2f} "
+                  f"{summary.get('p99_9_ms', float('nan')):>9.2f} {summary['errors']:>7}")
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(60)
+
+    output = args.output or default_results_path('load')
+    save_results(output, 'load', results, vars(args))
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Peak memory and wall time of training on a large export: the in-memory flow (read the CSV,
+compile_plan().run_frame, remove_outliers_iqr, encoders, lgb.Dataset) against
+out_of_core.train_out_of_core with a memory budget. The export is a synthetic expansion of
+data/salaries.csv, written chunk by chunk. Each flow runs in its own process so their peak
+RSS is measured separately.
+
+Usage:
+    python benchmarks/bench_out_of_core.py --rows 2000000 --budget-mb 256
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from common import load_salaries, upsample
+
+
+def write_export(path, n_rows, chunk=500_000):
+    salaries = load_salaries()
+    for start in range(0, n_rows, chunk):
+        rows = upsample(salaries, min(chunk, n_rows - start), seed=start)
+        rows.to_csv(path, mode='a', header=start == 0, index=False)
+
+
+def run_in_memory(path, num_boost_round):
+    import lightgbm as lgb
+    from sklearn.model_selection import train_test_split
+
+    from encoding import CATEGORICAL_COLUMNS, CategoricalEncoders
+    from model import DEFAULT_PARAMS
+    from out_of_core import FEATURE_COLUMNS
+    from pre_processing import drop_unnecessary_columns, remove_outliers_iqr
+    from transforms import compile_plan
+
+    data = compile_plan().run_frame(pd.read_csv(path), training=True)
+    data = remove_outliers_iqr(drop_unnecessary_columns(data), column='salary_in_usd')
+    data = CategoricalEncoders.fit(data, CATEGORICAL_COLUMNS).transform(data)
+    X_train, X_test, y_train, y_test = train_test_split(data[FEATURE_COLUMNS], data['salary_in_usd'],
+                                                        test_size=0.2, random_state=42)
+    params = dict(DEFAULT_PARAMS, verbosity=-1)
+    train_set = lgb.Dataset(X_train, label=y_train, params=params)
+    valid_set = lgb.Dataset(X_test, label=y_test, reference=train_set)
+    model = lgb.train(params, train_set, valid_sets=[valid_set], valid_names=['valid'], num_boost_round=num_boost_round)
+    return model.best_score['valid']['rmse']
+
+
+def run_out_of_core(path, num_boost_round, budget_mb):
+    from model import DEFAULT_PARAMS
+    from out_of_core import train_out_of_core
+
+    shard_dir = tempfile.mkdtemp(prefix='shards-')
+    try:
+        _, rmse, _ = train_out_of_core(path, shard_dir, dict(DEFAULT_PARAMS, verbosity=-1), num_boost_round,
+                                       memory_budget_mb=budget_mb)
+    finally:
+        shutil.rmtree(shard_dir)
+    return rmse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--budget-mb', type=float, default=256)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--mode', choices=['in-memory', 'out-of-core'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        start = time.perf_counter()
+        if args.mode == 'in-memory':
+            rmse = run_in_memory(args.path, args.rounds)
+        else:
+            rmse = run_out_of_core(args.path, args.rounds, args.budget_mb)
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{args.mode:>12} {time.perf_counter() - start:>9.1f} {peak_mb:>13.0f} {rmse:>10.1f}")
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='export-')
+    try:
+        path = os.path.join(work_dir, 'salaries.csv')
+        write_export(path, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB CSV, budget {args.budget_mb:.0f} MB")
+        print(f"{'flow':>12} {'seconds':>9} {'peak RSS MB':>13} {'RMSE':>10}")
+        for mode in ('in-memory', 'out-of-core'):
+            subprocess.run([sys.executable, __file__, '--mode', mode, '--path', path, '--rounds', str(args.rounds),
+                            '--budget-mb', str(args.budget_mb)], check=True)
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main()
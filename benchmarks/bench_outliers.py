@@ -0,0 +1,44 @@
+"""
+Wall time of remove_outliers_iqr on every numeric column: the former column-by-column
+filter (a quantile call and a filtered copy per column) against the single combined mask,
+plus the grouped filter by job title, on a synthetic expansion of data/salaries.csv.
+
+Usage:
+    python benchmarks/bench_outliers.py --rows 1000000 5000000
+"""
+import argparse
+
+from common import best_time, load_salaries, upsample
+from pre_processing import remove_outliers_iqr
+
+
+def legacy_remove_outliers_iqr(dataframe, multiplier=1.5):
+    """The column-by-column filter replaced by the combined mask, kept as the baseline."""
+    filtered_data = dataframe.copy()
+    for col in dataframe.select_dtypes(include='number').columns:
+        Q1 = dataframe[col].quantile(0.25)
+        Q3 = dataframe[col].quantile(0.75)
+        IQR = Q3 - Q1
+        filtered_data = filtered_data[(filtered_data[col] >= Q1 - multiplier * IQR) &
+                                      (filtered_data[col] <= Q3 + multiplier * IQR)]
+    return filtered_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    salaries = load_salaries()
+    print(f"{'rows':>10} {'legacy s':>9} {'mask s':>8} {'speedup':>8} {'by job s':>9}")
+    for n_rows in args.rows:
+        data = upsample(salaries, n_rows)
+        legacy = best_time(lambda: legacy_remove_outliers_iqr(data), args.repeat)
+        combined = best_time(lambda: remove_outliers_iqr(data), args.repeat)
+        grouped = best_time(lambda: remove_outliers_iqr(data, column='salary_in_usd', by='job_title'), args.repeat)
+        print(f"{n_rows:>10} {legacy:>9.3f} {combined:>8.3f} {legacy / combined:>7.1f}x {grouped:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Rows per second served from the precomputed prediction grid against the live model, for
+request-sized lists of records and for a vectorized DataFrame lookup. Rows are sampled from
+data/salaries.csv, so they are all in the grid.
+
+Usage:
+    python benchmarks/bench_prediction_grid.py --rows 1000000
+"""
+import argparse
+import shutil
+import tempfile
+
+from common import ROOT_DIR, best_time, load_salaries, upsample
+from prediction_grid import DEFAULT_CARTESIAN_COLUMNS, build_grid, load_grid
+from registry import load_artifacts
+from serving import predict_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--request-rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bundle = load_artifacts(f'{ROOT_DIR}/artifacts.json')
+    salaries = load_salaries()
+    grid_dir = tempfile.mkdtemp(prefix='grid-')
+    try:
+        build_grid(bundle, salaries, cartesian=DEFAULT_CARTESIAN_COLUMNS).save(grid_dir)
+        grid = load_grid(grid_dir)
+        frame = upsample(salaries[grid.columns], args.rows)
+        records = frame.iloc[:args.request_rows].to_dict(orient='records')
+
+        print(f"grid of {len(grid)} rows, memory-mapped")
+        print(f"{'lookup':>26} {'rows/s':>12}")
+        model = best_time(lambda: predict_records(bundle, records), args.repeat)
+        print(f"{f'live model, {len(records)} records':>26} {len(records) / model:>12,.0f}")
+        lookup = best_time(lambda: grid.lookup(records), args.repeat)
+        print(f"{f'grid, {len(records)} records':>26} {len(records) / lookup:>12,.0f}")
+        vectorized = best_time(lambda: grid.lookup_frame(frame), args.repeat)
+        print(f"{f'grid, {len(frame)} row frame':>26} {len(frame) / vectorized:>12,.0f}")
+    finally:
+        shutil.rmtree(grid_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Wall time of hyperparameter tuning on the notebook's train/test split: the former
+random_search_lgb (sequential, Dataset rebuilt for every combination, 100 rounds each)
+against the search engine (Dataset binned once, successive halving, early stopping,
+optional worker processes).
+
+Usage:
+    python benchmarks/bench_search.py --n-iter 20 --workers 1 4 16
+"""
+import argparse
+import random
+import time
+
+import lightgbm as lgb
+import numpy as np
+
+from common import load_training_data
+from search import PARAM_GRID, HyperparameterSearch, sample_params
+
+
+def legacy_random_search(X_train, y_train, X_test, y_test, n_iter=20, seed=42):
+    """The sequential search replaced by the engine, kept as the baseline."""
+    random.seed(seed)
+    best_rmse, best_params = float('inf'), None
+    for _ in range(n_iter):
+        params = {'objective': 'regression', 'metric': 'rmse', 'boosting_type': 'gbdt', 'seed': seed,
+                  'verbosity': -1}
+        params.update({name: random.choice(values) for name, values in PARAM_GRID.items()})
+        train_data = lgb.Dataset(X_train, label=y_train)
+        test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+        model = lgb.train(params, train_data, valid_sets=[test_data], num_boost_round=100)
+        rmse = np.sqrt(np.mean((y_test - model.predict(X_test)) ** 2))
+        if rmse < best_rmse:
+            best_rmse, best_params = rmse, params
+    return best_params, best_rmse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-iter', type=int, default=20)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = load_training_data()
+    print(f"{'search':>22} {'seconds':>9} {'trials':>7} {'best RMSE':>11}")
+
+    if not args.skip_legacy:
+        start = time.perf_counter()
+        _, rmse = legacy_random_search(X_train, y_train, X_test, y_test, args.n_iter)
+        print(f"{'sequential (legacy)':>22} {time.perf_counter() - start:>9.2f} {args.n_iter:>7} {rmse:>11.1f}")
+
+    for n_workers in args.workers:
+        start = time.perf_counter()
+        with HyperparameterSearch(X_train, y_train, X_test, y_test, n_workers=n_workers) as search:
+            best = search.successive_halving(sample_params(args.n_iter), min_rounds=11, max_rounds=100)
+        label = f"halving, {n_workers} worker{'s' if n_workers > 1 else ''}"
+        print(f"{label:>22} {time.perf_counter() - start:>9.2f} {len(search.results):>7} {best['rmse']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Memory and throughput of N API workers started by serve.py (artifacts loaded once, then
+forked) against uvicorn --workers N (every worker loads its own copy). Both serve the compiled
+model with the prediction cache disabled. Memory is read from /proc/<pid>/smaps_rollup after
+the load: USS is the memory only that process uses, PSS splits shared pages between their users.
+
+Usage:
+    python benchmarks/bench_serve_workers.py --workers 1 2 4 --requests 2000 --clients 8
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from common import LIB_DIR, ROOT_DIR, free_port, load_salaries, wait_ready
+
+
+def children(pid):
+    # Every process whose parent is pid
+    pids = []
+    for name in os.listdir('/proc'):
+        if name.isdigit():
+            try:
+                with open(f'/proc/{name}/stat') as file:
+                    if int(file.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        pids.append(int(name))
+            except (FileNotFoundError, ProcessLookupError):
+                pass
+    return pids
+
+
+def memory_mb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return fields['Private_Clean'] + fields['Private_Dirty'], fields['Pss']
+
+
+def load(port, bodies, n_requests, n_clients):
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        for i in range(offset, n_requests, n_clients):
+            connection.request('POST', '/predict', bodies[i % len(bodies)], {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"/predict returned {response.status}")
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(n_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return n_requests / (time.perf_counter() - start)
+
+
+def run(launcher, n_workers, bodies, args):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT_DIR, LIB_DIR]), SALARY_COMPILED_MODEL='1',
+               SALARY_CACHE_MAX_ENTRIES='0')
+    if launcher == 'serve.py':
+        command = [sys.executable, 'serve.py', '--workers', str(n_workers), '--port', str(port)]
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'app:app', '--workers', str(n_workers), '--port', str(port),
+                   '--log-level', 'warning']
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        # uvicorn serves from its own process when it has one worker
+        single_process = launcher != 'serve.py' and n_workers == 1
+        # Let every worker come up before loading them
+        while not single_process and len(children(process.pid)) < n_workers:
+            time.sleep(0.2)
+        rate = load(port, bodies, args.requests, args.clients)
+        worker_pids = [process.pid] if single_process else children(process.pid)
+        workers = [memory_mb(pid) for pid in worker_pids]
+        parent_pss = 0 if single_process else memory_mb(process.pid)[1]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(60)
+    uss = sum(memory for memory, _ in workers) / len(workers)
+    pss = parent_pss + sum(pss for _, pss in workers)
+    print(f"{launcher:>16} {n_workers:>8} {uss:>16.0f} {pss:>14.0f} {rate:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8)
+    args = parser.parse_args()
+
+    rows = load_salaries()[['work_year', 'experience_level', 'employment_type', 'job_title', 'employee_residence',
+                            'remote_ratio', 'company_location', 'company_size']].sample(500, random_state=42)
+    bodies = [json.dumps({'data': [record]}) for record in rows.to_dict(orient='records')]
+
+    print(f"{'launcher':>16} {'workers':>8} {'USS MB / worker':>16} {'total PSS MB':>14} {'requests/s':>14}")
+    for n_workers in args.workers:
+        for launcher in ('uvicorn --workers', 'serve.py'):
+            run(launcher, n_workers, bodies, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Cold-start import budget check. Each target runs in a fresh interpreter with
+python -X importtime; the script reports the time spent importing, the heaviest packages,
+and fails (exit status 1) if a target is over its budget or imports a module it must not.
+
+Targets:
+- package: import salary_prediction_lib (every public name is loaded lazily).
+- feature function: one feature function from the package, as a scoring function would use it.
+- app (compiled model): the API with SALARY_COMPILED_MODEL=1, including loading the artifacts.
+
+Usage:
+    python benchmarks/bench_startup.py [--budget-scale 2]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from common import LIB_DIR, ROOT_DIR
+
+MARKER = '--- target starts ---'
+# Modules of this repository, left out of the heaviest packages
+LOCAL_MODULES = {'app', 'salary_prediction_lib'} | {name[:-3] for name in os.listdir(LIB_DIR) if name.endswith('.py')}
+
+# name: (code, extra environment, budget in ms, modules it must not import)
+TARGETS = {
+    'package': ('import salary_prediction_lib', {}, 50, ('pandas', 'lightgbm', 'sklearn', 'scipy')),
+    'feature function': ('from salary_prediction_lib import map_experience_level', {}, 1200,
+                         ('lightgbm', 'sklearn', 'scipy', 'joblib')),
+    'app (compiled model)': ('import app', {'SALARY_COMPILED_MODEL': '1'}, 3000, ('lightgbm', 'sklearn', 'scipy')),
+}
+
+
+def measure(code, env):
+    """
+    Runs code in a fresh interpreter with -X importtime.
+
+    Returns:
+    - tuple: (milliseconds spent importing, {top-level package: ms}, modules loaded).
+    """
+    script = (f"import sys\nsys.stderr.write({MARKER!r} + '\\n')\n{code}\n"
+              "print('\\n'.join(sorted(sys.modules)))")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT_DIR, LIB_DIR]), **env)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    lines = result.stderr.split(MARKER, 1)[1].splitlines()
+
+    total_us, packages = 0, {}
+    for line in lines:
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        cumulative = cumulative.strip()
+        if not cumulative.isdigit():
+            continue
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        if depth == 1:
+            # Imported by the target itself, not by another module
+            total_us += int(cumulative)
+        root = name.split('.')[0]
+        if root not in LOCAL_MODULES:
+            packages[root] = max(packages.get(root, 0), int(cumulative))
+    return total_us / 1000, {name: us / 1000 for name, us in packages.items()}, set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiplies every budget (for slower machines).')
+    parser.add_argument('--top', type=int, default=4, help='Heaviest packages listed per target.')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'target':>22} {'import ms':>10} {'budget ms':>10}  heaviest third-party packages (ms)")
+    for name, (code, env, budget_ms, forbidden) in TARGETS.items():
+        total_ms, packages, modules = measure(code, env)
+        budget_ms *= args.budget_scale
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        print(f"{name:>22} {total_ms:>10.0f} {budget_ms:>10.0f}  "
+              + ', '.join(f"{package} {ms:.0f}" for package, ms in heaviest))
+        if total_ms > budget_ms:
+            failures.append(f"{name} took {total_ms:.0f} ms to import, over its {budget_ms:.0f} ms budget")
+        imported = sorted(module for module in forbidden if module in modules)
+        if imported:
+            failures.append(f"{name} imported {', '.join(imported)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark suite of the pipeline stages: every function of pre_processing.py and
+feature_creation.py, preprocess_data, create_features, the model's predict (LightGBM booster
+and compiled trees), train_and_predict_lgb and random_search_lgb.
+
+Inputs are synthetic upsamples of data/salaries.csv at several scales. Each case gets a fresh
+copy of its input before every run (not timed), since most steps modify their input. The
+results are saved as JSON, by default to benchmarks/results/suite-<commit>.json; compare two
+runs with benchmarks/compare_results.py.
+
+Usage:
+    python benchmarks/bench_suite.py --scales 10000 100000 1000000
+    python benchmarks/bench_suite.py --only 'feature_creation.*' --scales 100000
+"""
+import argparse
+import contextlib
+import fnmatch
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from common import ROOT_DIR, default_results_path, load_salaries, load_training_data, save_results, upsample
+from compiled_model import load_compiled_model
+from feature_creation import (add_inflation_index, add_job_title_frequency, add_local_employee_feature,
+                              add_salary_density, create_features, map_experience_level, map_job_density,
+                              save_salary_density_by_job)
+from pre_processing import (convert_country_code, convert_country_codes, convert_country_column,
+                            drop_unnecessary_columns, iqr_bounds, preprocess_data, remove_outliers_iqr,
+                            replace_abbreviations)
+from registry import load_artifacts
+from serving import build_model_input
+
+# Cases: (name, input, function). The input is built once per scale by build_inputs and copied
+# before every run
+CASES = [
+    ('pre_processing.convert_country_code', 'residences', lambda codes: [convert_country_code(code) for code in codes]),
+    ('pre_processing.convert_country_column', 'residences', convert_country_column),
+    ('pre_processing.convert_country_codes', 'raw', convert_country_codes),
+    ('pre_processing.replace_abbreviations', 'raw', replace_abbreviations),
+    ('pre_processing.drop_unnecessary_columns', 'raw', drop_unnecessary_columns),
+    ('pre_processing.iqr_bounds', 'features', lambda data: iqr_bounds(data, ['salary', 'salary_in_usd'])),
+    ('pre_processing.remove_outliers_iqr', 'features', lambda data: remove_outliers_iqr(data, column='salary_in_usd')),
+    ('pre_processing.remove_outliers_iqr[by=job_title]', 'features',
+     lambda data: remove_outliers_iqr(data, column='salary_in_usd', by='job_title')),
+    ('pre_processing.preprocess_data', 'raw', preprocess_data),
+    ('feature_creation.map_experience_level', 'levels', lambda levels: levels.map(map_experience_level)),
+    ('feature_creation.add_job_title_frequency', 'preprocessed', add_job_title_frequency),
+    ('feature_creation.add_local_employee_feature', 'preprocessed', add_local_employee_feature),
+    ('feature_creation.add_inflation_index', 'preprocessed', add_inflation_index),
+    ('feature_creation.add_salary_density', 'features', add_salary_density),
+    ('feature_creation.save_salary_density_by_job', 'densities', None),
+    ('feature_creation.map_job_density', 'preprocessed', None),
+    ('feature_creation.create_features', 'preprocessed', None),
+    ('model.predict[booster]', 'model_input', None),
+    ('model.predict[compiled]', 'model_input', None),
+    ('model.train_and_predict_lgb', 'training', None),
+    ('tunned_model.random_search_lgb', 'training', None),
+]
+# Cases that train models, only run up to --max-train-rows
+TRAINING_CASES = {'model.train_and_predict_lgb', 'tunned_model.random_search_lgb'}
+
+
+def build_inputs(bundle, n_rows, training_data=None):
+    """
+    Builds the inputs of every case at one scale.
+
+    Returns:
+    - dict: Input name mapped to a DataFrame, a Series or a tuple of them.
+    """
+    raw = upsample(load_salaries(), n_rows)
+    preprocessed = preprocess_data(raw.copy())
+    features = create_features(preprocessed.copy(), job_salary_density=bundle.job_density)
+    inputs = {
+        'raw': raw,
+        'residences': raw['employee_residence'],
+        'preprocessed': preprocessed,
+        'levels': preprocessed['experience_level'],
+        'features': features,
+        'densities': add_salary_density(features.copy()),
+        'model_input': build_model_input(bundle, raw[bundle.plan.source_columns()]),
+    }
+    if training_data is not None:
+        X_train, X_test, y_train, y_test = training_data
+        train = upsample(pd.concat([X_train, y_train], axis=1), n_rows)
+        inputs['training'] = (train.drop(columns=[y_train.name]), train[y_train.name], X_test, y_test)
+    return inputs
+
+
+def case_functions(bundle, tmp_dir, search_iter):
+    # Cases that need the artifacts or extra arguments
+    from model import train_and_predict_lgb
+    from tunned_model import random_search_lgb
+
+    compiled = load_compiled_model(os.path.join(ROOT_DIR, 'lightgbm_tunned_model.npz'))
+    stats_path = os.path.join(tmp_dir, 'salary_density_by_job.pkl')
+    return {
+        'feature_creation.save_salary_density_by_job': lambda data: save_salary_density_by_job(data, stats_path=stats_path),
+        'feature_creation.map_job_density': lambda data: map_job_density(data, job_salary_density=bundle.job_density),
+        'feature_creation.create_features': lambda data: create_features(data, job_salary_density=bundle.job_density),
+        'model.predict[booster]': bundle.model.predict,
+        'model.predict[compiled]': compiled.predict,
+        'model.train_and_predict_lgb': lambda split: train_and_predict_lgb(*split),
+        'tunned_model.random_search_lgb': lambda split: random_search_lgb(*split, n_iter=search_iter),
+    }
+
+
+def copy_input(value):
+    if isinstance(value, tuple):
+        return value
+    return value.copy()
+
+
+def time_case(func, value, repeat):
+    """
+    Runs func on a fresh copy of value repeat times.
+
+    Returns:
+    - list: Wall time of every run, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        argument = copy_input(value)
+        # The functions print progress (random search trials, saved files)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(argument)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help='Rows of each input.')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of each case; the fastest and the median are reported.')
+    parser.add_argument('--train-repeat', type=int, default=1, help='Runs of the training cases.')
+    parser.add_argument('--max-train-rows', type=int, default=100_000, help='Largest scale the training cases run at.')
+    parser.add_argument('--search-iter', type=int, default=6, help='Combinations tried by random_search_lgb.')
+    parser.add_argument('--only', nargs='+', metavar='PATTERN', help="Cases to run, e.g. 'pre_processing.*'.")
+    parser.add_argument('-o', '--output', help='Results file (default: benchmarks/results/suite-<commit>.json).')
+    args = parser.parse_args()
+
+    bundle = load_artifacts(os.path.join(ROOT_DIR, 'artifacts.json'))
+    cases = [(name, key, func) for name, key, func in CASES
+             if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    needs_training = any(name in TRAINING_CASES for name, _, _ in cases)
+    training_data = load_training_data() if needs_training else None
+
+    tmp_dir = tempfile.mkdtemp(prefix='bench-suite-')
+    results = []
+    try:
+        functions = case_functions(bundle, tmp_dir, args.search_iter)
+        print(f"{'case':>52} {'rows':>10} {'best s':>9} {'median s':>9} {'rows/s':>13}")
+        for n_rows in args.scales:
+            inputs = build_inputs(bundle, n_rows, training_data if n_rows <= args.max_train_rows else None)
+            for name, key, func in cases:
+                if key not in inputs:
+                    continue
+                repeat = args.train_repeat if name in TRAINING_CASES else args.repeat
+                timings = time_case(func or functions[name], inputs[key], repeat)
+                best, median = min(timings), statistics.median(timings)
+                results.append({'name': name, 'rows': n_rows, 'repeat': repeat, 'seconds': best,
+                                'median_seconds': median, 'rows_per_second': n_rows / best})
+                print(f"{name:>52} {n_rows:>10} {best:>9.4f} {median:>9.4f} {n_rows / best:>13,.0f}")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    output = args.output or default_results_path('suite')
+    save_results(output, 'suite', results, vars(args))
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Request decoding and scoring of large batches: rows as JSON objects turned into a DataFrame
+(the /predict path) against column batches in JSON, msgpack and Arrow IPC decoded straight
+into dictionary-encoded columns (the /predict/columns path), with the body sizes.
+
+"decode" is the body to model input (row dicts or a ColumnarTable), "total" adds scoring and
+the response body.
+
+Usage:
+    python benchmarks/bench_wire_format.py --rows 50000
+"""
+import argparse
+import json
+
+from columnar import predict_columnar
+from common import ROOT_DIR, best_time, load_salaries, upsample
+from registry import load_artifacts
+from serving import predict_records
+from wire_format import WIRE_FORMATS, decode_columns, encode_columns, encode_predictions
+
+
+def score_rows(bundle, body):
+    records = json.loads(body)['data']
+    return json.dumps({'predictions': predict_records(bundle, records).tolist(),
+                       'model_version': bundle.version}).encode()
+
+
+def score_columns(bundle, body, wire_format, columns):
+    distinct, inverse = decode_columns(body, wire_format, columns).distinct_rows()
+    return encode_predictions(predict_columnar(bundle, distinct)[inverse], bundle.version, wire_format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bundle = load_artifacts(f'{ROOT_DIR}/artifacts.json')
+    columns = bundle.plan.source_columns()
+    rows = upsample(load_salaries()[columns], args.rows)
+
+    print(f"{args.rows} rows")
+    print(f"{'request body':>22} {'MB':>8} {'decode s':>10} {'total s':>10}")
+    body = json.dumps({'data': rows.to_dict(orient='records')}).encode()
+    decode = best_time(lambda: json.loads(body)['data'], args.repeat)
+    total = best_time(lambda: score_rows(bundle, body), args.repeat)
+    print(f"{'JSON rows':>22} {len(body) / 2 ** 20:>8.1f} {decode:>10.3f} {total:>10.3f}")
+    for wire_format in WIRE_FORMATS:
+        body = encode_columns(rows, wire_format)
+        decode = best_time(lambda: decode_columns(body, wire_format, columns), args.repeat)
+        total = best_time(lambda: score_columns(bundle, body, wire_format, columns), args.repeat)
+        print(f"{f'{wire_format} columns':>22} {len(body) / 2 ** 20:>8.1f} {decode:>10.3f} {total:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
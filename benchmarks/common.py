@@ -0,0 +1,171 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The library modules import each other by their flat names (as app.py does), so the
+library folder is added to sys.path here.
+"""
+import http.client
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+LIB_DIR = os.path.join(ROOT_DIR, 'salary_prediction_lib')
+SALARIES_PATH = os.path.join(ROOT_DIR, 'data', 'salaries.csv')
+
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+
+
+def load_salaries(preprocessed=False):
+    """
+    Loads data/salaries.csv.
+
+    Parameters:
+    - preprocessed (bool): If True, runs preprocess_data on it (full country names and descriptions).
+
+    Returns:
+    - pd.DataFrame: The salaries dataset.
+    """
+    data = pd.read_csv(SALARIES_PATH)
+    if preprocessed:
+        from pre_processing import preprocess_data
+        data = preprocess_data(data)
+    return data
+
+
+def upsample(data, n_rows, seed=42):
+    """
+    Builds a synthetic dataset of n_rows by sampling rows of data with replacement.
+
+    Parameters:
+    - data (pd.DataFrame): Rows to sample from.
+    - n_rows (int): Number of rows of the result.
+    - seed (int): Random seed for reproducibility.
+
+    Returns:
+    - pd.DataFrame: The upsampled dataset, with a fresh RangeIndex.
+    """
+    rng = np.random.default_rng(seed)
+    return data.iloc[rng.integers(0, len(data), n_rows)].reset_index(drop=True)
+
+
+def best_time(func, repeat=3):
+    """
+    Runs func several times and returns the fastest wall time in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def load_training_data(test_size=0.2, seed=42):
+    """
+    Builds the encoded train/test split the notebook trains on, from data/salaries.csv.
+
+    Parameters:
+    - test_size (float): Fraction of rows held out.
+    - seed (int): Random seed of the split.
+
+    Returns:
+    - tuple: X_train, X_test, y_train, y_test.
+    """
+    from sklearn.model_selection import train_test_split
+
+    from encoding import CATEGORICAL_COLUMNS, CategoricalEncoders
+    from pre_processing import drop_unnecessary_columns, remove_outliers_iqr
+    from transforms import compile_plan
+
+    data = compile_plan().run_frame(load_salaries(), training=True)
+    data = remove_outliers_iqr(drop_unnecessary_columns(data), column='salary_in_usd')
+    data = CategoricalEncoders.fit(data, CATEGORICAL_COLUMNS).transform(data)
+    X = data.drop(columns=['salary_in_usd', 'job_title_frequency'])
+    return train_test_split(X, data['salary_in_usd'], test_size=test_size, random_state=seed)
+
+
+def run_metadata():
+    """
+    Describes the code and machine a benchmark ran on, stored with its results.
+
+    Returns:
+    - dict: Git commit (and whether the tree had local changes), date, Python, platform, CPUs
+      and the versions of the main dependencies.
+    """
+    import platform
+    import subprocess
+    from datetime import datetime, timezone
+    from importlib import metadata
+
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    versions = {}
+    for package in ('numpy', 'pandas', 'lightgbm', 'scikit-learn', 'fastapi', 'uvicorn'):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count(),
+        'versions': versions,
+    }
+
+
+def default_results_path(kind):
+    """
+    Returns benchmarks/results/<kind>-<short commit>.json, the default output of a suite run.
+    """
+    commit = (run_metadata()['commit'] or 'unknown')[:10]
+    return os.path.join(ROOT_DIR, 'benchmarks', 'results', f'{kind}-{commit}.json')
+
+
+def save_results(path, kind, results, settings=None):
+    """
+    Writes benchmark results to a JSON file that compare_results.py reads.
+
+    Parameters:
+    - path (str): Destination file; its folder is created if needed.
+    - kind (str): Benchmark that produced the results, e.g. 'suite' or 'load'.
+    - results (list): One dict per measurement, with a 'name' and numeric metrics.
+    - settings (dict or None): Arguments of the run.
+    """
+    import json
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({'kind': kind, 'meta': run_metadata(), 'settings': settings or {}, 'results': results}, file, indent=2)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, timeout=120, host='127.0.0.1'):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request('GET', '/stats')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"The server on port {port} did not start")
@@ -0,0 +1,81 @@
+"""
+Compares two result files of bench_suite.py or bench_load.py, e.g. the run of the main branch
+against the run of a change, and exits with an error if a measurement regressed by more than
+the threshold.
+
+Measurements are matched by name and rows. The change of each one is reported as a slowdown
+factor: new time / old time for timings and latencies, old rate / new rate for throughputs, so
+above 1 is always worse.
+
+Usage:
+    python benchmarks/compare_results.py benchmarks/results/suite-<old>.json benchmarks/results/suite-<new>.json
+"""
+import argparse
+import json
+import sys
+
+# Metrics compared, and whether lower values are better
+METRICS = {'seconds': True, 'p50_ms': True, 'p99_ms': True, 'requests_per_second': False}
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(baseline, current, threshold):
+    """
+    Matches the measurements of two runs.
+
+    Parameters:
+    - baseline, current (dict): Contents of two result files.
+    - threshold (float): Slowdown above 1 + threshold that counts as a regression.
+
+    Returns:
+    - list: (name, rows, metric, old, new, slowdown, regressed) for every metric in both runs.
+    """
+    old_results = {(result['name'], result['rows']): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = old_results.get((result['name'], result['rows']))
+        if old is None:
+            continue
+        for metric, lower_is_better in METRICS.items():
+            if metric not in result or metric not in old or not old[metric] or not result[metric]:
+                continue
+            slowdown = result[metric] / old[metric] if lower_is_better else old[metric] / result[metric]
+            rows.append((result['name'], result['rows'], metric, old[metric], result[metric], slowdown,
+                         slowdown > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Slowdown tolerated (default 0.10, 10%%).')
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    if baseline.get('kind') != current.get('kind'):
+        parser.error(f"Cannot compare a '{baseline.get('kind')}' run with a '{current.get('kind')}' run.")
+    for label, run in (('baseline', baseline), ('current', current)):
+        meta = run['meta']
+        commit = (meta.get('commit') or 'unknown')[:10] + (' (with local changes)' if meta.get('dirty') else '')
+        print(f"{label:>8}: {commit}, {meta.get('date')}, Python {meta.get('python')}, {meta.get('cpus')} CPUs")
+    if (baseline['meta'].get('platform'), baseline['meta'].get('cpus')) != (current['meta'].get('platform'), current['meta'].get('cpus')):
+        print("Warning: the runs come from different machines; timings are not comparable.")
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"\n{'measurement':>52} {'rows':>10} {'metric':>20} {'old':>12} {'new':>12} {'slowdown':>9}")
+    for name, n_rows, metric, old, new, slowdown, regressed in rows:
+        print(f"{name:>52} {n_rows:>10} {metric:>20} {old:>12.4g} {new:>12.4g} {slowdown:>8.2f}x"
+              + ('  REGRESSION' if regressed else ''))
+
+    regressions = sum(row[-1] for row in rows)
+    print(f"\n{len(rows)} measurements compared, {regressions} slower by more than {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
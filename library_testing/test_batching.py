@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from salary_prediction_lib.batching import MicroBatcher
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a batch function that doubles its inputs and records every call.
+        """
+        self.calls = []
+
+        def predict_batch(records):
+            self.calls.append(list(records))
+            if "bad" in records:
+                raise ValueError("bad record")
+            return [record * 2 for record in records]
+
+        self.predict_batch = predict_batch
+
+    def test_concurrent_requests_share_a_batch(self):
+        """
+        Test that concurrent requests are scored in one call and get their own results back.
+        """
+        async def run():
+            batcher = MicroBatcher(self.predict_batch, max_wait_ms=50, max_batch_rows=100)
+            results = await asyncio.gather(batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([4, 5, 6]))
+            stats = batcher.stats()
+            await batcher.stop()
+            return results, stats
+
+        results, stats = asyncio.run(run())
+        self.assertEqual(results, [[2, 4], [6], [8, 10, 12]])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(stats["batches"], 1)
+        self.assertEqual(stats["rows"], 6)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_max_batch_rows(self):
+        """
+        Test that a batch is scored once it reaches max_batch_rows.
+        """
+        async def run():
+            batcher = MicroBatcher(self.predict_batch, max_wait_ms=50, max_batch_rows=3)
+            results = await asyncio.gather(*(batcher.submit([i, i]) for i in range(3)))
+            await batcher.stop()
+            return results
+
+        self.assertEqual(asyncio.run(run()), [[0, 0], [2, 2], [4, 4]])
+        self.assertTrue(all(len(call) <= 3 for call in self.calls))
+
+    def test_failing_request_is_isolated(self):
+        """
+        Test that a failing request does not fail the others in its batch.
+        """
+        async def run():
+            batcher = MicroBatcher(self.predict_batch, max_wait_ms=50)
+            results = await asyncio.gather(batcher.submit([1]), batcher.submit(["bad"]), return_exceptions=True)
+            await batcher.stop()
+            return results
+
+        good, bad = asyncio.run(run())
+        self.assertEqual(good, [2])
+        self.assertIsInstance(bad, ValueError)
+
+if __name__ == "__main__":
+    unittest.main()
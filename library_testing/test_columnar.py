@@ -0,0 +1,69 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.feature_creation import create_features
+from salary_prediction_lib.pre_processing import preprocess_data, remove_outliers_iqr
+# Imported by its flat name, like the library modules, so the tables match the classes the feature plan checks
+from columnar import ColumnarTable, DictColumn, predict_columnar, remove_outliers_iqr_columnar
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestColumnar(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False, na_values=[""])
+        cls.data = data.sample(2000, random_state=3).reset_index(drop=True)
+        cls.rows = cls.data.drop(columns=["salary", "salary_currency", "salary_in_usd"])
+
+    def test_dict_column_take(self):
+        """
+        Test that missing rows (code -1) get the missing value when a column is materialized.
+        """
+        column = DictColumn.from_array(pd.Series(["a", None, "b", "a"]))
+        np.testing.assert_array_equal(column.take([1.0, 2.0], missing=0.0), [1.0, 0.0, 2.0, 1.0])
+
+    def test_predictions_match_pandas_path(self):
+        """
+        Test that the columnar pipeline predicts exactly what the pandas functions give, from pandas and Arrow.
+        """
+        dataset = create_features(preprocess_data(self.rows.copy()), job_salary_density=self.bundle.job_density)
+        dataset = self.bundle.encoder.transform(dataset)
+        aliases = {"salary_density_by_experience": "salary_density"}
+        expected = self.bundle.model.predict(pd.DataFrame({name: dataset[aliases.get(name, name)]
+                                                           for name in self.bundle.model.feature_name()}))
+        from_pandas = predict_columnar(self.bundle, ColumnarTable.from_pandas(self.rows), block_rows=300)
+        from_arrow = predict_columnar(self.bundle, ColumnarTable.from_arrow(pa.Table.from_pandas(self.rows)))
+        np.testing.assert_array_equal(from_pandas, expected)
+        np.testing.assert_array_equal(from_arrow, expected)
+
+    def test_outlier_filter_matches_pandas_path(self):
+        """
+        Test that the columnar outlier filter keeps the rows of the pandas function on the plan's training features.
+        """
+        table = self.bundle.plan.run(ColumnarTable.from_pandas(self.data), training=True)
+        filtered = remove_outliers_iqr_columnar(table)
+        expected = remove_outliers_iqr(table.to_pandas())
+        self.assertLess(len(filtered), len(table))
+        np.testing.assert_array_equal(filtered.dense("salary_in_usd"), expected["salary_in_usd"].to_numpy())
+
+    def test_outliers_with_missing_values(self):
+        """
+        Test that a missing salary does not change the bounds and only its own row is dropped, as with pandas.
+        """
+        data = self.data.assign(salary_in_usd=self.data["salary_in_usd"].astype(float))
+        data.loc[0, "salary_in_usd"] = np.nan
+        filtered = remove_outliers_iqr_columnar(ColumnarTable.from_pandas(data), column="salary_in_usd")
+        expected = remove_outliers_iqr(data, column="salary_in_usd")
+        self.assertGreater(len(filtered), len(data) // 2)
+        np.testing.assert_array_equal(filtered.dense("salary_in_usd"), expected["salary_in_usd"].to_numpy())
+
+if __name__ == '__main__':
+    unittest.main()
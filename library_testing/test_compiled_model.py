@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.compiled_model import compile_model, load_compiled_model
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.serving import build_model_input, predict_records
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestCompiledModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts, compile the booster and build the model input of data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        cls.model = compile_model(cls.bundle.model)
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False)
+        cls.records = data[cls.bundle.plan.source_columns()].to_dict(orient="records")
+        cls.matrix = build_model_input(cls.bundle, data).to_numpy()
+
+    def test_parity_on_salaries(self):
+        """
+        Test that the compiled trees predict exactly like the booster on every row of data/salaries.csv.
+        """
+        expected = self.bundle.model.predict(self.matrix)
+        np.testing.assert_array_equal(self.model.predict(self.matrix), expected)
+        # One row at a time, as the single-record fast path predicts
+        np.testing.assert_array_equal([self.model.predict(row)[0] for row in self.matrix[:300]], expected[:300])
+
+    def test_missing_values(self):
+        """
+        Test that NaN and zero inputs follow LightGBM's missing value rules.
+        """
+        matrix = self.matrix[:2000].copy()
+        matrix[::3, 3] = np.nan
+        matrix[::5, 11] = np.nan
+        matrix[::2, 8] = 0.0
+        np.testing.assert_array_equal(self.model.predict(matrix), self.bundle.model.predict(matrix))
+
+    def test_saved_model_in_manifest(self):
+        """
+        Test that a saved model loads back unchanged, and that the manifest's compiled model serves the same predictions.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "model.npz")
+            self.model.save(path)
+            loaded = load_compiled_model(path)
+        self.assertEqual(loaded.feature_name(), self.bundle.model.feature_name())
+        np.testing.assert_array_equal(loaded.predict(self.matrix[:500]), self.model.predict(self.matrix[:500]))
+
+        compiled = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"), compiled=True)
+        records = self.records[:500]
+        np.testing.assert_array_equal(predict_records(compiled, records), predict_records(self.bundle, records))
+
+    def test_shared_memory(self):
+        """
+        Test that a model moved to shared memory predicts the same and cannot be modified.
+        """
+        model = compile_model(self.bundle.model).share_memory()
+        np.testing.assert_array_equal(model.predict(self.matrix[:500]), self.model.predict(self.matrix[:500]))
+        with self.assertRaises(ValueError):
+            model.leaf_value[0] = 0.0
+
+    def test_serving_without_lightgbm(self):
+        """
+        Test that loading and serving the compiled model does not import LightGBM, scikit-learn or SciPy.
+        """
+        script = ("import sys\n"
+                  "from registry import load_artifacts\n"
+                  "from serving import predict_records\n"
+                  "bundle = load_artifacts('artifacts.json', compiled=True)\n"
+                  f"predict_records(bundle, {self.records[:3]!r})\n"
+                  "print([name for name in ('lightgbm', 'sklearn', 'scipy') if name in sys.modules])\n")
+        env = dict(os.environ, PYTHONPATH=os.path.join(ROOT_DIR, "salary_prediction_lib"))
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from salary_prediction_lib.cross_validation import cross_validate_lgb, kfold_indices
+from salary_prediction_lib.metrics import MetricsAccumulator, bootstrap_metrics, calculate_regression_metrics
+
+class TestCrossValidation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Build a synthetic regression dataset with salary-like targets and noisy predictions.
+        """
+        rng = np.random.default_rng(0)
+        cls.X = pd.DataFrame(rng.normal(size=(600, 4)), columns=["a", "b", "c", "d"])
+        cls.y = pd.Series(100_000 + 20_000 * cls.X["a"] - 5_000 * cls.X["b"] ** 2 + rng.normal(0, 3_000, 600))
+        cls.y_pred = cls.y.to_numpy() * rng.normal(1, 0.1, 600)
+
+    def test_metrics_match_scikit_learn(self):
+        """
+        Test that the fused metrics equal scikit-learn's and the former MAPE / SMAPE formulas.
+        """
+        y, y_pred = self.y.to_numpy(), self.y_pred
+        metrics = calculate_regression_metrics(self.y, y_pred)
+        self.assertAlmostEqual(metrics["RMSE"], np.sqrt(mean_squared_error(y, y_pred)), places=6)
+        self.assertAlmostEqual(metrics["MAE"], mean_absolute_error(y, y_pred), places=6)
+        self.assertAlmostEqual(metrics["R^2"], r2_score(y, y_pred), places=12)
+        self.assertAlmostEqual(metrics["MAPE (%)"], np.mean(np.abs((y - y_pred) / y)) * 100, places=12)
+        self.assertAlmostEqual(metrics["SMAPE (%)"], np.mean(2 * np.abs(y - y_pred) / (np.abs(y) + np.abs(y_pred))) * 100, places=12)
+
+    def test_merged_accumulators(self):
+        """
+        Test that accumulators of chunks, merged in any grouping, give the metrics of all the rows.
+        """
+        y = self.y.to_numpy()
+        chunks = np.array_split(np.arange(len(y)), 7)
+        streamed = MetricsAccumulator()
+        for chunk in chunks[:3]:
+            streamed.update(y[chunk], self.y_pred[chunk])
+        other = MetricsAccumulator()
+        for chunk in chunks[3:]:
+            other.update(y[chunk], self.y_pred[chunk])
+        merged = streamed.merge(other).result()
+        expected = calculate_regression_metrics(y, self.y_pred)
+        for name, value in expected.items():
+            self.assertAlmostEqual(merged[name], value, delta=abs(value) * 1e-12, msg=name)
+        self.assertTrue(np.isnan(MetricsAccumulator().result()["RMSE"]))
+
+    def test_bootstrap_intervals(self):
+        """
+        Test that the intervals contain the estimate and do not depend on the number of workers.
+        """
+        intervals = bootstrap_metrics(self.y, self.y_pred, n_resamples=120, chunk_size=50)
+        for name, interval in intervals.items():
+            self.assertLess(interval["lower"], interval["estimate"], name)
+            self.assertGreater(interval["upper"], interval["estimate"], name)
+        self.assertEqual(bootstrap_metrics(self.y, self.y_pred, n_resamples=120, chunk_size=50, n_workers=2), intervals)
+
+    def test_cross_validation(self):
+        """
+        Test that every row gets one out-of-fold prediction and parallel folds give the same results.
+        """
+        folds = kfold_indices(len(self.y), 4)
+        self.assertEqual(sorted(np.concatenate(folds).tolist()), list(range(len(self.y))))
+
+        sequential = cross_validate_lgb(self.X, self.y, n_splits=4, num_boost_round=20, threads_per_worker=1,
+                                        n_bootstrap=50)
+        parallel = cross_validate_lgb(self.X, self.y, n_splits=4, num_boost_round=20, threads_per_worker=1,
+                                      n_bootstrap=50, n_workers=2)
+        np.testing.assert_array_equal(sequential["predictions"], parallel["predictions"])
+        self.assertEqual([fold["rows"] for fold in sequential["folds"]], [150] * 4)
+        expected = calculate_regression_metrics(self.y, sequential["predictions"])
+        for name, value in expected.items():
+            self.assertAlmostEqual(sequential["out_of_fold"][name], value, delta=abs(value) * 1e-12, msg=name)
+        self.assertEqual(sequential["intervals"], parallel["intervals"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.dataset_cache import DatasetCache, binning_params
+from salary_prediction_lib.model import train_and_predict_lgb
+
+class TestDatasetCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create a small regression problem.
+        """
+        rng = np.random.default_rng(1)
+        X = pd.DataFrame({"a": rng.normal(size=1500), "b": rng.integers(0, 20, size=1500)})
+        y = pd.Series(2 * X["a"] + X["b"] + rng.normal(scale=0.1, size=len(X)), name="salary_in_usd")
+        cls.X_train, cls.X_test = X.iloc[:1200], X.iloc[1200:]
+        cls.y_train, cls.y_test = y.iloc[:1200], y.iloc[1200:]
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = DatasetCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_binning_params(self):
+        """
+        Test that only binning parameters are kept, by their canonical names.
+        """
+        self.assertEqual(binning_params({"max_bins": 63, "learning_rate": 0.1, "min_child_samples": 5}),
+                         {"max_bin": 63, "min_data_in_leaf": 5})
+
+    def test_key(self):
+        """
+        Test that the key follows the data and the binning parameters, not the other parameters.
+        """
+        key = self.cache.key(self.X_train, self.y_train, {"seed": 42, "learning_rate": 0.1})
+        self.assertEqual(key, self.cache.key(self.X_train.copy(), self.y_train, {"seed": 42, "learning_rate": 0.5}))
+        self.assertNotEqual(key, self.cache.key(self.X_train, self.y_train, {"seed": 42, "max_bin": 63}))
+        changed = self.X_train.copy()
+        changed.iloc[0, 0] += 1
+        self.assertNotEqual(key, self.cache.key(changed, self.y_train, {"seed": 42}))
+
+    def test_hit_loads_the_binary_dataset(self):
+        """
+        Test that the second request loads the saved dataset.
+        """
+        self.cache.train_valid(self.X_train, self.y_train, self.X_test, self.y_test)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+        train_set, valid_set = self.cache.train_valid(self.X_train, self.y_train, self.X_test, self.y_test)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+        self.assertEqual(train_set.num_data(), len(self.X_train))
+        # LightGBM keeps labels as float32
+        np.testing.assert_allclose(valid_set.get_label(), self.y_test, rtol=1e-6)
+
+    def test_same_model_with_cache(self):
+        """
+        Test that training on cached datasets gives the same predictions as on the DataFrames.
+        """
+        expected = train_and_predict_lgb(self.X_train, self.y_train, self.X_test, self.y_test)
+        for _ in range(2):
+            y_pred = train_and_predict_lgb(self.X_train, self.y_train, self.X_test, self.y_test,
+                                           dataset_cache=self.cache)
+            np.testing.assert_array_equal(y_pred, expected)
+        self.assertEqual(self.cache.hits, 2)
+
+if __name__ == "__main__":
+    unittest.main()
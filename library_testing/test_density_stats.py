@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.density_stats import SalaryDensityStore, group_stats, merge_group_stats
+from salary_prediction_lib.encoding import CategoricalEncoders
+from salary_prediction_lib.feature_creation import add_salary_density
+from salary_prediction_lib.pre_processing import remove_outliers_iqr
+
+class TestSalaryDensityStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a small dataset with outliers, single-row groups and missing experience levels.
+        """
+        rng = np.random.default_rng(3)
+        n = 400
+        self.data = pd.DataFrame({
+            "job_title": rng.choice(["Data Scientist", "Data Engineer", "ML Engineer", "Analyst"], size=n),
+            "years_of_experience": rng.choice([1.0, 4.0, 8.0, 10.0], size=n),
+            "salary_in_usd": rng.normal(120000, 30000, size=n).round(),
+        })
+        self.data.loc[:4, "salary_in_usd"] = 900000
+        self.data.loc[5, "years_of_experience"] = np.nan
+        self.data.loc[6, ["job_title", "years_of_experience"]] = ["Head of Data", 20.0]
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def expected_job_density(self):
+        # The notebook: density on every row, outlier filter, then the mean by job title
+        dataset = add_salary_density(self.data.copy())
+        dataset = remove_outliers_iqr(dataset, column="salary_in_usd", multiplier=1.5)
+        return dataset.groupby("job_title")["salary_density_by_experience"].mean().to_dict()
+
+    def assertDensityEqual(self, result, expected):
+        self.assertEqual(set(result), set(expected))
+        for job, value in expected.items():
+            self.assertAlmostEqual(result[job], value, places=10)
+
+    def test_merge_group_stats(self):
+        """
+        Test that merging the stats of two halves gives the stats of the whole.
+        """
+        values, keys = self.data["salary_in_usd"], self.data["years_of_experience"]
+        merged = merge_group_stats(group_stats(values[:150], keys[:150]), group_stats(values[150:], keys[150:]))
+        expected = group_stats(values, keys)
+        pd.testing.assert_frame_equal(merged, expected, check_exact=False, rtol=1e-12)
+
+    def test_matches_full_recomputation(self):
+        """
+        Test that the store gives the same salary densities as add_salary_density + save_salary_density_by_job.
+        """
+        store = SalaryDensityStore.from_dataset(self.data)
+        self.assertDensityEqual(store.job_density(), self.expected_job_density())
+        np.testing.assert_allclose(store.salary_density(self.data),
+                                   add_salary_density(self.data.copy())["salary_density_by_experience"])
+
+    def test_incremental_updates(self):
+        """
+        Test that batches merged one at a time, or through separate stores, give the same stats.
+        """
+        bounds = SalaryDensityStore.from_dataset(self.data).salary_bounds
+        store = SalaryDensityStore(salary_bounds=bounds)
+        for batch in (self.data.iloc[:100], self.data.iloc[100:250], self.data.iloc[250:]):
+            store.update(batch)
+        self.assertEqual(store.rows, len(self.data))
+        self.assertDensityEqual(store.job_density(), self.expected_job_density())
+
+        other = SalaryDensityStore(salary_bounds=bounds).update(self.data.iloc[200:])
+        store = SalaryDensityStore(salary_bounds=bounds).update(self.data.iloc[:200]).merge(other)
+        self.assertDensityEqual(store.job_density(), self.expected_job_density())
+
+    def test_save_and_load(self):
+        """
+        Test that a saved store keeps being updated and emits stats keyed by job title code.
+        """
+        path = os.path.join(self.tmp_dir, "store.pkl")
+        SalaryDensityStore.from_dataset(self.data.iloc[:300]).save(path)
+        store = SalaryDensityStore.load(path).update(self.data.iloc[300:])
+
+        encoder = CategoricalEncoders.fit(self.data, ["job_title"])
+        stats_path = os.path.join(self.tmp_dir, "salary_density_by_job.pkl")
+        saved = store.save_job_density(stats_path, encoder)
+        self.assertEqual(set(saved), set(range(len(encoder.classes["job_title"]))))
+        self.assertAlmostEqual(saved[encoder.lookup["job_title"]["Head of Data"]], 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.encoding import (
+    CategoricalEncoders,
+    UNSEEN_CODE,
+    load_encoders,
+    save_encoders
+)
+
+class TestCategoricalEncoders(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a sample training dataset and fit the encoders on it.
+        """
+        self.train_data = pd.DataFrame({
+            "job_title": ["Data Scientist", "Data Engineer", "Data Scientist", "Analyst"],
+            "company_size": ["Medium", "Large", "Small", "Medium"]
+        })
+        self.encoders = CategoricalEncoders.fit(self.train_data, ["job_title", "company_size"])
+
+    def test_codes_match_training(self):
+        """
+        Test that codes follow the sorted training classes, like sklearn's LabelEncoder.
+        """
+        encoded = self.encoders.transform(self.train_data.copy())
+        self.assertEqual(list(encoded["job_title"]), [2, 1, 2, 0])
+        self.assertEqual(list(encoded["company_size"]), [1, 0, 2, 1])
+
+    def test_codes_do_not_depend_on_batch(self):
+        """
+        Test that a batch gets the training codes, not codes fitted on the batch itself.
+        """
+        batch = pd.DataFrame({"job_title": ["Data Scientist"], "company_size": ["Small"]})
+        encoded = self.encoders.transform(batch)
+        self.assertEqual(encoded.loc[0, "job_title"], 2)
+        self.assertEqual(encoded.loc[0, "company_size"], 2)
+
+    def test_unseen_categories(self):
+        """
+        Test that unseen categories always get UNSEEN_CODE.
+        """
+        codes = self.encoders.transform_column("job_title", np.array(["Data Scientist", "Astronaut", "Chef"], dtype=object))
+        self.assertEqual(list(codes), [2, UNSEEN_CODE, UNSEEN_CODE])
+        self.assertEqual(self.encoders.encode_value("job_title", "Astronaut"), UNSEEN_CODE)
+        self.assertEqual(self.encoders.encode_value("job_title", "Analyst"), 0)
+
+    def test_save_and_load(self):
+        """
+        Test that saved encoders load back with the same lookup tables.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "encoders.pkl")
+            save_encoders(self.encoders, path)
+            loaded = load_encoders(path)
+        self.assertEqual(loaded.lookup, self.encoders.lookup)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.prediction_cache import PredictionCache
+from salary_prediction_lib.registry import ArtifactBundle, load_artifacts
+from salary_prediction_lib.serving import build_model_input, predict_records
+# Imported by their flat names, like the library modules, so the compiled model is the class explain checks
+from compiled_model import compile_model
+from explain import ExplanationUnavailableError, explain_records, format_explanations
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestExplain(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of data/salaries.csv with repeated rows.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False)
+        rows = data.sample(150, random_state=5)
+        cls.records = rows.to_dict(orient="records") + rows.head(50).to_dict(orient="records")
+
+    def test_contributions_match_booster(self):
+        """
+        Test that the contributions are the booster's pred_contrib of the /predict features and sum to the predictions,
+        and that explanations report exactly the /predict prediction.
+        """
+        contributions, predictions = explain_records(self.bundle, self.records, return_predictions=True)
+        expected = self.bundle.model.predict(build_model_input(self.bundle, pd.DataFrame(self.records)), pred_contrib=True)
+        np.testing.assert_array_equal(contributions, expected)
+        expected_predictions = predict_records(self.bundle, self.records)
+        np.testing.assert_allclose(contributions.sum(axis=1), expected_predictions, rtol=1e-12)
+        np.testing.assert_array_equal(predictions, expected_predictions)
+        self.assertEqual(explain_records(self.bundle, []).shape, (0, len(self.bundle.model.feature_name()) + 1))
+
+        explanations = format_explanations(self.bundle.model.feature_name(), contributions, predictions)
+        self.assertEqual([explanation["prediction"] for explanation in explanations], expected_predictions.tolist())
+
+    def test_cached_explanations(self):
+        """
+        Test that repeated rows are served from the cache with the same explanation, keyed by feature.
+        """
+        cache = PredictionCache(max_entries=1000)
+        score = lambda rows: explain_records(self.bundle, rows).tolist()
+        first = cache.predict(self.bundle, self.records, score)
+        self.assertEqual(len(cache), len(pd.DataFrame(self.records)[self.bundle.plan.source_columns()].drop_duplicates()))
+        second = cache.predict(self.bundle, self.records[:10], score)
+        self.assertEqual(cache.stats()["hits"], 10)
+        self.assertEqual(second, first[:10])
+
+        explanation = format_explanations(self.bundle.model.feature_name(), first[:1],
+                                          predict_records(self.bundle, self.records[:1]))[0]
+        self.assertEqual(list(explanation["contributions"]), self.bundle.model.feature_name())
+        self.assertEqual(explanation["base_value"], first[0][-1])
+
+    def test_compiled_model_cannot_explain(self):
+        """
+        Test that serving the compiled trees gives a clear error instead of contributions.
+        """
+        bundle = ArtifactBundle(self.bundle.version, compile_model(self.bundle.model), self.bundle.encoder,
+                                self.bundle.job_density, self.bundle.plan)
+        with self.assertRaises(ExplanationUnavailableError):
+            explain_records(bundle, self.records[:1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+import pandas as pd
+from salary_prediction_lib.fast_path import SingleRowPredictor
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.serving import predict_records
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestSingleRowPredictor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of raw rows from data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        cls.predictor = SingleRowPredictor(cls.bundle)
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False)
+        columns = ["work_year", "experience_level", "employment_type", "job_title", "employee_residence",
+                   "remote_ratio", "company_location", "company_size"]
+        cls.records = data[columns].sample(300, random_state=42).to_dict(orient="records")
+        # Unseen job title, unknown year and a country missing from the training data
+        cls.records.append({"work_year": 2031, "experience_level": "EX", "employment_type": "FL",
+                            "job_title": "Chief Astronaut", "employee_residence": "AQ", "remote_ratio": 50,
+                            "company_location": "US", "company_size": "S"})
+        # Missing locations, which are never local
+        for residence, location in [(None, None), (None, "US"), ("US", None)]:
+            cls.records.append(dict(cls.records[0], employee_residence=residence, company_location=location))
+
+    def test_parity_with_dataframe_pipeline(self):
+        """
+        Test that the fast path gives exactly the predictions of the DataFrame pipeline.
+        """
+        expected = predict_records(self.bundle, [dict(record) for record in self.records])
+        for record, value in zip(self.records, expected):
+            self.assertEqual(self.predictor.predict_one(record), value)
+        self.assertEqual(self.predictor.features(self.records[-3])["is_local_employee"], 0)
+
+    def test_record_is_not_modified(self):
+        """
+        Test that the caller's record is left untouched.
+        """
+        record = dict(self.records[0])
+        self.predictor.predict_one(record)
+        self.assertEqual(record, self.records[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 import pandas as pd
 from salary_prediction_lib.feature_creation import (
@@ -63,6 +65,36 @@ class TestFeatureCreation(unittest.TestCase):
         self.assertGreater(result.loc[1, "inflation_index"], 1.0)
         self.assertGreater(result.loc[2, "inflation_index"], 1.0)
 
+    def test_add_inflation_index_rates(self):
+        """
+        Test that the inflation index uses US rates for US residents and global rates otherwise.
+        """
+        data = pd.DataFrame({
+            "work_year": [2021, 2022, 2023, 2030],
+            "employee_residence": ["United States", "Spain", "United States", "Spain"]
+        })
+        result = add_inflation_index(data)
+        self.assertAlmostEqual(result.loc[0, "inflation_index"], 1.047)
+        self.assertAlmostEqual(result.loc[1, "inflation_index"], 1.088)
+        self.assertAlmostEqual(result.loc[2, "inflation_index"], 1.034)
+        self.assertAlmostEqual(result.loc[3, "inflation_index"], 1.0)  # Year without known rates
+
+    def test_add_inflation_index_rates_file(self):
+        """
+        Test that new years can be added through the rates file.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rates_path = os.path.join(tmp_dir, "rates.csv")
+            pd.DataFrame({
+                "year": [2024, 2024],
+                "region": ["United States", "Global"],
+                "rate": [0.029, 0.058]
+            }).to_csv(rates_path, index=False)
+            data = pd.DataFrame({"work_year": [2024, 2024], "employee_residence": ["United States", "France"]})
+            result = add_inflation_index(data, rates_path=rates_path)
+        self.assertAlmostEqual(result.loc[0, "inflation_index"], 1.029)
+        self.assertAlmostEqual(result.loc[1, "inflation_index"], 1.058)
+
     def test_add_salary_density(self):
         """
         Test the add_salary_density function.
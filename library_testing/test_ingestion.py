@@ -0,0 +1,77 @@
+import io
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.encoding import CategoricalEncoders
+from salary_prediction_lib.feature_creation import add_job_title_frequency, add_salary_density, create_features, equal_values
+from salary_prediction_lib.ingestion import compact_dtypes, memory_report, read_salaries
+from salary_prediction_lib.pre_processing import map_categories, preprocess_data, remove_outliers_iqr
+from salary_prediction_lib.registry import load_artifacts
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SALARIES_PATH = os.path.join(ROOT_DIR, "data", "salaries.csv")
+
+class TestIngestion(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load data/salaries.csv with the default and the compact dtypes, and the shipped artifacts.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        cls.default = pd.read_csv(SALARIES_PATH, keep_default_na=False, na_values=[""])
+        cls.compact = read_salaries(SALARIES_PATH)
+
+    def test_compact_dtypes(self):
+        """
+        Test that the compact loader reads the same values with categorical and small integer columns.
+        """
+        self.assertEqual(self.compact["job_title"].dtype, "category")
+        self.assertEqual(self.compact["work_year"].dtype, np.int16)
+        self.assertEqual(list(self.compact["remote_ratio"].cat.categories.sort_values()), [0, 50, 100])
+        pd.testing.assert_frame_equal(self.compact.astype(self.default.dtypes.to_dict()), self.default)
+        pd.testing.assert_frame_equal(compact_dtypes(self.default).astype(object), self.compact.astype(object))
+
+        csv = io.StringIO("work_year,employee_residence,remote_ratio\n2024,NA,50\n2023,,0\n")
+        chunks = list(read_salaries(csv, chunksize=1))
+        self.assertEqual(chunks[0]["employee_residence"].iloc[0], "NA")
+        self.assertTrue(pd.isna(chunks[1]["employee_residence"].iloc[0]))
+        self.assertEqual(chunks[1]["remote_ratio"].iloc[0], 0)
+
+        report = memory_report({"default": self.default, "compact": self.compact})
+        self.assertLess(report.loc["total", "compact"] * 10, report.loc["total", "default"])
+
+    def test_pipeline_matches_object_columns(self):
+        """
+        Test that preprocessing, features, outlier removal and encoding give the same values on compact columns.
+        """
+        def pipeline(dataset):
+            dataset = create_features(preprocess_data(dataset.copy()), job_salary_density=self.bundle.job_density)
+            dataset = add_salary_density(add_job_title_frequency(dataset))
+            return remove_outliers_iqr(dataset, column="salary_in_usd", by="job_title").drop(columns=["salary_currency"])
+
+        expected, result = pipeline(self.default), pipeline(self.compact)
+        self.assertEqual(result["employee_residence"].dtype, "category")
+        encoders = CategoricalEncoders.fit(expected)
+        for column in encoders.classes:
+            np.testing.assert_array_equal(CategoricalEncoders.fit(result).classes[column], encoders.classes[column])
+        expected, result = encoders.transform(expected), encoders.transform(result)
+        self.assertEqual(result["job_title"].dtype, np.int16)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_category_helpers(self):
+        """
+        Test that mapped categories are merged, missing rows stay missing, and categoricals compare by value.
+        """
+        values = pd.Series(pd.Categorical(["US", "GB", None, "UK"]))
+        mapped = map_categories(values, {"UK": "GB"})
+        self.assertEqual(sorted(mapped.cat.categories), ["GB", "US"])
+        self.assertEqual(mapped.tolist()[:2] + mapped.tolist()[3:], ["US", "GB", "GB"])
+        self.assertTrue(pd.isna(mapped.iloc[2]))
+
+        other = pd.Series(pd.Categorical(["US", "US", None, "UK"], categories=["UK", "US", "FR"]))
+        self.assertEqual(equal_values(values, other).tolist(), [True, False, False, True])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+import unittest
+import pandas as pd
+from salary_prediction_lib.instrumentation import SamplingProfiler, StageMetrics
+from salary_prediction_lib.pre_processing import preprocess_data
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.serving import predict_records
+import salary_prediction_lib.serving as serving
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestStageMetrics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of raw rows from data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False)
+        cls.data = data.sample(50, random_state=3)
+        # The metrics the library hooks record to
+        cls.stage_metrics = serving.STAGE_METRICS
+
+    def tearDown(self):
+        self.stage_metrics.enable(False)
+        self.stage_metrics.reset()
+
+    def test_histogram_text(self):
+        """
+        Test that durations land in cumulative buckets and rows, sums and requests are exported.
+        """
+        metrics = StageMetrics(enabled=True, buckets=(0.01, 0.1))
+        metrics.observe("encode", 0.005, rows=10)
+        metrics.observe("encode", 0.05, rows=20)
+        metrics.observe("encode", 0.5, rows=30)
+        metrics.count_request("/predict", 422)
+        text = metrics.render()
+        self.assertIn('salary_stage_duration_seconds_bucket{stage="encode",le="0.01"} 1\n', text)
+        self.assertIn('salary_stage_duration_seconds_bucket{stage="encode",le="0.1"} 2\n', text)
+        self.assertIn('salary_stage_duration_seconds_bucket{stage="encode",le="+Inf"} 3\n', text)
+        self.assertIn('salary_stage_duration_seconds_count{stage="encode"} 3\n', text)
+        self.assertIn('salary_stage_rows_total{stage="encode"} 60\n', text)
+        self.assertIn('salary_requests_total{endpoint="/predict",status="422"} 1\n', text)
+        snapshot = metrics.snapshot()["encode"]
+        self.assertAlmostEqual(snapshot["seconds"], 0.555)
+        self.assertAlmostEqual(snapshot["rows_per_second"], 60 / 0.555)
+
+    def test_disabled_records_nothing(self):
+        """
+        Test that disabled metrics keep no data and timed functions still return their result.
+        """
+        metrics = StageMetrics(enabled=False)
+        with metrics.time("encode", 5):
+            pass
+        self.assertEqual(metrics.timed("double")(lambda value: value * 2)(4), 8)
+        metrics.count_request("/predict", 200)
+        self.assertEqual(metrics.snapshot(), {})
+        self.assertNotIn("stage=", metrics.render())
+
+    def test_pipeline_stages(self):
+        """
+        Test that preprocessing, the feature plan steps, encoding and the model are timed with their rows.
+        """
+        self.stage_metrics.enable()
+        predict_records(self.bundle, self.data.to_dict(orient="records"))
+        preprocess_data(self.data.copy())
+        stages = self.stage_metrics.snapshot()
+        for stage in ["plan.employee_residence_name", "plan.inflation_index", "encode", "model_predict",
+                      "preprocess_data", "convert_country_codes"]:
+            self.assertEqual(stages[stage]["calls"], 1, stage)
+            self.assertEqual(stages[stage]["rows"], len(self.data), stage)
+
+    def test_sampling_profiler(self):
+        """
+        Test that the profiler samples the stacks of a busy thread.
+        """
+        def busy_loop(stop):
+            while not stop.is_set():
+                sum(range(1000))
+
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        profiler = SamplingProfiler(interval=0.001)
+        worker.start()
+        profiler.start()
+        time.sleep(0.2)
+        profiler.stop()
+        stop.set()
+        worker.join()
+        self.assertFalse(profiler.running)
+        self.assertGreater(profiler.samples, 0)
+        self.assertIn("busy_loop (test_instrumentation.py:", profiler.folded())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.out_of_core import FEATURE_COLUMNS, ShardSet, prepare_shards, build_datasets
+from salary_prediction_lib.encoding import CATEGORICAL_COLUMNS, CategoricalEncoders
+from salary_prediction_lib.quantile_sketch import QuantileSketch
+from salary_prediction_lib.pre_processing import drop_unnecessary_columns, remove_outliers_iqr
+from salary_prediction_lib.transforms import compile_plan
+
+SALARIES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "salaries.csv")
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def test_exact_quantiles(self):
+        """
+        Test that quantiles match pandas while the distinct values fit in the sketch.
+        """
+        values = pd.Series(np.random.default_rng(0).integers(0, 500, size=5000).astype(float))
+        sketch = QuantileSketch(capacity=1000)
+        for batch in np.array_split(values.to_numpy(), 7):
+            sketch.update(batch)
+        self.assertTrue(sketch.exact)
+        for q in (0, 0.25, 0.5, 0.75, 1):
+            self.assertEqual(sketch.quantile(q), values.quantile(q))
+
+    def test_compressed_quantiles(self):
+        """
+        Test that merged, compressed sketches keep quantiles close to the exact ones.
+        """
+        values = np.random.default_rng(1).lognormal(11, 0.5, size=40000)
+        left, right = QuantileSketch(capacity=500), QuantileSketch(capacity=500)
+        left.update(values[:25000])
+        right.update(values[25000:])
+        left.merge(right)
+        self.assertFalse(left.exact)
+        self.assertLessEqual(len(left.values), 500)
+        for q in (0.25, 0.75):
+            rank = np.searchsorted(np.sort(values), left.quantile(q)) / len(values)
+            self.assertAlmostEqual(rank, q, delta=0.01)
+
+class TestOutOfCoreTraining(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Write part of the salaries export and shard it with a budget small enough for several shards.
+        """
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.csv_path = os.path.join(cls.tmp_dir, "salaries.csv")
+        pd.read_csv(SALARIES_PATH, nrows=6000).to_csv(cls.csv_path, index=False)
+        cls.shards = prepare_shards(cls.csv_path, os.path.join(cls.tmp_dir, "shards"), memory_budget_mb=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def read_split(self, split):
+        return np.vstack([sequence[0:len(sequence)] for sequence in self.shards.sequences(split)])
+
+    def test_matches_in_memory_pipeline(self):
+        """
+        Test that the shards hold the rows, features and encoders of the in-memory pipeline.
+        """
+        data = compile_plan().run_frame(pd.read_csv(self.csv_path), training=True)
+        data = remove_outliers_iqr(drop_unnecessary_columns(data), column="salary_in_usd")
+        encoders = CategoricalEncoders.fit(data, CATEGORICAL_COLUMNS)
+        expected = encoders.transform(data)[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+
+        self.assertGreater(len(self.shards.train_shards), 1)
+        for column in CATEGORICAL_COLUMNS:
+            np.testing.assert_array_equal(self.shards.encoders.classes[column], encoders.classes[column])
+        result = np.vstack([self.read_split("train"), self.read_split("valid")])
+        order = lambda matrix: matrix[np.lexsort(matrix.T[::-1])]
+        np.testing.assert_allclose(order(result), order(expected), rtol=1e-12)
+
+    def test_datasets_from_shards(self):
+        """
+        Test that a model trained on the streamed shards equals one trained on the same rows in memory.
+        """
+        params = {"objective": "regression", "metric": "rmse", "num_leaves": 15, "seed": 42, "verbosity": -1}
+        train_set, valid_set = build_datasets(self.shards, params, batch_size=500)
+        streamed = lgb.train(params, train_set, num_boost_round=20)
+
+        X_train = self.read_split("train")
+        in_memory = lgb.train(params, lgb.Dataset(X_train, label=self.shards.labels("train")), num_boost_round=20)
+        np.testing.assert_allclose(streamed.predict(X_train), in_memory.predict(X_train))
+        self.assertEqual(valid_set.num_data(), len(self.shards.labels("valid")))
+
+    def test_reload_shards(self):
+        """
+        Test that saved shards are loaded back with the same encoders and statistics.
+        """
+        loaded = ShardSet.load(self.shards.shard_dir)
+        self.assertEqual(loaded.train_shards, self.shards.train_shards)
+        self.assertEqual(loaded.salary_bounds, self.shards.salary_bounds)
+        self.assertEqual(loaded.store.job_density(loaded.encoders), self.shards.store.job_density(self.shards.encoders))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import unittest
+import salary_prediction_lib
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestLazyPackage(unittest.TestCase):
+
+    def test_every_export_resolves(self):
+        """
+        Test that every public name of the package can be loaded and is listed by dir().
+        """
+        for name in salary_prediction_lib.__all__:
+            self.assertTrue(callable(getattr(salary_prediction_lib, name)), name)
+            self.assertIn(name, dir(salary_prediction_lib))
+        with self.assertRaises(AttributeError):
+            salary_prediction_lib.not_a_function
+
+    def test_feature_function_does_not_import_training_stack(self):
+        """
+        Test that using a feature function does not import LightGBM, scikit-learn or SciPy.
+        """
+        script = ("import sys\n"
+                  "import salary_prediction_lib\n"
+                  "assert 'pandas' not in sys.modules\n"
+                  "salary_prediction_lib.map_experience_level('Mid Level')\n"
+                  "print([name for name in ('lightgbm', 'sklearn', 'scipy') if name in sys.modules])\n")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT_DIR, os.path.join(ROOT_DIR, "salary_prediction_lib")]))
+        output = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_command_line_entry_point(self):
+        """
+        Test that python -m salary_prediction_lib runs the CLI without the library folder on the path.
+        """
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+        output = subprocess.run([sys.executable, "-m", "salary_prediction_lib", "--help"], cwd=ROOT_DIR, env=env,
+                                check=True, capture_output=True, text=True).stdout
+        self.assertIn("memory-report", output)
+
+if __name__ == "__main__":
+    unittest.main()
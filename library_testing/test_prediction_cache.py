@@ -0,0 +1,97 @@
+import unittest
+from types import SimpleNamespace
+from salary_prediction_lib.prediction_cache import PredictionCache, row_key
+
+COLUMNS = ["work_year", "experience_level", "job_title"]
+
+def make_bundle(version):
+    return SimpleNamespace(version=version, plan=SimpleNamespace(source_columns=lambda: COLUMNS))
+
+class TestPredictionCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a scoring function that records every row it scores, and a fake clock.
+        """
+        self.scored = []
+        self.now = 0.0
+
+        def score(records):
+            self.scored.extend(records)
+            return [record["work_year"] * 10 for record in records]
+
+        self.score = score
+        self.bundle = make_bundle("1.0.0")
+        self.records = [{"work_year": year, "experience_level": "SE", "job_title": "Data Analyst"}
+                        for year in (2021, 2022, 2023)]
+
+    def test_row_key(self):
+        """
+        Test that keys ignore extra fields and number types, but not the string values.
+        """
+        record = {"work_year": 2024, "experience_level": "SE", "job_title": "Data Analyst"}
+        self.assertEqual(row_key(record, COLUMNS), row_key(dict(record, work_year=2024.0, extra=1), COLUMNS))
+        self.assertNotEqual(row_key(record, COLUMNS), row_key(dict(record, experience_level="se"), COLUMNS))
+        self.assertNotEqual(row_key(record, COLUMNS), row_key({"work_year": 2024, "experience_level": "SE"}, COLUMNS))
+
+    def test_partial_batches(self):
+        """
+        Test that only the misses of a batch are scored, and duplicated rows only once.
+        """
+        cache = PredictionCache()
+        self.assertEqual(cache.predict(self.bundle, self.records[:2], self.score), [20210, 20220])
+        batch = [self.records[0], self.records[2], dict(self.records[2]), self.records[1]]
+        self.assertEqual(cache.predict(self.bundle, batch, self.score), [20210, 20230, 20230, 20220])
+        self.assertEqual([record["work_year"] for record in self.scored], [2021, 2022, 2023])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 4))
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted first.
+        """
+        cache = PredictionCache(max_entries=2)
+        cache.predict(self.bundle, self.records[:2], self.score)
+        cache.predict(self.bundle, self.records[:1], self.score)
+        cache.predict(self.bundle, self.records[2:], self.score)
+        _, missing = cache.lookup(self.bundle, self.records)
+        self.assertEqual(missing, [1])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl(self):
+        """
+        Test that entries expire after ttl_seconds.
+        """
+        cache = PredictionCache(ttl_seconds=60, clock=lambda: self.now)
+        cache.predict(self.bundle, self.records, self.score)
+        self.now = 59
+        self.assertEqual(cache.lookup(self.bundle, self.records)[1], [])
+        self.now = 61
+        self.assertEqual(cache.lookup(self.bundle, self.records)[1], [0, 1, 2])
+        self.assertEqual(cache.stats()["expirations"], 3)
+
+    def test_model_version_change(self):
+        """
+        Test that a new model version empties the cache, and late results of the old one are not stored.
+        """
+        cache = PredictionCache()
+        cache.predict(self.bundle, self.records, self.score)
+        new_bundle = make_bundle("2.0.0")
+        self.assertEqual(cache.lookup(new_bundle, self.records)[1], [0, 1, 2])
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+        cache.fill(self.bundle, self.records, self.score)
+        self.assertEqual(len(cache), 0)
+
+    def test_disabled(self):
+        """
+        Test that max_entries=0 scores every row and stores nothing.
+        """
+        cache = PredictionCache(max_entries=0)
+        cache.predict(self.bundle, self.records, self.score)
+        cache.predict(self.bundle, self.records, self.score)
+        self.assertEqual(len(self.scored), 6)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.prediction_grid import build_grid, grid_rows, load_grid
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.serving import predict_records
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestPredictionGrid(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and build a grid from a sample of data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False)
+        cls.data = data.sample(400, random_state=7)
+        cls.grid = build_grid(cls.bundle, cls.data, cartesian=["remote_ratio"], extra_values={"remote_ratio": [25]})
+        cls.records = cls.data[cls.bundle.plan.source_columns()].to_dict(orient="records")
+
+    def test_matches_live_model(self):
+        """
+        Test that every observed row is found and gets exactly the live model's prediction.
+        """
+        predictions, missing = self.grid.lookup(self.records)
+        self.assertEqual(missing, [])
+        self.assertEqual(predictions, predict_records(self.bundle, self.records).tolist())
+
+    def test_cartesian_rows(self):
+        """
+        Test that cartesian columns are crossed with every observed combination of the others.
+        """
+        columns = self.bundle.plan.source_columns()
+        fixed = [column for column in columns if column != "remote_ratio"]
+        n_observed = len(self.data[fixed].drop_duplicates())
+        rows = grid_rows(self.data, columns, cartesian=["remote_ratio"], extra_values={"remote_ratio": [25]})
+        self.assertEqual(len(rows), n_observed * 4)
+        self.assertEqual(len(self.grid), len(rows))
+
+    def test_misses_fall_back_to_the_model(self):
+        """
+        Test that rows outside the grid are scored by the fallback, and equal values of another type are hits.
+        """
+        outside = [dict(self.records[0], job_title="Chief Astronaut"), dict(self.records[1], work_year=2035)]
+        same = dict(self.records[2], work_year=float(self.records[2]["work_year"]))
+        _, missing = self.grid.lookup(outside + [same])
+        self.assertEqual(missing, [0, 1])
+
+        scored = []
+        predictions = self.grid.predict(outside + [same],
+                                        lambda rows: scored.extend(rows) or predict_records(self.bundle, rows).tolist())
+        self.assertEqual(scored, outside)
+        self.assertEqual(predictions, predict_records(self.bundle, outside + [same]).tolist())
+
+    def test_saved_grid(self):
+        """
+        Test that a saved grid is memory-mapped on load and that frame lookups match record lookups.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            self.grid.save(tmp_dir)
+            loaded = load_grid(tmp_dir)
+            self.assertIsInstance(loaded.keys, np.memmap)
+            self.assertEqual(loaded.version, self.bundle.version)
+            frame = pd.DataFrame(self.records + [dict(self.records[0], company_size="XL")])
+            expected = self.grid.lookup(self.records)[0] + [np.nan]
+            np.testing.assert_array_equal(loaded.lookup_frame(frame), expected)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
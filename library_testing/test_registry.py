@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+import joblib
+from salary_prediction_lib.encoding import CategoricalEncoders, save_encoders
+from salary_prediction_lib.registry import (
+    ArtifactRegistry,
+    ArtifactVersionError,
+    load_artifacts,
+    write_manifest
+)
+
+class TestArtifactRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a small set of artifacts and their manifest to a temporary folder.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = {}
+        for name, obj in [("model", {"kind": "model"}), ("job_density", {0: 0.5, 1: -0.5})]:
+            self.paths[name] = os.path.join(self.tmp_dir, f"{name}.pkl")
+            joblib.dump(obj, self.paths[name])
+        self.paths["encoder"] = os.path.join(self.tmp_dir, "encoder.pkl")
+        save_encoders(CategoricalEncoders({"job_title": ["Data Analyst", "Data Scientist"]}), self.paths["encoder"])
+        self.manifest_path = os.path.join(self.tmp_dir, "artifacts.json")
+        write_manifest("1", self.paths["model"], self.paths["encoder"], self.paths["job_density"], self.manifest_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load_artifacts(self):
+        """
+        Test that every artifact is loaded once and exposed read-only.
+        """
+        bundle = load_artifacts(self.manifest_path)
+        self.assertEqual(bundle.version, "1")
+        # Stats saved by job title code are served by job title name
+        self.assertEqual(bundle.job_density["Data Analyst"], 0.5)
+        self.assertEqual(bundle.job_density["Data Scientist"], -0.5)
+        with self.assertRaises(TypeError):
+            bundle.job_density["Data Analyst"] = 1.0
+        with self.assertRaises(AttributeError):
+            bundle.model = None
+
+    def test_version_mismatch(self):
+        """
+        Test that an artifact replaced after the manifest was written is rejected.
+        """
+        joblib.dump({0: 0.9}, self.paths["job_density"])
+        with self.assertRaises(ArtifactVersionError):
+            load_artifacts(self.manifest_path)
+
+    def test_swap(self):
+        """
+        Test that a swap publishes the new version and a failed swap keeps the old one.
+        """
+        registry = ArtifactRegistry(self.manifest_path)
+        joblib.dump({0: 0.9}, self.paths["job_density"])
+        with self.assertRaises(ArtifactVersionError):
+            registry.swap()
+        self.assertEqual(registry.current().job_density["Data Analyst"], 0.5)
+
+        write_manifest("2", self.paths["model"], self.paths["encoder"], self.paths["job_density"], self.manifest_path)
+        registry.swap()
+        self.assertEqual(registry.current().version, "2")
+        self.assertEqual(registry.current().job_density["Data Analyst"], 0.9)
+
+if __name__ == "__main__":
+    unittest.main()
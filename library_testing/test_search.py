@@ -0,0 +1,105 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.search import PARAM_GRID, HyperparameterSearch, TrialJournal, sample_params
+from salary_prediction_lib.tunned_model import random_search_lgb
+
+class TestHyperparameterSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create a small regression problem.
+        """
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(1200, 4)), columns=["a", "b", "c", "d"])
+        y = 3 * X["a"] - 2 * X["b"] ** 2 + rng.normal(scale=0.1, size=len(X))
+        cls.X_train, cls.X_test = X.iloc[:1000], X.iloc[1000:]
+        cls.y_train, cls.y_test = y.iloc[:1000], y.iloc[1000:]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.journal_path = os.path.join(self.tmp_dir, "trials.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sample_params(self):
+        """
+        Test that combinations are drawn in the same order as random.seed + random.choice.
+        """
+        random.seed(7)
+        expected = {name: random.choice(values) for name, values in PARAM_GRID.items()}
+        params = sample_params(1, seed=7)[0]
+        self.assertEqual({name: params[name] for name in PARAM_GRID}, expected)
+        self.assertEqual(params["seed"], 7)
+
+    def test_successive_halving(self):
+        """
+        Test that only the best 1/eta of the combinations reach the next rung.
+        """
+        with HyperparameterSearch(self.X_train, self.y_train, self.X_test, self.y_test) as search:
+            best = search.successive_halving(sample_params(9), min_rounds=10, max_rounds=90, eta=3)
+        rounds = [result["rounds"] for result in search.results]
+        self.assertEqual([rounds.count(r) for r in (10, 30, 90)], [9, 3, 1])
+        self.assertEqual(best["rounds"], 90)
+
+    def test_rung_schedule(self):
+        """
+        Test that the default search trains 20 combinations for 11, 33 and 100 rounds, without an extra last rung.
+        """
+        random_search_lgb(self.X_train, self.y_train, self.X_test, self.y_test, n_iter=20, max_rounds=100,
+                          journal_path=self.journal_path)
+        rounds = [entry["rounds"] for entry in TrialJournal(self.journal_path).entries.values()]
+        self.assertEqual({r: rounds.count(r) for r in set(rounds)}, {11: 20, 33: 6, 100: 2})
+
+    def test_journal_resumes_search(self):
+        """
+        Test that trials already in the journal are not trained again.
+        """
+        configs = sample_params(4)
+        with HyperparameterSearch(self.X_train, self.y_train, self.X_test, self.y_test,
+                                  journal_path=self.journal_path) as search:
+            first = search.evaluate(configs, 20)
+        self.assertEqual(len(TrialJournal(self.journal_path).entries), 4)
+
+        with HyperparameterSearch(self.X_train, self.y_train, self.X_test, self.y_test,
+                                  journal_path=self.journal_path) as search:
+            second = search.evaluate(configs, 20)
+        self.assertTrue(all(result.get("resumed") for result in second))
+        self.assertEqual([r["rmse"] for r in first], [r["rmse"] for r in second])
+
+        # Other data must not reuse the journal
+        with HyperparameterSearch(self.X_train, self.y_train * 2, self.X_test, self.y_test * 2,
+                                  journal_path=self.journal_path) as search:
+            third = search.evaluate(configs, 20)
+        self.assertFalse(any(result.get("resumed") for result in third))
+
+    def test_worker_processes_match_in_process(self):
+        """
+        Test that trials scored by worker processes on the binary datasets give the same RMSE.
+        """
+        configs = sample_params(3)
+        with HyperparameterSearch(self.X_train, self.y_train, self.X_test, self.y_test,
+                                  threads_per_worker=1) as search:
+            expected = [result["rmse"] for result in search.evaluate(configs, 25)]
+        with HyperparameterSearch(self.X_train, self.y_train, self.X_test, self.y_test, n_workers=2,
+                                  threads_per_worker=1) as search:
+            parallel = [result["rmse"] for result in search.evaluate(configs, 25)]
+        self.assertEqual(parallel, expected)
+
+    def test_random_search_lgb(self):
+        """
+        Test that random_search_lgb still returns the best parameters and their RMSE.
+        """
+        best_params, best_rmse = random_search_lgb(self.X_train, self.y_train, self.X_test, self.y_test,
+                                                   n_iter=6, max_rounds=30)
+        self.assertIn(best_params, sample_params(6))
+        self.assertLess(best_rmse, self.y_test.std())
+
+if __name__ == "__main__":
+    unittest.main()
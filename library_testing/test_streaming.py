@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+import pandas as pd
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.serving import predict_records
+from salary_prediction_lib.streaming import iter_chunks, score_file
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestStreaming(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of raw rows from data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False)
+        cls.rows = data.drop(columns=["salary", "salary_currency", "salary_in_usd"]).sample(250, random_state=1)
+        cls.expected = predict_records(cls.bundle, cls.rows.to_dict(orient="records"))
+
+    def test_iter_chunks(self):
+        """
+        Test that rows are read in chunks of the requested size, keeping 'NA' as a country code.
+        """
+        source = io.BytesIO(b"employee_residence,work_year\nNA,2024\nUS,2023\nGB,2022\n")
+        chunks = list(iter_chunks(source, "csv", chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(chunks[0].loc[0, "employee_residence"], "NA")
+
+    def test_score_file_matches_batch_predictions(self):
+        """
+        Test that scoring a file chunk by chunk gives the same predictions as one batch.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for extension in ["csv", "ndjson"]:
+                source = os.path.join(tmp_dir, f"input.{extension}")
+                output = os.path.join(tmp_dir, f"output.{extension}")
+                if extension == "csv":
+                    self.rows.to_csv(source, index=False)
+                else:
+                    self.rows.to_json(source, orient="records", lines=True)
+
+                n_rows = score_file(self.bundle, source, output, chunk_size=60)
+                if extension == "csv":
+                    scored = pd.read_csv(output, keep_default_na=False)
+                else:
+                    scored = pd.read_json(output, lines=True, dtype=False)
+
+                self.assertEqual(n_rows, len(self.rows))
+                self.assertEqual(list(scored["job_title"]), list(self.rows["job_title"]))
+                for value, expected in zip(scored["prediction"], self.expected):
+                    self.assertAlmostEqual(value, expected, places=6)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.feature_creation import add_job_title_frequency, add_salary_density, create_features
+from salary_prediction_lib.pre_processing import preprocess_data
+from salary_prediction_lib.registry import ArtifactVersionError, load_artifacts, write_manifest
+# Imported by their flat names, like the library modules, so the plan sees the same classes
+from transforms import DEFAULT_STEPS, TRANSFORMS, compile_plan, load_plan, register_transform, save_plan
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestTransformPlan(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False, na_values=[""])
+        cls.data = data.sample(1000, random_state=5).reset_index(drop=True)
+
+    def test_per_value_steps_are_fused(self):
+        """
+        Test that the experience level description and years of experience share one pass.
+        """
+        groups = [[step.name for step in group] for group in compile_plan().groups]
+        self.assertIn(["experience_level_description", "years_of_experience"], groups)
+        self.assertEqual(sum(len(group) for group in groups), len(DEFAULT_STEPS))
+
+    def test_step_reading_an_overwritten_column_is_not_fused(self):
+        """
+        Test that a step is not moved before a step that reads the column it writes.
+        """
+        names = ["test_title_upper", "test_title_length", "test_title_lower"]
+        register_transform(names[0], inputs=("job_title",), outputs=("job_title",), per_value=True)(str.upper)
+        register_transform(names[1], inputs=("job_title",), outputs=("title_length",),
+                           record_func=lambda values: {"title_length": len(values["job_title"])})(None)
+        register_transform(names[2], inputs=("job_title",), outputs=("job_title",), per_value=True)(str.lower)
+        try:
+            plan = compile_plan(names)
+            self.assertEqual(len(plan.groups), 3)
+            self.assertEqual(plan.run_record({"job_title": "Data Analyst"}),
+                             {"job_title": "data analyst", "title_length": 12})
+        finally:
+            for name in names:
+                TRANSFORMS.pop(name)
+
+    def test_training_mode_matches_pandas_functions(self):
+        """
+        Test that the plan in training mode builds the features of preprocess_data and create_features.
+        """
+        features = compile_plan().run_frame(self.data, training=True)
+        dataset = create_features(preprocess_data(self.data.copy()), job_salary_density=self.bundle.job_density)
+        dataset = add_salary_density(add_job_title_frequency(dataset))
+        for column in ["employee_residence", "company_location", "experience_level", "remote_ratio"]:
+            self.assertEqual(features[column].tolist(), dataset[column].tolist())
+        for column in ["years_of_experience", "is_local_employee", "inflation_index", "job_title_frequency",
+                       "salary_density_by_experience"]:
+            np.testing.assert_allclose(features[column].to_numpy(dtype=float), dataset[column].to_numpy(dtype=float))
+        self.assertNotIn("salary_density", features.columns)
+
+    def test_missing_salary_is_skipped(self):
+        """
+        Test that a missing salary only zeroes its own density, not its whole experience group, as with pandas.
+        """
+        data = self.data.assign(salary_in_usd=self.data["salary_in_usd"].astype(float))
+        data.loc[0, "salary_in_usd"] = np.nan
+        features = compile_plan().run_frame(data, training=True)
+        dataset = add_salary_density(create_features(preprocess_data(data.copy()), job_salary_density=self.bundle.job_density))
+        np.testing.assert_allclose(features["salary_density_by_experience"].to_numpy(dtype=float),
+                                   dataset["salary_density_by_experience"].to_numpy(dtype=float))
+        self.assertEqual(features.loc[0, "salary_density_by_experience"], 0)
+
+    def test_run_record_matches_run(self):
+        """
+        Test that one record goes through the same steps as a table.
+        """
+        plan = compile_plan()
+        rows = self.data.drop(columns=["salary", "salary_currency", "salary_in_usd"]).head(50)
+        features = plan.run_frame(rows, job_salary_density=self.bundle.job_density)
+        for i, record in enumerate(rows.to_dict(orient="records")):
+            values = plan.run_record(record, job_salary_density=self.bundle.job_density)
+            for column in ["experience_level", "employee_residence", "years_of_experience", "is_local_employee",
+                           "inflation_index", "salary_density"]:
+                self.assertEqual(values[column], features.loc[i, column])
+
+    def test_missing_resource(self):
+        """
+        Test that serving without the job density stats fails with a clear error.
+        """
+        with self.assertRaises(ValueError):
+            compile_plan().run_record(self.data.iloc[0].to_dict())
+
+    def test_saved_plan_is_served(self):
+        """
+        Test that the plan pinned in the manifest is loaded, and a plan whose steps changed is rejected.
+        """
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            plan_path = os.path.join(tmp_dir, "feature_plan.json")
+            manifest_path = os.path.join(tmp_dir, "artifacts.json")
+            plan = compile_plan([name for name in DEFAULT_STEPS if name != "inflation_index"])
+            save_plan(plan, plan_path)
+            self.assertEqual(load_plan(plan_path), plan)
+
+            paths = [os.path.join(ROOT_DIR, name) for name in
+                     ["lightgbm_tunned_model.joblib", "data_encoder.pkl", "salary_density_by_job.pkl"]]
+            write_manifest("test", *paths, manifest_path=manifest_path, feature_plan_path=plan_path)
+            self.assertEqual(load_artifacts(manifest_path).plan, plan)
+
+            with open(plan_path) as file:
+                data = json.load(file)
+            data["steps"]["years_of_experience"]["inputs"] = ["seniority"]
+            with open(plan_path, "w") as file:
+                json.dump(data, file)
+            write_manifest("test", *paths, manifest_path=manifest_path, feature_plan_path=plan_path)
+            with self.assertRaises(ArtifactVersionError):
+                load_artifacts(manifest_path)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
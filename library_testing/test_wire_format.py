@@ -0,0 +1,72 @@
+import json
+import os
+import unittest
+import numpy as np
+import pandas as pd
+from salary_prediction_lib.prediction_grid import build_grid
+from salary_prediction_lib.registry import load_artifacts
+from salary_prediction_lib.serving import predict_records
+from salary_prediction_lib.wire_format import decode_columns, decode_predictions, encode_columns, encode_predictions
+from columnar import predict_columnar
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+class TestWireFormat(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Load the shipped artifacts and a sample of data/salaries.csv.
+        """
+        cls.bundle = load_artifacts(os.path.join(ROOT_DIR, "artifacts.json"))
+        data = pd.read_csv(os.path.join(ROOT_DIR, "data", "salaries.csv"), keep_default_na=False, na_values=[""])
+        cls.columns = cls.bundle.plan.source_columns()
+        cls.rows = data.sample(500, random_state=11)[cls.columns].reset_index(drop=True)
+
+    def test_formats_match_row_predictions(self):
+        """
+        Test that a batch sent column by column predicts what the row dicts give, in every format and scoring distinct rows once.
+        """
+        expected = predict_records(self.bundle, self.rows.to_dict(orient="records"))
+        for wire_format in ("json", "msgpack", "arrow"):
+            with self.subTest(wire_format=wire_format):
+                table = decode_columns(encode_columns(self.rows, wire_format), wire_format, self.columns)
+                np.testing.assert_array_equal(predict_columnar(self.bundle, table), expected)
+        distinct, inverse = decode_columns(encode_columns(self.rows, "arrow"), "arrow", self.columns).distinct_rows()
+        self.assertEqual(len(distinct), len(self.rows.drop_duplicates()))
+        np.testing.assert_array_equal(predict_columnar(self.bundle, distinct)[inverse], expected)
+
+    def test_invalid_batches(self):
+        """
+        Test that missing columns, columns of different lengths and values of the wrong type are rejected.
+        """
+        body = encode_columns(self.rows.drop(columns=["job_title"]), "json")
+        with self.assertRaisesRegex(ValueError, "missing the columns"):
+            decode_columns(body, "json", self.columns)
+        columns = {column: self.rows[column].tolist() for column in self.columns}
+        columns["work_year"] = columns["work_year"][:-1]
+        with self.assertRaisesRegex(ValueError, "different lengths"):
+            decode_columns(json.dumps({"columns": columns}).encode(), "json", self.columns)
+        wrong = self.rows.assign(remote_ratio=self.rows["remote_ratio"].astype(str))
+        for wire_format in ("json", "msgpack", "arrow"):
+            with self.subTest(wire_format=wire_format):
+                with self.assertRaisesRegex(TypeError, "remote_ratio"):
+                    decode_columns(encode_columns(wrong, wire_format), wire_format, self.columns)
+
+    def test_grid_lookup_and_responses(self):
+        """
+        Test that table lookups in the prediction grid match row lookups, and that responses round-trip.
+        """
+        grid = build_grid(self.bundle, self.rows, cartesian=["remote_ratio"])
+        frame = pd.concat([self.rows, self.rows.head(1).assign(company_size="XL")], ignore_index=True)
+        table = decode_columns(encode_columns(frame, "msgpack"), "msgpack", self.columns)
+        np.testing.assert_array_equal(grid.lookup_table(table), grid.lookup_frame(frame))
+        for wire_format in ("json", "msgpack", "arrow"):
+            with self.subTest(wire_format=wire_format):
+                content = encode_predictions(np.array([1.5, 2.0]), "v1", wire_format)
+                predictions, version = decode_predictions(content, wire_format)
+                np.testing.assert_array_equal(predictions, [1.5, 2.0])
+                self.assertEqual(version, "v1")
+
+if __name__ == "__main__":
+    unittest.main()
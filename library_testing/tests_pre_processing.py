@@ -1,7 +1,11 @@
+import os
+import tempfile
 import unittest
+import numpy as np
 import pandas as pd
 from salary_prediction_lib.pre_processing import (convert_country_codes, replace_abbreviations, 
-                          drop_unnecessary_columns, remove_outliers_iqr)
+                          drop_unnecessary_columns, remove_outliers_iqr, convert_country_column)
+from salary_prediction_lib.quantile_sketch import QuantileSketch
 
 class TestPreprocessingFunctions(unittest.TestCase):
 
@@ -30,6 +34,23 @@ class TestPreprocessingFunctions(unittest.TestCase):
         self.assertIn("United States", updated_data["employee_residence"].values)
         self.assertIn("United Kingdom", updated_data["company_location"].values)
 
+    def test_convert_country_column(self):
+        """
+        Test that repeated and alias codes are converted from the precomputed table.
+        """
+        names = convert_country_column(pd.Series(["GB", "US", "GB", "UK", "NA"]))
+        self.assertEqual(list(names), ["United Kingdom", "United States", "United Kingdom", "United Kingdom", "Namibia"])
+
+    def test_convert_country_column_fallback(self):
+        """
+        Test that codes missing from the precomputed table fall back to country_converter.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            names_path = os.path.join(tmp_dir, "country_names.csv")
+            pd.DataFrame({"code": ["GB"], "name": ["United Kingdom"]}).to_csv(names_path, index=False)
+            names = convert_country_column(pd.Series(["GB", "US"]), names_path=names_path)
+        self.assertEqual(list(names), ["United Kingdom", "United States"])
+
     def test_replace_abbreviations(self):
         """
         Test the replace_abbreviations function.
@@ -61,5 +82,40 @@ class TestPreprocessingFunctions(unittest.TestCase):
         filtered_data = remove_outliers_iqr(self.sample_data)
         self.assertEqual(len(filtered_data), 3)  # No outliers in this sample dataset
 
+    def test_remove_outliers_iqr_combined_mask(self):
+        """
+        Test that filtering all columns at once drops the rows that are outliers in any column.
+        """
+        data = pd.DataFrame({"a": [1, 2, 3, 4, 100, 2], "b": [10, 11, 12, -500, 11, 10], "c": ["x"] * 6})
+        filtered_data = remove_outliers_iqr(data)
+        self.assertEqual(filtered_data.index.tolist(), [0, 1, 2, 5])
+
+    def test_remove_outliers_iqr_by_group(self):
+        """
+        Test that grouped filtering compares each row with the quartiles of its own group.
+        """
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({"job_title": np.repeat(["Analyst", "Director"], 200),
+                             "salary": np.concatenate([rng.normal(50, 5, 200), rng.normal(300, 20, 200)])})
+        data.loc[[0, 250], "salary"] = [200, 30]
+        expected = pd.concat([remove_outliers_iqr(group, column="salary") for _, group in data.groupby("job_title")])
+        filtered_data = remove_outliers_iqr(data, column="salary", by="job_title")
+        pd.testing.assert_frame_equal(filtered_data, expected.sort_index())
+        self.assertNotIn(0, filtered_data.index)
+        self.assertNotIn(250, filtered_data.index)
+
+    def test_remove_outliers_iqr_chunked(self):
+        """
+        Test that chunks filtered with bounds from a merged sketch match filtering the whole dataset.
+        """
+        data = pd.DataFrame({"salary": np.random.default_rng(1).integers(0, 1000, 3000) ** 2})
+        chunks = [data.iloc[start:start + 750] for start in range(0, len(data), 750)]
+        sketch = QuantileSketch()
+        for chunk in chunks:
+            sketch.update(chunk["salary"])
+        bounds = {"salary": sketch.iqr_bounds(1.5)}
+        filtered_data = pd.concat([remove_outliers_iqr(chunk, column="salary", bounds=bounds) for chunk in chunks])
+        pd.testing.assert_frame_equal(filtered_data, remove_outliers_iqr(data, column="salary"))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,23 +1,118 @@
-from feature_creation import \
-    map_experience_level, \
-    add_job_title_frequency, \
-    add_local_employee_feature, \
-    add_inflation_index, \
-    add_salary_density, \
-    create_features, \
-    map_job_density, \
-    save_salary_density_by_job
+from importlib import import_module
 
-from pre_processing import \
-    convert_country_codes, \
-    replace_abbreviations, \
-    drop_unnecessary_columns, \
-    remove_outliers_iqr
-    
-    
-from metrics import \
-    calculate_regression_metrics
-    
-from model import train_and_predict_lgb
-    
-from tunned_model import random_search_lgb
\ No newline at end of file
+# Public names, by the module that defines them. Modules are imported the first time one of
+# their names is used (PEP 562), so using a feature function does not import LightGBM or
+# scikit-learn.
+_EXPORTS = {
+    'feature_creation': [
+        'map_experience_level',
+        'add_job_title_frequency',
+        'add_local_employee_feature',
+        'add_inflation_index',
+        'add_salary_density',
+        'create_features',
+        'map_job_density',
+        'save_salary_density_by_job',
+    ],
+    'density_stats': ['SalaryDensityStore'],
+    'pre_processing': [
+        'convert_country_codes',
+        'convert_country_column',
+        'map_categories',
+        'build_country_names',
+        'replace_abbreviations',
+        'drop_unnecessary_columns',
+        'iqr_bounds',
+        'remove_outliers_iqr',
+    ],
+    'ingestion': [
+        'read_salaries',
+        'compact_dtypes',
+        'memory_report',
+    ],
+    'quantile_sketch': ['QuantileSketch'],
+    'metrics': [
+        'calculate_regression_metrics',
+        'MetricsAccumulator',
+        'bootstrap_metrics',
+    ],
+    'cross_validation': [
+        'cross_validate_lgb',
+        'kfold_indices',
+    ],
+    'model': ['train_and_predict_lgb'],
+    'dataset_cache': ['DatasetCache'],
+    'out_of_core': [
+        'ShardSet',
+        'prepare_shards',
+        'build_datasets',
+        'train_out_of_core',
+    ],
+    'tunned_model': ['random_search_lgb'],
+    'search': [
+        'HyperparameterSearch',
+        'TrialJournal',
+        'sample_params',
+    ],
+    'encoding': [
+        'CategoricalEncoders',
+        'save_encoders',
+        'load_encoders',
+    ],
+    'compiled_model': [
+        'CompiledModel',
+        'compile_model',
+        'load_compiled_model',
+    ],
+    'instrumentation': [
+        'StageMetrics',
+        'SamplingProfiler',
+    ],
+    'prediction_cache': ['PredictionCache'],
+    'prediction_grid': [
+        'PredictionGrid',
+        'build_grid',
+        'load_grid',
+    ],
+    'columnar': [
+        'ColumnarTable',
+        'DictColumn',
+        'remove_outliers_iqr_columnar',
+        'predict_columnar',
+    ],
+    'explain': [
+        'explain_columnar',
+        'explain_records',
+        'format_explanations',
+    ],
+    'wire_format': [
+        'decode_columns',
+        'encode_columns',
+        'encode_predictions',
+        'decode_predictions',
+    ],
+    'transforms': [
+        'register_transform',
+        'compile_plan',
+        'save_plan',
+        'load_plan',
+        'TransformPlan',
+    ],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    # Cache it, so later lookups do not come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,19 @@
+"""
+Runs the command line tools of cli.py: python -m salary_prediction_lib <command>, or the
+salary_prediction_lib command once the package is installed.
+"""
+import os
+import sys
+
+
+def main(argv=None):
+    # The library modules import each other by their flat names, as when cli.py is run as a script
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    if package_dir not in sys.path:
+        sys.path.insert(0, package_dir)
+    from cli import main as cli_main
+    cli_main(argv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Groups concurrent prediction requests into batches scored with one vectorized call.
+
+    Requests are queued until max_wait_ms has passed since the first one arrived or
+    max_batch_rows rows are waiting. The batch is then scored on a worker pool, so the
+    event loop keeps accepting requests, and each caller gets back its own slice.
+
+    Parameters:
+    - predict_batch (callable): Takes a list of records and returns one prediction per record.
+      With a ProcessPoolExecutor it must be a picklable, module-level function.
+    - max_wait_ms (float): Longest time the first request of a batch waits for others.
+    - max_batch_rows (int): Batch size that triggers scoring right away. A single request
+      larger than this is scored on its own.
+    - executor (concurrent.futures.Executor or None): Pool running predict_batch.
+      Defaults to a ThreadPoolExecutor with max_workers threads.
+    - max_workers (int): Batches scored at the same time.
+    """
+
+    def __init__(self, predict_batch, max_wait_ms=5.0, max_batch_rows=2048, executor=None, max_workers=2):
+        if max_batch_rows < 1:
+            raise ValueError("max_batch_rows must be at least 1.")
+        self.predict_batch = predict_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._queue = None
+        self._worker = None
+        self._slots = None
+
+        # Metrics
+        self.queued_rows = 0
+        self.in_flight_batches = 0
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def running(self):
+        return self._worker is not None and not self._worker.done()
+
+    def start(self):
+        """
+        Starts the batching task on the running event loop. submit() calls it if needed.
+        """
+        if self.running:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='micro-batcher')
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Scores the requests still queued, then stops the batching task.
+        """
+        if self.running:
+            await self._queue.put(None)
+            await self._worker
+        self._worker = None
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def submit(self, records):
+        """
+        Queues records for the next batch and waits for their predictions.
+
+        Parameters:
+        - records (list): Records to score.
+
+        Returns:
+        - list: One prediction per record.
+        """
+        if not records:
+            return []
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queued_rows += len(records)
+        await self._queue.put((records, future))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    def stats(self):
+        """
+        Returns the batching metrics.
+
+        Returns:
+        - dict: Current queue depth (requests and rows), batches in flight and totals.
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queued_rows': self.queued_rows,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight_batches': self.in_flight_batches,
+            'batches': self.batches,
+            'requests': self.requests,
+            'rows': self.rows,
+            'errors': self.errors,
+            'mean_batch_rows': self.rows / self.batches if self.batches else 0.0,
+            'busy_seconds': self.busy_seconds,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_batch_rows': self.max_batch_rows,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        pending = set()
+        stopping = False
+        carry = None
+        while not stopping:
+            if carry is not None:
+                item, carry = carry, None
+            else:
+                item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            n_rows = len(item[0])
+            deadline = loop.time() + self.max_wait
+
+            # Collect more requests until the window closes or the batch is full
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                if n_rows + len(item[0]) > self.max_batch_rows:
+                    # Does not fit: score what we have and start the next batch with it
+                    carry = item
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            self.queued_rows -= n_rows
+            await self._slots.acquire()
+            task = loop.create_task(self._score(batch, n_rows))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        # Score whatever is left before stopping
+        leftovers = [carry] if carry is not None else []
+        while not self._queue.empty():
+            leftovers.append(self._queue.get_nowait())
+        for item in leftovers:
+            if item is not None:
+                self.queued_rows -= len(item[0])
+                await self._slots.acquire()
+                await self._score([item], len(item[0]))
+        if pending:
+            await asyncio.gather(*pending)
+
+    async def _score(self, batch, n_rows):
+        loop = asyncio.get_running_loop()
+        self.in_flight_batches += 1
+        start = time.perf_counter()
+        try:
+            records = [record for request, _ in batch for record in request]
+            try:
+                predictions = await loop.run_in_executor(self._executor, self.predict_batch, records)
+            except Exception:
+                if len(batch) == 1:
+                    raise
+                # One bad request must not fail the others: score them one by one
+                await self._score_separately(batch)
+                return
+
+            offset = 0
+            for request, future in batch:
+                if not future.done():
+                    future.set_result(list(predictions[offset:offset + len(request)]))
+                offset += len(request)
+        except Exception as e:
+            self.errors += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.batches += 1
+            self.requests += len(batch)
+            self.rows += n_rows
+            self.busy_seconds += time.perf_counter() - start
+            self.in_flight_batches -= 1
+            self._slots.release()
+
+    async def _score_separately(self, batch):
+        loop = asyncio.get_running_loop()
+        for request, future in batch:
+            try:
+                predictions = await loop.run_in_executor(self._executor, self.predict_batch, request)
+            except Exception as e:
+                self.errors += 1
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(list(predictions))
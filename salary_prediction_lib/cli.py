@@ -0,0 +1,155 @@
+"""
+Command line tools of the salary prediction library.
+
+Usage:
+    salary_prediction_lib score INPUT [-o OUTPUT] [--chunk-size N]
+    salary_prediction_lib update-density EXPORT [--store PATH] [--stats-path PATH]
+    salary_prediction_lib build-grid [--data CSV] [-o FOLDER] [--cartesian COLUMN ...]
+    salary_prediction_lib compile-model [-o NPZ] [--data CSV]
+    salary_prediction_lib memory-report [--data CSV] [--rows N]
+
+The salary_prediction_lib command is installed with the package; python -m salary_prediction_lib
+and python salary_prediction_lib/cli.py take the same arguments.
+
+INPUT and OUTPUT can be NDJSON (.ndjson/.jsonl), CSV (.csv) or Parquet (.parquet). Files
+are scored chunk by chunk, so memory use does not depend on their size.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarTable, model_matrix
+from compiled_model import DEFAULT_COMPILED_MODEL_PATH, compile_model
+from density_stats import DEFAULT_STORE_PATH, SalaryDensityStore
+from encoding import load_encoders
+from ingestion import memory_report, read_salaries
+from pre_processing import preprocess_data
+from prediction_grid import DEFAULT_CARTESIAN_COLUMNS, DEFAULT_GRID_DIR, build_grid
+from registry import DEFAULT_MANIFEST, load_artifacts, pin_artifact
+from streaming import DEFAULT_CHUNK_SIZE, FORMATS, score_file
+
+
+def score_command(args):
+    bundle = load_artifacts(args.manifest)
+    output = sys.stdout if args.output == '-' else args.output
+    n_rows = score_file(bundle, args.input, output, input_format=args.input_format,
+                        output_format=args.output_format, chunk_size=args.chunk_size)
+    print(f"Scored {n_rows} rows with model version {bundle.version}", file=sys.stderr)
+
+
+def update_density_command(args):
+    if os.path.exists(args.store):
+        store = SalaryDensityStore.load(args.store).update_csv(args.input, args.chunk_size)
+    else:
+        store = SalaryDensityStore.from_csv(args.input, chunksize=args.chunk_size)
+    store.save(args.store)
+    store.save_job_density(args.stats_path, load_encoders(args.encoder))
+    print(f"The salary density store now summarizes {store.rows} rows", file=sys.stderr)
+
+
+def build_grid_command(args):
+    bundle = load_artifacts(args.manifest)
+    dataset = pd.read_csv(args.data, keep_default_na=False)
+    extra_values = {'work_year': args.extra_years} if args.extra_years else None
+    grid = build_grid(bundle, dataset, cartesian=args.cartesian, extra_values=extra_values)
+    grid.save(args.output)
+    print(f"Saved {len(grid)} predictions of model version {bundle.version} to {args.output}", file=sys.stderr)
+
+
+def compile_model_command(args):
+    bundle = load_artifacts(args.manifest)
+    model = compile_model(bundle.model)
+    # Check the compiled trees against the booster before publishing them
+    table = ColumnarTable.from_pandas(pd.read_csv(args.data, keep_default_na=False))
+    matrix = model_matrix(bundle, bundle.plan.run(table, job_salary_density=bundle.job_density))
+    expected, predictions = bundle.model.predict(matrix), model.predict(matrix)
+    if not np.array_equal(expected, predictions):
+        raise SystemExit(f"The compiled model differs from the booster by up to {np.max(np.abs(expected - predictions))}.")
+    model.save(args.output)
+    pin_artifact('compiled_model', args.output, args.manifest)
+    print(f"Compiled {model.num_trees()} trees of model version {bundle.version} to {args.output}; "
+          f"identical on {len(matrix)} rows", file=sys.stderr)
+
+
+def memory_report_command(args):
+    # Object columns as read by default against the compact dtypes, before and after preprocessing
+    default = pd.read_csv(args.data, nrows=args.rows, keep_default_na=False, na_values=[''])
+    compact = read_salaries(args.data, nrows=args.rows)
+    report = memory_report({
+        'default': default,
+        'compact': compact,
+        'default preprocessed': preprocess_data(default.copy()),
+        'compact preprocessed': preprocess_data(compact.copy()),
+    })
+    print(f"Bytes per row of {len(default)} rows of {args.data}")
+    print(report.round(1).to_string())
+    total = report.loc['total']
+    print(f"{args.scale_rows:,} rows: {total['default preprocessed'] * args.scale_rows / 2 ** 30:.1f} GiB "
+          f"with the default dtypes, {total['compact preprocessed'] * args.scale_rows / 2 ** 30:.1f} GiB compact")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='salary_prediction_lib', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    score = commands.add_parser('score', help='Predict salaries for every row of a file.')
+    score.add_argument('input', help='File to score.')
+    score.add_argument('-o', '--output', default='-', help="Where to write the predictions ('-' for stdout, the default).")
+    score.add_argument('--input-format', choices=FORMATS, help='Input format (inferred from the extension by default).')
+    score.add_argument('--output-format', choices=FORMATS,
+                       help='Output format (inferred from the extension by default, NDJSON for stdout).')
+    score.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows scored at a time.')
+    score.add_argument('--manifest', default=DEFAULT_MANIFEST, help='Artifacts manifest to score with.')
+    score.set_defaults(func=score_command)
+
+    update = commands.add_parser('update-density',
+                                 help='Merge a new aijobs.net export into the salary density stats.')
+    update.add_argument('input', help='CSV export with only the new rows (the whole history the first time).')
+    update.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help='Running statistics, created from the input if it does not exist.')
+    update.add_argument('--stats-path', default='salary_density_by_job.pkl', help='Where to save the stats by job title.')
+    update.add_argument('--encoder', default='data_encoder.pkl', help='Encoders that key the job titles by code.')
+    update.add_argument('--chunk-size', type=int, default=100_000, help='Rows read at a time.')
+    update.set_defaults(func=update_density_command)
+
+    grid = commands.add_parser('build-grid', help='Precompute the predictions of a grid of input combinations.')
+    grid.add_argument('--data', default=os.path.join('data', 'salaries.csv'),
+                      help='Raw rows whose combinations are precomputed.')
+    grid.add_argument('-o', '--output', default=DEFAULT_GRID_DIR, help='Folder to write the grid to.')
+    grid.add_argument('--cartesian', nargs='*', default=DEFAULT_CARTESIAN_COLUMNS,
+                      help='Columns whose every value is combined with each observed combination of the others '
+                           '(none for the observed combinations only).')
+    grid.add_argument('--extra-years', type=int, nargs='*', help='Work years to add to the grid, e.g. the next year.')
+    grid.add_argument('--manifest', default=DEFAULT_MANIFEST, help='Artifacts manifest to predict with.')
+    grid.set_defaults(func=build_grid_command)
+
+    compiled = commands.add_parser('compile-model',
+                                   help='Export the trees of the model to NumPy arrays served without LightGBM.')
+    compiled.add_argument('-o', '--output', default=DEFAULT_COMPILED_MODEL_PATH, help='File to write the model to.')
+    compiled.add_argument('--data', default=os.path.join('data', 'salaries.csv'),
+                          help='Raw rows the compiled model must predict exactly like the booster.')
+    compiled.add_argument('--manifest', default=DEFAULT_MANIFEST,
+                          help='Artifacts manifest of the model; the compiled model is added to it.')
+    compiled.set_defaults(func=compile_model_command)
+
+    memory = commands.add_parser('memory-report',
+                                 help='Compare the bytes per row of the default and the compact dtypes.')
+    memory.add_argument('--data', default=os.path.join('data', 'salaries.csv'), help='Salaries CSV export.')
+    memory.add_argument('--rows', type=int, help='Rows to read (all of them by default).')
+    memory.add_argument('--scale-rows', type=int, default=100_000_000,
+                        help='Dataset size the memory of the preprocessed rows is projected to.')
+    memory.set_defaults(func=memory_report_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import numpy as np
+import pandas as pd
+
+from encoding import UNSEEN_CODE
+from instrumentation import STAGE_METRICS
+
+# Raw input columns kept dictionary-encoded through the pipeline
+DICTIONARY_COLUMNS = ["work_year", "experience_level", "employment_type", "job_title",
+                      "employee_residence", "remote_ratio", "company_location", "company_size",
+                      "salary_currency"]
+# Rows per model input matrix in predict_columnar
+DEFAULT_BLOCK_ROWS = 65_536
+
+
+class DictColumn:
+    """
+    Dictionary-encoded column: one integer code per row pointing into an array of distinct values.
+
+    Value transforms only touch the (small) array of distinct values; rows are only visited
+    when a result is materialized with take(). Missing rows have code -1. Derived columns
+    share the codes of the column they come from, so they cost no memory per row.
+
+    Attributes:
+    - codes (np.ndarray): Integer code of each row.
+    - values (np.ndarray): Value of each code (distinct for encoded inputs).
+    - missing: Value of the rows with code -1.
+    """
+    __slots__ = ('codes', 'values', 'missing')
+
+    def __init__(self, codes, values, missing=np.nan):
+        self.codes = codes
+        self.values = values
+        self.missing = missing
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Dictionary-encodes an array or Series in one pass.
+        """
+        codes, values = pd.factorize(array)
+        return cls(codes.astype(np.int32, copy=False), np.asarray(values, dtype=object))
+
+    @classmethod
+    def from_arrow(cls, array):
+        """
+        Dictionary-encodes a pyarrow Array or ChunkedArray without going through pandas.
+        """
+        import pyarrow as pa
+
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        if not pa.types.is_dictionary(array.type):
+            array = array.dictionary_encode()
+        codes = array.indices.to_numpy(zero_copy_only=False)
+        if array.null_count:
+            codes = np.where(array.is_null().to_numpy(zero_copy_only=False), -1, codes)
+        return cls(codes.astype(np.int32, copy=False), np.asarray(array.dictionary.to_pylist(), dtype=object))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def map_values(self, mapping):
+        """
+        Returns a new column whose distinct values are transformed; the codes are shared.
+
+        Parameters:
+        - mapping (callable or dict): Applied to each distinct value. Values missing from
+          a dict are kept, like Series.replace.
+        """
+        if isinstance(mapping, dict):
+            values = [mapping.get(value, value) for value in self.values]
+        else:
+            values = [mapping(value) for value in self.values]
+        return DictColumn(self.codes, np.asarray(values, dtype=object))
+
+    def take(self, per_value, missing=np.nan, dtype=None, out=None):
+        """
+        Materializes one output value per row from one value per dictionary entry.
+
+        Parameters:
+        - per_value (array-like): Output for each entry of self.values.
+        - missing: Output for rows with code -1.
+        - dtype: Output dtype.
+        - out (np.ndarray or None): Array to write into instead of allocating one.
+
+        Returns:
+        - np.ndarray: One value per row.
+        """
+        # The trailing slot is selected by the -1 code of missing rows
+        lookup = np.append(np.asarray(per_value, dtype=dtype), np.asarray([missing], dtype=dtype))
+        return np.take(lookup, self.codes, out=out)
+
+    def decode(self):
+        """
+        Returns the plain values of every row, as numbers when every value is a number.
+        """
+        values = self.values
+        if values.dtype == object:
+            values = pd.Series(values, dtype=object).infer_objects().to_numpy()
+        if values.dtype.kind in 'iub':
+            if not (self.codes < 0).any():
+                # No row is missing, so the missing slot is never selected
+                return self.take(values, missing=0, dtype=values.dtype)
+            values = values.astype(np.float64)
+        return self.take(values, missing=self.missing, dtype=values.dtype)
+
+
+class ColumnarTable:
+    """
+    Set of named columns of equal length, either DictColumn or NumPy arrays.
+
+    Transforms add or replace entries of the column dict instead of copying a frame.
+    """
+
+    def __init__(self, columns):
+        self.columns = dict(columns)
+
+    @classmethod
+    def from_pandas(cls, dataset, dictionary_columns=DICTIONARY_COLUMNS):
+        """
+        Builds a table from a DataFrame, dictionary-encoding the categorical columns.
+        """
+        columns = {}
+        for name in dataset.columns:
+            if name in dictionary_columns:
+                columns[name] = DictColumn.from_array(dataset[name])
+            else:
+                columns[name] = dataset[name].to_numpy()
+        return cls(columns)
+
+    @classmethod
+    def from_arrow(cls, table, dictionary_columns=DICTIONARY_COLUMNS):
+        """
+        Builds a table from a pyarrow Table or RecordBatch.
+        """
+        columns = {}
+        for name, array in zip(table.column_names, table.columns):
+            if name in dictionary_columns:
+                columns[name] = DictColumn.from_arrow(array)
+            else:
+                columns[name] = array.to_numpy(zero_copy_only=False)
+        return cls(columns)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, column):
+        self.columns[name] = column
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def dense(self, name, dtype=None):
+        """
+        Returns a column as a plain NumPy array.
+        """
+        column = self.columns[name]
+        if isinstance(column, DictColumn):
+            if dtype is None:
+                return column.decode()
+            return column.take(column.values.astype(dtype), missing=column.missing, dtype=dtype)
+        return column if dtype is None else column.astype(dtype, copy=False)
+
+    def filter(self, mask):
+        """
+        Keeps the rows where mask is True, in one pass per column.
+        """
+        columns = {}
+        for name, column in self.columns.items():
+            if isinstance(column, DictColumn):
+                columns[name] = DictColumn(column.codes[mask], column.values, column.missing)
+            else:
+                columns[name] = column[mask]
+        return ColumnarTable(columns)
+
+    def slice(self, start, stop):
+        """
+        Returns rows start:stop as views, without copying.
+        """
+        columns = {}
+        for name, column in self.columns.items():
+            if isinstance(column, DictColumn):
+                columns[name] = DictColumn(column.codes[start:stop], column.values, column.missing)
+            else:
+                columns[name] = column[start:stop]
+        return ColumnarTable(columns)
+
+    def distinct_rows(self):
+        """
+        Finds the distinct rows of the table from the codes of its columns (plain columns are
+        factorized first), so equal rows can be scored once.
+
+        Returns:
+        - tuple: (table with the first occurrence of each distinct row, position of each
+          row's distinct row in it).
+        """
+        codes = np.column_stack([column.codes if isinstance(column, DictColumn) else pd.factorize(column)[0]
+                                 for column in self.columns.values()])
+        _, first, inverse = np.unique(codes, axis=0, return_index=True, return_inverse=True)
+        return self.filter(first), inverse.reshape(-1)
+
+    def to_pandas(self):
+        """
+        Converts the table to a DataFrame, decoding the dictionary columns.
+        """
+        return pd.DataFrame({name: self.dense(name) for name in self.columns})
+
+
+# Row filters; the features are built by the steps registered in transforms.py
+
+def _is_numeric(column):
+    if isinstance(column, DictColumn):
+        return len(column.values) > 0 and all(isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+                                              for value in column.values)
+    return np.issubdtype(column.dtype, np.number)
+
+
+def remove_outliers_iqr_columnar(table, column=None, multiplier=1.5):
+    """
+    Columnar remove_outliers_iqr: builds one mask over all the numeric columns and filters once.
+    """
+    if column:
+        columns = [column]
+    else:
+        columns = [name for name in table.columns if _is_numeric(table[name])]
+    mask = np.ones(len(table), dtype=bool)
+    for name in columns:
+        values = table.dense(name, dtype=float)
+        # Quartiles skip missing values like Series.quantile; NaN compares False, so only the
+        # rows with a missing value are dropped, as in remove_outliers_iqr
+        q1, q3 = np.nanquantile(values, [0.25, 0.75])
+        iqr = q3 - q1
+        mask &= (values >= q1 - multiplier * iqr) & (values <= q3 + multiplier * iqr)
+    return table.filter(mask)
+
+
+def model_matrix(bundle, table, aliases=None):
+    """
+    Encodes the categorical columns and fills the model's input matrix column by column.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to serve with.
+    - table (ColumnarTable): Table with all the features.
+    - aliases (dict or None): Model feature name -> table column, defaults to serving's aliases.
+
+    Returns:
+    - np.ndarray: float64 matrix with the features in the model's order, column-major so
+      each feature is written in place and LightGBM reads it without a copy.
+    """
+    if aliases is None:
+        from serving import SERVING_FEATURE_ALIASES
+        aliases = SERVING_FEATURE_ALIASES
+
+    feature_names = bundle.model.feature_name()
+    matrix = np.empty((len(table), len(feature_names)), dtype=np.float64, order='F')
+    for i, name in enumerate(feature_names):
+        column = table[aliases.get(name, name)]
+        if name in bundle.encoder.classes:
+            # Encode the dictionary, then expand the codes
+            column.take(bundle.encoder.transform_column(name, column.values),
+                        missing=UNSEEN_CODE, dtype=np.float64, out=matrix[:, i])
+        elif isinstance(column, DictColumn):
+            column.take(column.values.astype(np.float64), missing=column.missing, dtype=np.float64, out=matrix[:, i])
+        else:
+            matrix[:, i] = column
+    return matrix
+
+
+def predict_columnar(bundle, table, block_rows=DEFAULT_BLOCK_ROWS):
+    """
+    Predicts salaries for a table of raw input rows, running the bundle's feature plan.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to serve with.
+    - table (ColumnarTable): Raw input rows.
+    - block_rows (int): Rows per model input matrix; bounds the float64 copy of the features.
+
+    Returns:
+    - np.ndarray: The predicted salaries.
+    """
+    table = bundle.plan.run(table, job_salary_density=bundle.job_density)
+    predictions = np.empty(len(table), dtype=np.float64)
+    for start in range(0, len(table), block_rows):
+        block = table.slice(start, start + block_rows)
+        with STAGE_METRICS.time('encode', len(block)):
+            matrix = model_matrix(bundle, block)
+        with STAGE_METRICS.time('model_predict', len(block)):
+            predictions[start:start + block_rows] = bundle.model.predict(matrix)
+    return predictions
@@ -0,0 +1,270 @@
+import json
+import mmap
+
+import numpy as np
+
+COMPILED_MODEL_FORMAT = 1
+DEFAULT_COMPILED_MODEL_PATH = 'lightgbm_tunned_model.npz'
+
+# LightGBM's missing value handling of a numerical split (MissingType in tree.h)
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+# Values LightGBM treats as zero for MISSING_ZERO splits (kZeroThreshold)
+_ZERO_THRESHOLD = 1e-35
+
+# Objectives whose raw score is the prediction, and those predicting exp(raw score)
+_IDENTITY_OBJECTIVES = {'regression', 'regression_l1', 'huber', 'fair', 'quantile', 'mape'}
+_EXP_OBJECTIVES = {'poisson', 'gamma', 'tweedie'}
+
+
+class CompiledModel:
+    """
+    LightGBM regression trees flattened to arrays of nodes, evaluated with NumPy only.
+
+    The split nodes of every tree are stored in one set of arrays. A child index >= 0 points
+    to another split node; a negative child c is the leaf ~c of leaf_value. For evaluation,
+    leaves become nodes that point to themselves, so every (row, tree) pair descends one
+    level per step for as many steps as the deepest tree, with no bookkeeping of which pairs
+    are done. Leaf values are then added tree by tree in LightGBM's order, so the
+    predictions are identical to Booster.predict.
+
+    The model only needs NumPy, so a serving process that loads it never imports LightGBM,
+    scikit-learn or SciPy. Only numerical splits are supported, which is what the label
+    encoded features of this project produce.
+
+    Attributes:
+    - feature_names (list): Model features, in input column order.
+    - objective (str): LightGBM objective the trees were trained with.
+    - roots (np.ndarray): Root of each tree, a split node or a negative leaf index.
+    - split_feature, threshold, left_child, right_child, missing_type, default_left (np.ndarray):
+      One value per split node.
+    - leaf_value (np.ndarray): Output of each leaf.
+    """
+
+    def __init__(self, feature_names, objective, roots, split_feature, threshold, left_child, right_child,
+                 missing_type, default_left, leaf_value, average_output=False):
+        if objective not in _IDENTITY_OBJECTIVES | _EXP_OBJECTIVES:
+            raise ValueError(f"Compiling models with the objective '{objective}' is not supported.")
+        self.feature_names = list(feature_names)
+        self.objective = objective
+        self.average_output = bool(average_output)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.split_feature = np.asarray(split_feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left_child = np.asarray(left_child, dtype=np.int32)
+        self.right_child = np.asarray(right_child, dtype=np.int32)
+        self.missing_type = np.asarray(missing_type, dtype=np.uint8)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self._build_nodes()
+
+    def _build_nodes(self):
+        # Evaluation arrays over split nodes then leaves; node i's children are _children[2i] (left)
+        # and _children[2i + 1] (right), and a leaf is its own child
+        n_splits, n_leaves = len(self.split_feature), len(self.leaf_value)
+        leaves = np.arange(n_splits, n_splits + n_leaves, dtype=np.intp)
+
+        def node_index(children):
+            children = children.astype(np.intp)
+            return np.where(children >= 0, children, n_splits + ~children)
+
+        children = np.empty((n_splits + n_leaves, 2), dtype=np.intp)
+        children[:n_splits, 0] = node_index(self.left_child)
+        children[:n_splits, 1] = node_index(self.right_child)
+        children[n_splits:, 0] = children[n_splits:, 1] = leaves
+        self._children = children.ravel()
+        self._roots = node_index(self.roots)
+        self._feature = np.concatenate([self.split_feature, np.zeros(n_leaves, dtype=np.int32)]).astype(np.intp)
+        self._threshold = np.concatenate([self.threshold, np.full(n_leaves, np.inf)])
+        self._missing_type = np.concatenate([self.missing_type, np.zeros(n_leaves, dtype=np.uint8)])
+        self._default_right = np.concatenate([~self.default_left, np.zeros(n_leaves, dtype=bool)])
+        self._value = np.concatenate([np.zeros(n_splits), self.leaf_value])
+        self._has_zero_splits = bool(np.any(self.missing_type == MISSING_ZERO))
+
+        # Steps needed to reach a leaf from every root
+        depth = np.zeros(n_splits + n_leaves, dtype=np.int32)
+        for node in range(n_splits - 1, -1, -1):
+            # Children are always stored after their parent
+            depth[node] = 1 + max(depth[children[node, 0]], depth[children[node, 1]])
+        self._depth = int(depth[self._roots].max()) if len(self._roots) else 0
+
+    def share_memory(self):
+        """
+        Moves the arrays of the model into one anonymous shared memory mapping.
+
+        Processes forked afterwards read the same physical pages instead of private copies,
+        however they use the model. The arrays become read-only.
+
+        Returns:
+        - CompiledModel: The model itself.
+        """
+        names = [name for name, value in vars(self).items() if isinstance(value, np.ndarray)]
+        offsets, size = [], 0
+        for name in names:
+            offsets.append(size)
+            # 64-byte aligned, one cache line
+            size += -(-getattr(self, name).nbytes // 64) * 64
+        self._shared_memory = mmap.mmap(-1, max(size, 1))
+        for name, offset in zip(names, offsets):
+            array = getattr(self, name)
+            shared = np.frombuffer(self._shared_memory, dtype=array.dtype, count=array.size, offset=offset)
+            shared = shared.reshape(array.shape)
+            shared[...] = array
+            shared.flags.writeable = False
+            setattr(self, name, shared)
+        return self
+
+    def feature_name(self):
+        """
+        Returns the model features, like Booster.feature_name, so the compiled model can be
+        served in place of the booster.
+        """
+        return list(self.feature_names)
+
+    def num_trees(self):
+        return len(self.roots)
+
+    def _leaves(self, data):
+        # Node reached in every tree by every row, tree-major: (n_trees, n_rows)
+        n_rows, n_features = data.shape
+        values = data.ravel()
+        offsets = np.tile(np.arange(n_rows, dtype=np.intp) * n_features, len(self._roots))
+        nodes = np.repeat(self._roots, n_rows)
+        handle_missing = self._has_zero_splits or np.isnan(values).any()
+        for _ in range(self._depth):
+            value = values[offsets + self._feature[nodes]]
+            if handle_missing:
+                go_right = self._missing_value_split(nodes, value)
+            else:
+                go_right = value > self._threshold[nodes]
+            nodes = self._children[2 * nodes + go_right]
+        return nodes.reshape(len(self._roots), n_rows)
+
+    def _missing_value_split(self, nodes, value):
+        # LightGBM's NumericalDecision: NaN is read as 0 unless the split has a direction for NaN,
+        # and MISSING_ZERO / MISSING_NAN splits send zeros / NaN to their default side
+        missing_type = self._missing_type[nodes]
+        is_nan = np.isnan(value)
+        value = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, value)
+        is_zero = (value > -_ZERO_THRESHOLD) & (value <= _ZERO_THRESHOLD)
+        use_default = ((missing_type == MISSING_ZERO) & is_zero) | ((missing_type == MISSING_NAN) & is_nan)
+        return np.where(use_default, self._default_right[nodes], value > self._threshold[nodes])
+
+    def predict(self, data, block_rows=2048):
+        """
+        Predicts the target of every row.
+
+        Parameters:
+        - data (np.ndarray or pd.DataFrame): Model input, one column per feature in
+          feature_names order.
+        - block_rows (int): Rows evaluated at a time; small blocks keep the working arrays
+          in the CPU cache.
+
+        Returns:
+        - np.ndarray: The predictions.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 1:
+            data = data.reshape(1, -1)
+        if data.shape[1] != len(self.feature_names):
+            raise ValueError(f"The model expects {len(self.feature_names)} features, got {data.shape[1]}.")
+
+        scores = np.zeros(len(data), dtype=np.float64)
+        if not len(self._roots):
+            return scores
+        for start in range(0, len(data), block_rows):
+            block = np.ascontiguousarray(data[start:start + block_rows])
+            # Adds the trees one after the other, in LightGBM's order, so the sums round the same
+            # way (sum() may add them pairwise)
+            scores[start:start + block_rows] = np.add.accumulate(self._value[self._leaves(block)], axis=0)[-1]
+        if self.average_output:
+            scores /= len(self._roots)
+        if self.objective in _EXP_OBJECTIVES:
+            scores = np.exp(scores)
+        return scores
+
+    def save(self, path=DEFAULT_COMPILED_MODEL_PATH):
+        """
+        Writes the model to a .npz file (no pickles, so loading it runs no code).
+
+        Parameters:
+        - path (str): Destination file.
+        """
+        meta = {'format': COMPILED_MODEL_FORMAT, 'feature_names': self.feature_names,
+                'objective': self.objective, 'average_output': self.average_output}
+        with open(path, 'wb') as file:
+            np.savez(file, meta=np.array(json.dumps(meta)), roots=self.roots, split_feature=self.split_feature,
+                     threshold=self.threshold, left_child=self.left_child, right_child=self.right_child,
+                     missing_type=self.missing_type, default_left=self.default_left, leaf_value=self.leaf_value)
+
+
+def load_compiled_model(path=DEFAULT_COMPILED_MODEL_PATH):
+    """
+    Loads a model written by CompiledModel.save.
+
+    Parameters:
+    - path (str): Path of the .npz file.
+
+    Returns:
+    - CompiledModel: The model.
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        meta = json.loads(str(arrays['meta']))
+        if meta.get('format') != COMPILED_MODEL_FORMAT:
+            raise ValueError(f"Unsupported compiled model format {meta.get('format')!r}; expected {COMPILED_MODEL_FORMAT}.")
+        return CompiledModel(
+            meta['feature_names'], meta['objective'], arrays['roots'], arrays['split_feature'], arrays['threshold'],
+            arrays['left_child'], arrays['right_child'], arrays['missing_type'], arrays['default_left'],
+            arrays['leaf_value'], average_output=meta['average_output'],
+        )
+
+
+def compile_model(booster):
+    """
+    Flattens the trees of a trained LightGBM booster into a CompiledModel.
+
+    Trees after the booster's best iteration are left out, as Booster.predict does.
+
+    Parameters:
+    - booster (lgb.Booster): Trained regression booster.
+
+    Returns:
+    - CompiledModel: The same model, evaluated without LightGBM.
+    """
+    dump = booster.dump_model()
+    if dump['num_tree_per_iteration'] != 1:
+        raise ValueError("Only models with one tree per iteration (regression) can be compiled.")
+    trees = dump['tree_info']
+    if booster.best_iteration > 0:
+        trees = trees[:booster.best_iteration]
+
+    roots, split_feature, threshold, left_child, right_child, missing_type, default_left, leaf_value = \
+        [], [], [], [], [], [], [], []
+
+    def add(node):
+        # Returns the index of the node, or ~leaf for a leaf
+        if 'leaf_value' in node:
+            if 'leaf_coeff' in node:
+                raise ValueError("Models with linear trees cannot be compiled.")
+            leaf_value.append(node['leaf_value'])
+            return ~(len(leaf_value) - 1)
+        if node['decision_type'] != '<=':
+            raise ValueError("Models with categorical splits cannot be compiled.")
+        index = len(split_feature)
+        split_feature.append(node['split_feature'])
+        threshold.append(node['threshold'])
+        missing_type.append(_MISSING_TYPES[node['missing_type']])
+        default_left.append(node['default_left'])
+        left_child.append(0)
+        right_child.append(0)
+        left_child[index] = add(node['left_child'])
+        right_child[index] = add(node['right_child'])
+        return index
+
+    for tree in trees:
+        roots.append(add(tree['tree_structure']))
+
+    objective = dump['objective'].split()[0]
+    return CompiledModel(dump['feature_names'], objective, roots, split_feature, threshold, left_child,
+                         right_child, missing_type, default_left, leaf_value,
+                         average_output=dump.get('average_output', False))
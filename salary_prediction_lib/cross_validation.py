@@ -0,0 +1,121 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from metrics import METRIC_NAMES, MetricsAccumulator, bootstrap_metrics
+from model import DEFAULT_PARAMS
+
+# Features and labels loaded once per worker process by _init_worker
+_worker_data = None
+
+
+def kfold_indices(n_rows, n_splits=5, shuffle=True, seed=42):
+    """
+    Splits row positions into k folds of nearly equal size.
+
+    Parameters:
+    - n_rows (int): Rows of the dataset.
+    - n_splits (int): Number of folds.
+    - shuffle (bool): Shuffle the rows before splitting.
+    - seed (int): Random seed of the shuffle.
+
+    Returns:
+    - list: One sorted array of held-out row positions per fold.
+    """
+    if not 2 <= n_splits <= n_rows:
+        raise ValueError(f"n_splits must be between 2 and the number of rows ({n_rows}), got {n_splits}.")
+    positions = np.random.default_rng(seed).permutation(n_rows) if shuffle else np.arange(n_rows)
+    return [np.sort(fold) for fold in np.array_split(positions, n_splits)]
+
+
+def _fit_fold(data, test_index, params, num_boost_round):
+    import lightgbm as lgb
+
+    X, y = data
+    train_mask = np.ones(len(y), dtype=bool)
+    train_mask[test_index] = False
+    start = time.perf_counter()
+    train_set = lgb.Dataset(X[train_mask], label=y[train_mask], params={'verbosity': -1})
+    model = lgb.train(params, train_set, num_boost_round=num_boost_round)
+    predictions = model.predict(X[test_index])
+    return predictions, time.perf_counter() - start
+
+
+def _init_worker(X, y):
+    global _worker_data
+    _worker_data = (X, y)
+
+
+def _worker_fold(test_index, params, num_boost_round):
+    return _fit_fold(_worker_data, test_index, params, num_boost_round)
+
+
+def cross_validate_lgb(X, y, n_splits=5, params=None, num_boost_round=100, n_workers=1, threads_per_worker=None,
+                       shuffle=True, seed=42, n_bootstrap=1000, confidence=0.95):
+    """
+    K-fold cross-validation of a LightGBM regression model, training the folds in parallel.
+
+    Each worker process receives the features and labels once and trains whole folds, with
+    threads_per_worker LightGBM threads. The metrics of every fold come from one pass over
+    its residuals (MetricsAccumulator); the accumulators of the folds are merged into the
+    metrics of all the out-of-fold predictions, and bootstrap resampling of those predictions
+    gives their confidence intervals.
+
+    Parameters:
+    - X (pd.DataFrame or np.ndarray): Encoded features.
+    - y (pd.Series or np.ndarray): Target.
+    - n_splits (int): Number of folds.
+    - params (dict or None): LightGBM parameters, defaults to model.DEFAULT_PARAMS.
+    - num_boost_round (int): Boosting rounds of every fold.
+    - n_workers (int): Folds trained at the same time, each in its own process; 1 trains
+      them one after the other in this process.
+    - threads_per_worker (int or None): LightGBM threads per fold. Defaults to the CPU count
+      divided by n_workers, so the workers do not oversubscribe the machine.
+    - shuffle, seed: Shuffling of the rows before splitting, also LightGBM's seed.
+    - n_bootstrap (int): Bootstrap resamples of the out-of-fold predictions; 0 skips the intervals.
+    - confidence (float): Coverage of the intervals.
+
+    Returns:
+    - dict: 'folds' (rows, seconds and metrics of each fold), 'mean' and 'std' of each metric
+      over the folds, 'out_of_fold' (metrics of every prediction together), 'intervals'
+      (bootstrap estimate, lower and upper bound of each metric, or None) and 'predictions'
+      (the out-of-fold prediction of every row).
+    """
+    n_workers = max(1, min(n_workers, n_splits))
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // n_workers)
+    params = dict(DEFAULT_PARAMS if params is None else params, num_threads=threads_per_worker, verbosity=-1)
+    params.setdefault('seed', seed)
+    # LightGBM takes 2-D arrays as they are; the folds are taken with boolean masks
+    X = np.asarray(X, dtype=np.float64) if not hasattr(X, 'iloc') else X.to_numpy(dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    folds = kfold_indices(len(y), n_splits, shuffle, seed)
+
+    if n_workers == 1:
+        outcomes = [_fit_fold((X, y), fold, params, num_boost_round) for fold in folds]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(X, y)) as executor:
+            outcomes = list(executor.map(_worker_fold, folds, [params] * n_splits, [num_boost_round] * n_splits))
+
+    predictions = np.empty(len(y), dtype=np.float64)
+    total = MetricsAccumulator()
+    fold_results = []
+    for i, (fold, (fold_predictions, seconds)) in enumerate(zip(folds, outcomes)):
+        predictions[fold] = fold_predictions
+        accumulator = MetricsAccumulator().update(y[fold], fold_predictions)
+        total.merge(accumulator)
+        fold_results.append({'fold': i, 'rows': len(fold), 'seconds': seconds, **accumulator.result()})
+
+    values = {name: np.array([fold[name] for fold in fold_results]) for name in METRIC_NAMES}
+    intervals = None
+    if n_bootstrap:
+        intervals = bootstrap_metrics(y, predictions, n_bootstrap, confidence, seed, n_workers=n_workers)
+    return {
+        'folds': fold_results,
+        'mean': {name: float(value.mean()) for name, value in values.items()},
+        'std': {name: float(value.std(ddof=1)) for name, value in values.items()},
+        'out_of_fold': total.result(),
+        'intervals': intervals,
+        'predictions': predictions,
+    }
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Parameters that change how lgb.Dataset bins the data (any of their aliases is accepted)
+BINNING_PARAMS = ('max_bin', 'max_bin_by_feature', 'min_data_in_bin', 'bin_construct_sample_cnt',
+                  'data_random_seed', 'seed', 'is_enable_sparse', 'enable_bundle', 'use_missing',
+                  'zero_as_missing', 'feature_pre_filter', 'min_data_in_leaf', 'categorical_feature',
+                  'forcedbins_filename', 'linear_tree')
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, '.dataset_cache')
+
+
+def binning_params(params):
+    """
+    Picks the parameters that affect binning out of a LightGBM parameter dict.
+
+    Parameters:
+    - params (dict or None): Training parameters.
+
+    Returns:
+    - dict: Binning parameters by canonical name.
+    """
+    params = params or {}
+    try:
+        from lightgbm.basic import _ConfigAliases
+        aliases = {name: _ConfigAliases.get(name) for name in BINNING_PARAMS}
+    except ImportError:
+        aliases = {name: {name} for name in BINNING_PARAMS}
+    selected = {}
+    for name in BINNING_PARAMS:
+        for alias in aliases[name]:
+            if alias in params:
+                selected[name] = params[alias]
+    return selected
+
+
+def content_hash(*arrays):
+    """
+    Hashes features and labels (values, column names and dtypes).
+
+    Parameters:
+    - arrays: DataFrames, Series or NumPy arrays.
+
+    Returns:
+    - str: Hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    for array in arrays:
+        if isinstance(array, pd.Series):
+            array = array.to_frame()
+        if isinstance(array, pd.DataFrame):
+            digest.update(json.dumps([[str(name), str(dtype)] for name, dtype in array.dtypes.items()]).encode())
+            for _, column in array.items():
+                _update_digest(digest, column)
+        else:
+            array = np.asarray(array)
+            digest.update(json.dumps([array.shape, str(array.dtype)]).encode())
+            _update_digest(digest, array)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, values):
+    array = np.asarray(values)
+    if array.dtype == object:
+        # Python objects have no stable bytes; pandas hashes their values instead
+        digest.update(pd.util.hash_pandas_object(pd.Series(array), index=False).to_numpy())
+    else:
+        # Numeric buffers are hashed in place, without a copy
+        digest.update(np.ascontiguousarray(array))
+
+
+class DatasetCache:
+    """
+    Keeps binned LightGBM datasets on disk, in LightGBM's binary format.
+
+    A dataset is keyed by the content hash of its features and labels, the binning parameters,
+    the LightGBM version and, for validation sets, the key of the training set whose bins they
+    reuse. Any change to the input data or to the features computed from it (create_features,
+    the feature plan) changes the content hash, so stale entries are never loaded; they are
+    simply left unused.
+
+    Parameters:
+    - cache_dir (str): Folder holding the .bin files.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, X, y, params=None, reference_key=None):
+        """
+        Returns the cache key of a dataset.
+
+        Parameters:
+        - X: Features.
+        - y: Labels.
+        - params (dict or None): Training parameters (only the binning ones are used).
+        - reference_key (str or None): Key of the training set, for validation sets.
+
+        Returns:
+        - str: Hexadecimal key.
+        """
+        import lightgbm as lgb
+
+        description = {
+            'data': content_hash(X, y),
+            'binning': binning_params(params),
+            'lightgbm': lgb.__version__,
+            'reference': reference_key,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.bin')
+
+    def dataset(self, X, y, params=None, reference=None, reference_key=None):
+        """
+        Returns a constructed lgb.Dataset, loaded from the cache when possible.
+
+        Parameters:
+        - X: Features.
+        - y: Labels.
+        - params (dict or None): Training parameters (only the binning ones are used).
+        - reference (lgb.Dataset or None): Training set, for validation sets.
+        - reference_key (str or None): Cache key of reference.
+
+        Returns:
+        - tuple: (lgb.Dataset, cache key).
+        """
+        import lightgbm as lgb
+
+        dataset_params = dict(binning_params(params), verbosity=-1)
+        key = self.key(X, y, params, reference_key)
+        path = self.path(key)
+        if os.path.exists(path):
+            self.hits += 1
+            dataset = lgb.Dataset(path, reference=reference, params=dataset_params).construct()
+            return dataset, key
+
+        self.misses += 1
+        dataset = lgb.Dataset(X, label=y, reference=reference, params=dataset_params).construct()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Written under a temporary name first, so a reader never sees a partial file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        dataset.save_binary(tmp_path)
+        os.replace(tmp_path, path)
+        return dataset, key
+
+    def train_valid(self, X_train, y_train, X_valid, y_valid, params=None):
+        """
+        Returns the training set and a validation set binned like it.
+
+        Parameters:
+        - X_train, y_train: Training features and labels.
+        - X_valid, y_valid: Validation features and labels.
+        - params (dict or None): Training parameters (only the binning ones are used).
+
+        Returns:
+        - tuple: (train lgb.Dataset, valid lgb.Dataset).
+        """
+        train_set, train_key = self.dataset(X_train, y_train, params)
+        valid_set, _ = self.dataset(X_valid, y_valid, params, reference=train_set, reference_key=train_key)
+        return train_set, valid_set
+
+    def clear(self):
+        """
+        Removes every cached dataset.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.bin'):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,339 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from transforms import compile_plan
+
+DEFAULT_STORE_PATH = 'salary_density_store.pkl'
+
+# Key given to rows whose experience level is unknown. Their salary density is 0, like the
+# NaN filled by add_salary_density, but they still count towards their job title's average.
+MISSING_EXPERIENCE = -1.0
+
+# Steps that turn the raw experience_level codes of a CSV export into years_of_experience
+_EXPERIENCE_PLAN_STEPS = ['experience_level_description', 'years_of_experience']
+
+STATS_COLUMNS = ['count', 'mean', 'm2']
+
+
+def group_stats(values, keys):
+    """
+    Computes count, mean and M2 (sum of squared deviations from the mean) of each group.
+
+    Parameters:
+    - values (pd.Series): Values to summarize.
+    - keys (pd.Series or list): One or more grouping columns, aligned with values.
+
+    Returns:
+    - pd.DataFrame: Columns count, mean and m2, indexed by group.
+    """
+    grouped = values.groupby(keys)
+    stats = grouped.agg(['count', 'mean', 'var'])
+    stats['m2'] = (stats['var'] * (stats['count'] - 1)).fillna(0.0)
+    return stats[STATS_COLUMNS].astype({'count': np.int64})
+
+
+def merge_group_stats(left, right):
+    """
+    Combines the statistics of two disjoint sets of rows, group by group.
+
+    Uses the parallel form of Welford's update (Chan et al.), so merging a batch only touches
+    the groups present in it and never needs the rows that were summarized before.
+
+    Parameters:
+    - left, right (pd.DataFrame): Outputs of group_stats.
+
+    Returns:
+    - pd.DataFrame: Statistics of the union of both sets of rows.
+    """
+    if left.empty:
+        return right.copy()
+    if right.empty:
+        return left.copy()
+    index = left.index.union(right.index)
+    a = left.reindex(index)
+    b = right.reindex(index)
+    n_a = a['count'].fillna(0).to_numpy(np.float64)
+    n_b = b['count'].fillna(0).to_numpy(np.float64)
+    mean_a = a['mean'].fillna(0).to_numpy()
+    mean_b = b['mean'].fillna(0).to_numpy()
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    merged = pd.DataFrame(index=index)
+    merged['count'] = n.astype(np.int64)
+    merged['mean'] = mean_a + delta * n_b / n
+    merged['m2'] = a['m2'].fillna(0).to_numpy() + b['m2'].fillna(0).to_numpy() + delta ** 2 * n_a * n_b / n
+    return merged
+
+
+def _iqr_bounds(salaries, multiplier):
+    # Same bounds as remove_outliers_iqr
+    q1, q3 = salaries.quantile(0.25), salaries.quantile(0.75)
+    return float(q1 - multiplier * (q3 - q1)), float(q3 + multiplier * (q3 - q1))
+
+
+class SalaryDensityStore:
+    """
+    Running salary statistics behind salary_density_by_experience and salary_density_by_job.pkl.
+
+    Two tables of count/mean/M2 are kept: one by years of experience and one by (job title,
+    years of experience). The average salary density of a job title is
+
+        sum over e of n_je * (mean_je - mean_e) / std_e, divided by n_j
+
+    so it is computed exactly from the tables, without the rows. New batches are merged in
+    O(batch) time and the stats are the same as add_salary_density + save_salary_density_by_job
+    on the whole history.
+
+    As in the notebook, the experience statistics use every row, while only rows whose salary
+    lies within salary_bounds (the outlier filter) count towards the job title averages.
+
+    Attributes:
+    - experience (pd.DataFrame): Stats indexed by years_of_experience.
+    - jobs (pd.DataFrame): Stats indexed by (job_title, years_of_experience).
+    - salary_bounds (tuple or None): (lower, upper) salaries kept for the job title averages.
+    - rows (int): Rows merged so far.
+    """
+
+    def __init__(self, salary_bounds=None, salary_column='salary_in_usd', experience_column='years_of_experience',
+                 job_column='job_title'):
+        self.salary_bounds = salary_bounds
+        self.salary_column = salary_column
+        self.experience_column = experience_column
+        self.job_column = job_column
+        self.experience = pd.DataFrame(columns=STATS_COLUMNS)
+        self.jobs = pd.DataFrame(columns=STATS_COLUMNS)
+        self.rows = 0
+
+    @classmethod
+    def from_dataset(cls, dataset, multiplier=1.5, **kwargs):
+        """
+        Builds a store from the full history, fixing the outlier bounds like remove_outliers_iqr.
+
+        Parameters:
+        - dataset (pd.DataFrame): Data with salaries, years of experience and job titles.
+        - multiplier (float): The IQR multiplier that defines outliers.
+        - kwargs: Column names, passed to SalaryDensityStore.
+
+        Returns:
+        - SalaryDensityStore: The store with the dataset merged.
+        """
+        store = cls(**kwargs)
+        store.salary_bounds = _iqr_bounds(dataset[store.salary_column], multiplier)
+        return store.update(dataset)
+
+    @classmethod
+    def from_csv(cls, path, multiplier=1.5, chunksize=100_000, **kwargs):
+        """
+        Builds a store from a raw aijobs.net export, like from_dataset.
+
+        Parameters:
+        - path (str): CSV file with the original columns.
+        - multiplier (float): The IQR multiplier that defines outliers.
+        - chunksize (int): Rows read at a time.
+        - kwargs: Column names, passed to SalaryDensityStore.
+
+        Returns:
+        - SalaryDensityStore: The store with the file merged.
+        """
+        store = cls(**kwargs)
+        # Only the salaries are read in full, to fix the outlier bounds
+        salaries = pd.read_csv(path, usecols=[store.salary_column])[store.salary_column]
+        store.salary_bounds = _iqr_bounds(salaries, multiplier)
+        return store.update_csv(path, chunksize)
+
+    def update(self, dataset):
+        """
+        Merges a batch of rows into the statistics.
+
+        Parameters:
+        - dataset (pd.DataFrame): New rows with salaries, years of experience and job titles.
+
+        Returns:
+        - SalaryDensityStore: The store itself.
+        """
+        self.update_experience(dataset)
+        self.update_jobs(dataset)
+        self.rows += len(dataset)
+        return self
+
+    def update_experience(self, dataset):
+        """
+        Merges a batch of rows into the statistics by years of experience only.
+
+        Parameters:
+        - dataset (pd.DataFrame): New rows with salaries and years of experience.
+
+        Returns:
+        - SalaryDensityStore: The store itself.
+        """
+        experience = dataset[self.experience_column].astype(np.float64)
+        self.experience = merge_group_stats(self.experience, group_stats(dataset[self.salary_column], experience))
+        return self
+
+    def update_jobs(self, dataset):
+        """
+        Merges a batch of rows into the statistics by job title only, skipping salaries outside salary_bounds.
+
+        Parameters:
+        - dataset (pd.DataFrame): New rows with salaries, years of experience and job titles.
+
+        Returns:
+        - SalaryDensityStore: The store itself.
+        """
+        salaries = dataset[self.salary_column]
+        kept = np.ones(len(dataset), dtype=bool)
+        if self.salary_bounds is not None:
+            lower, upper = self.salary_bounds
+            kept = ((salaries >= lower) & (salaries <= upper)).to_numpy()
+        experience = dataset[self.experience_column].astype(np.float64)[kept].fillna(MISSING_EXPERIENCE)
+        self.jobs = merge_group_stats(self.jobs, group_stats(salaries[kept], [dataset[self.job_column][kept], experience]))
+        return self
+
+    def update_csv(self, path, chunksize=100_000):
+        """
+        Merges a raw aijobs.net export, reading it in chunks.
+
+        Parameters:
+        - path (str): CSV file with the original columns (experience_level codes, job_title, salary_in_usd).
+        - chunksize (int): Rows read at a time.
+
+        Returns:
+        - SalaryDensityStore: The store itself.
+        """
+        plan = compile_plan(_EXPERIENCE_PLAN_STEPS)
+        columns = [self.salary_column, 'experience_level', self.job_column]
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+            self.update(plan.run_frame(chunk))
+        return self
+
+    def merge(self, other):
+        """
+        Merges the statistics of another store, e.g. one built on a different export.
+
+        Parameters:
+        - other (SalaryDensityStore): Store summarizing other rows.
+
+        Returns:
+        - SalaryDensityStore: The store itself.
+        """
+        self.experience = merge_group_stats(self.experience, other.experience)
+        self.jobs = merge_group_stats(self.jobs, other.jobs)
+        self.rows += other.rows
+        return self
+
+    def experience_stats(self):
+        """
+        Returns the mean and standard deviation (ddof=1, like pandas) of each experience group.
+
+        Returns:
+        - pd.DataFrame: Columns mean_salary and std_salary, indexed by years_of_experience.
+        """
+        count = self.experience['count'].astype(np.float64)
+        return pd.DataFrame({
+            'mean_salary': self.experience['mean'].astype(np.float64),
+            'std_salary': np.sqrt(self.experience['m2'].astype(np.float64) / (count - 1)).where(count > 1),
+        })
+
+    def salary_density(self, dataset):
+        """
+        Computes the salary density (z-score by years of experience) of some rows.
+
+        Parameters:
+        - dataset (pd.DataFrame): Rows with salaries and years of experience.
+
+        Returns:
+        - pd.Series: The salary density of each row; 0 where it is undefined.
+        """
+        stats = self.experience_stats().reindex(dataset[self.experience_column].astype(np.float64))
+        density = (dataset[self.salary_column].to_numpy() - stats['mean_salary'].to_numpy()) / stats['std_salary'].to_numpy()
+        return pd.Series(density, index=dataset.index).replace([np.inf, -np.inf], np.nan).fillna(0)
+
+    def job_density(self, encoder=None):
+        """
+        Computes the average salary density of each job title from the running statistics.
+
+        Parameters:
+        - encoder (CategoricalEncoders or None): When given, titles are keyed by their code, like the
+          stats saved by the notebook; titles unknown to the encoder are left out.
+
+        Returns:
+        - dict: Job title (or code) mapped to its average salary density.
+        """
+        if self.jobs.empty:
+            return {}
+        jobs = self.jobs.index.get_level_values(0)
+        stats = self.experience_stats().reindex(self.jobs.index.get_level_values(1))
+        count = self.jobs['count'].to_numpy(np.float64)
+        terms = count * (self.jobs['mean'].to_numpy(np.float64) - stats['mean_salary'].to_numpy()) / stats['std_salary'].to_numpy()
+        # Groups without a standard deviation have a density of 0, as fillna(0) gives in add_salary_density
+        terms = np.where(np.isfinite(terms), terms, 0.0)
+        totals = pd.DataFrame({'terms': terms, 'count': count}, index=jobs).groupby(level=0).sum()
+        density = totals['terms'] / totals['count']
+
+        if encoder is not None:
+            codes = encoder.transform_column(self.job_column, density.index)
+            density = pd.Series(density.to_numpy(), index=codes)[codes >= 0]
+        return {key: float(value) for key, value in density.items()}
+
+    def save_job_density(self, stats_path='salary_density_by_job.pkl', encoder=None):
+        """
+        Saves the average salary density by job title, in the format of save_salary_density_by_job.
+
+        Parameters:
+        - stats_path (str): Path to save the stats.
+        - encoder (CategoricalEncoders or None): Encoder to key the titles by code.
+
+        Returns:
+        - dict: The saved stats.
+        """
+        job_salary_density = self.job_density(encoder)
+        joblib.dump(job_salary_density, stats_path)
+        print(f"Salary density stats saved to {stats_path}")
+        return job_salary_density
+
+    def save(self, path=DEFAULT_STORE_PATH):
+        """
+        Saves the store, to be updated with the next export.
+
+        Only plain tables are saved, so the file can be loaded without importing this module
+        under the same name.
+
+        Parameters:
+        - path (str): Destination file.
+        """
+        data = {
+            'salary_bounds': self.salary_bounds,
+            'columns': [self.salary_column, self.experience_column, self.job_column],
+            'experience': self.experience,
+            'jobs': self.jobs,
+            'rows': self.rows,
+        }
+        # Written under a temporary name first, so an interrupted save keeps the previous store
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        joblib.dump(data, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_STORE_PATH):
+        """
+        Loads a store saved with save.
+
+        Parameters:
+        - path (str): Saved store.
+
+        Returns:
+        - SalaryDensityStore: The store.
+        """
+        try:
+            data = joblib.load(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"The file '{path}' does not exist. Build the store with SalaryDensityStore.from_csv first.")
+        if not isinstance(data, dict) or 'jobs' not in data:
+            raise ValueError(f"The file '{path}' does not contain a store saved with SalaryDensityStore.save.")
+        salary_column, experience_column, job_column = data['columns']
+        store = cls(data['salary_bounds'], salary_column, experience_column, job_column)
+        store.experience, store.jobs, store.rows = data['experience'], data['jobs'], data['rows']
+        return store
@@ -0,0 +1,132 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+# Categorical columns encoded before training and serving
+CATEGORICAL_COLUMNS = ["experience_level", "employment_type", "job_title",
+                       "employee_residence", "remote_ratio", "company_location", "company_size"]
+
+# Code given to any category that was not seen at training time
+UNSEEN_CODE = -1
+
+
+class CategoricalEncoders:
+    """
+    Label encoders for several columns, fitted once at training time.
+
+    Codes match sklearn's LabelEncoder (position in the sorted classes), so models trained
+    with LabelEncoder keep working. Categories that were not seen during fit are always
+    encoded as UNSEEN_CODE.
+
+    Attributes:
+    - classes (dict): Column name mapped to a NumPy array with its sorted classes.
+    - lookup (dict): Column name mapped to a {category: code} dictionary.
+    """
+
+    def __init__(self, classes):
+        self.classes = {col: np.asarray(values, dtype=object) for col, values in classes.items()}
+        self.lookup = {col: {value: code for code, value in enumerate(values)}
+                       for col, values in self.classes.items()}
+        self._index = {col: pd.Index(values) for col, values in self.classes.items()}
+
+    @property
+    def columns(self):
+        return list(self.classes)
+
+    @classmethod
+    def fit(cls, dataset, columns=None):
+        """
+        Fits one encoder per column.
+
+        Parameters:
+        - dataset (pd.DataFrame): Training data.
+        - columns (list or None): Columns to encode. Defaults to CATEGORICAL_COLUMNS.
+
+        Returns:
+        - CategoricalEncoders: The fitted encoders.
+        """
+        columns = CATEGORICAL_COLUMNS if columns is None else columns
+        # unique() of a categorical column is in category order, so sort the values themselves
+        return cls({col: np.sort(np.asarray(dataset[col].unique(), dtype=object)) for col in columns})
+
+    def transform_column(self, column, values):
+        """
+        Encodes the values of one column with a single vectorized lookup.
+
+        Parameters:
+        - column (str): Name of the fitted column.
+        - values (array-like): Categories to encode.
+
+        Returns:
+        - np.ndarray: Integer codes, UNSEEN_CODE for unknown categories; the smallest
+          integer type holding them for a categorical column.
+        """
+        # get_indexer returns -1 (UNSEEN_CODE) for labels missing from the index
+        codes = self._index[column].get_indexer(values)
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            # Compact input keeps compact codes: the smallest integer type holding every class
+            codes = codes.astype(np.promote_types(np.min_scalar_type(-len(self.classes[column])), np.int8))
+        return codes
+
+    def transform(self, dataset):
+        """
+        Encodes every fitted column of a dataset.
+
+        Parameters:
+        - dataset (pd.DataFrame): The dataset to encode. It is modified in place.
+
+        Returns:
+        - pd.DataFrame: The dataset with encoded columns.
+        """
+        for col in self.classes:
+            dataset[col] = self.transform_column(col, dataset[col])
+        return dataset
+
+    def encode_value(self, column, value):
+        """
+        Encodes a single category.
+
+        Parameters:
+        - column (str): Name of the fitted column.
+        - value: Category to encode.
+
+        Returns:
+        - int: The code of the category, or UNSEEN_CODE.
+        """
+        return self.lookup[column].get(value, UNSEEN_CODE)
+
+    def to_dict(self):
+        """
+        Returns the encoders as plain lookup arrays, the format saved to disk.
+        """
+        return {'unseen_code': UNSEEN_CODE, 'classes': dict(self.classes)}
+
+
+def save_encoders(encoders, path='data_encoder.pkl'):
+    """
+    Saves fitted encoders as flat lookup arrays.
+
+    Parameters:
+    - encoders (CategoricalEncoders): The fitted encoders.
+    - path (str): Path of the file to write.
+    """
+    joblib.dump(encoders.to_dict(), path)
+
+
+def load_encoders(path='data_encoder.pkl'):
+    """
+    Loads encoders saved with save_encoders.
+
+    Parameters:
+    - path (str): Path of the saved encoders.
+
+    Returns:
+    - CategoricalEncoders: The fitted encoders.
+    """
+    data = joblib.load(path)
+    if not isinstance(data, dict) or 'classes' not in data:
+        raise ValueError(f"The file '{path}' does not contain encoders saved with save_encoders. "
+                         "Rebuild it from the training data with CategoricalEncoders.fit.")
+    if data.get('unseen_code', UNSEEN_CODE) != UNSEEN_CODE:
+        raise ValueError(f"The encoders in '{path}' use a different code for unseen categories.")
+    return CategoricalEncoders(data['classes'])
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+from columnar import DEFAULT_BLOCK_ROWS, ColumnarTable, model_matrix
+from compiled_model import CompiledModel
+from instrumentation import STAGE_METRICS
+
+# Key of the expected value (the model's output before any feature is known) in an explanation
+BASE_VALUE = 'base_value'
+
+
+class ExplanationUnavailableError(RuntimeError):
+    """Raised when the served model cannot compute feature contributions."""
+
+
+def explain_columnar(bundle, table, block_rows=DEFAULT_BLOCK_ROWS, return_predictions=False):
+    """
+    Computes the SHAP feature contributions of a table of raw input rows.
+
+    The rows go through the same feature plan and encoding as predict_columnar, and each block
+    of rows is explained by one call to the booster's predict(pred_contrib=True). TreeSHAP
+    costs far more per row than a prediction (every leaf of every tree, times the depth
+    squared), so each distinct row is only explained once.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to serve with; the model must be a LightGBM booster.
+    - table (ColumnarTable): Raw input rows.
+    - block_rows (int): Rows per model input matrix.
+    - return_predictions (bool): Also predict each block of rows from the same matrix.
+
+    Returns:
+    - np.ndarray: One row per input row: the contribution of each model feature, in the order
+      of bundle.model.feature_name(), followed by the base value. Each row sums to the prediction
+      up to floating point rounding.
+    - tuple: (contributions, predictions) when return_predictions is True; the predictions are
+      exactly those of predict_columnar.
+    """
+    if isinstance(bundle.model, CompiledModel):
+        raise ExplanationUnavailableError("Feature contributions need the LightGBM booster; "
+                                          "the compiled model only predicts.")
+    n_outputs = len(bundle.model.feature_name()) + 1
+    if not len(table):
+        contributions = np.empty((0, n_outputs), dtype=np.float64)
+        return (contributions, np.empty(0, dtype=np.float64)) if return_predictions else contributions
+    columns = bundle.plan.source_columns()
+    missing = [column for column in columns if column not in table]
+    if missing:
+        raise ValueError(f"The dataset is missing the columns: {missing}")
+    # Fields the plan does not read must not tell equal rows apart
+    distinct, inverse = ColumnarTable({column: table[column] for column in columns}).distinct_rows()
+    distinct = bundle.plan.run(distinct, job_salary_density=bundle.job_density)
+    contributions = np.empty((len(distinct), n_outputs), dtype=np.float64)
+    predictions = np.empty(len(distinct), dtype=np.float64)
+    for start in range(0, len(distinct), block_rows):
+        block = distinct.slice(start, start + block_rows)
+        with STAGE_METRICS.time('encode', len(block)):
+            matrix = model_matrix(bundle, block)
+        with STAGE_METRICS.time('model_contrib', len(block)):
+            contributions[start:start + block_rows] = bundle.model.predict(matrix, pred_contrib=True)
+        if return_predictions:
+            with STAGE_METRICS.time('model_predict', len(block)):
+                predictions[start:start + block_rows] = bundle.model.predict(matrix)
+    if return_predictions:
+        return contributions[inverse], predictions[inverse]
+    return contributions[inverse]
+
+
+def explain_records(bundle, records, return_predictions=False):
+    """
+    Computes the feature contributions of a list of raw input rows.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to serve with.
+    - records (list): List of dictionaries with the input data.
+    - return_predictions (bool): Also return the predictions, see explain_columnar.
+
+    Returns:
+    - np.ndarray or tuple: See explain_columnar.
+    """
+    return explain_columnar(bundle, ColumnarTable.from_pandas(pd.DataFrame(records)),
+                            return_predictions=return_predictions)
+
+
+def format_explanations(feature_names, contributions, predictions):
+    """
+    Turns contribution rows into one explanation per row.
+
+    Parameters:
+    - feature_names (list): Model features, in the order of the contributions.
+    - contributions (iterable): Rows of explain_columnar, as arrays or lists.
+    - predictions (iterable): The model's prediction of each row, as /predict returns it (the
+      sum of the contributions can differ from it in the last digits).
+
+    Returns:
+    - list: Dicts with the 'prediction', the 'base_value' and the 'contributions' by feature.
+    """
+    explanations = []
+    for row, prediction in zip(contributions, predictions):
+        row = list(row)
+        explanations.append({
+            'prediction': float(prediction),
+            BASE_VALUE: row[-1],
+            'contributions': dict(zip(feature_names, row[:-1])),
+        })
+    return explanations
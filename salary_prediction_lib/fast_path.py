@@ -0,0 +1,114 @@
+import ctypes
+import threading
+
+import numpy as np
+
+from encoding import UNSEEN_CODE
+from instrumentation import STAGE_METRICS
+from serving import SERVING_FEATURE_ALIASES
+
+
+class SingleRowPredictor:
+    """
+    Dict-in/float-out prediction for one record, without pandas.
+
+    Runs the bundle's feature plan on the record (the same plan serving.predict_records runs
+    on tables), encodes it with plain dict lookups, then calls LightGBM's single-row
+    prediction API on a preallocated buffer.
+
+    Instances are safe to share between threads.
+    """
+
+    def __init__(self, bundle):
+        """
+        Parameters:
+        - bundle (ArtifactBundle): The artifacts to serve with.
+        """
+        self.bundle = bundle
+        self.feature_names = bundle.model.feature_name()
+        self._plan = bundle.plan
+        self._encoder_lookup = {col: bundle.encoder.lookup[col] for col in bundle.encoder.columns}
+
+        self._row = np.zeros(len(self.feature_names), dtype=np.float64)
+        self._result = np.zeros(1, dtype=np.float64)
+        self._lock = threading.Lock()
+        self._fast_config = self._init_fast_config()
+
+    def _init_fast_config(self):
+        """Prepares LightGBM's single-row fast prediction, or returns None if it is unavailable."""
+        if getattr(self.bundle.model, '_handle', None) is None:
+            # Not a LightGBM booster: a CompiledModel is evaluated with NumPy
+            return None
+        try:
+            from lightgbm.basic import _LIB, _C_API_DTYPE_FLOAT64, _C_API_PREDICT_NORMAL, _c_str, _safe_call
+        except ImportError:
+            return None
+
+        model = self.bundle.model
+        num_iteration = model.best_iteration if model.best_iteration > 0 else -1
+        fast_config = ctypes.c_void_p()
+        _safe_call(_LIB.LGBM_BoosterPredictForMatSingleRowFastInit(
+            model._handle,
+            ctypes.c_int(_C_API_PREDICT_NORMAL),
+            ctypes.c_int(0),
+            ctypes.c_int(num_iteration),
+            ctypes.c_int(_C_API_DTYPE_FLOAT64),
+            ctypes.c_int32(len(self.feature_names)),
+            _c_str(''),
+            ctypes.byref(fast_config),
+        ))
+        self._lib = _LIB
+        self._safe_call = _safe_call
+        self._out_len = ctypes.c_int64(0)
+        self._row_ptr = self._row.ctypes.data_as(ctypes.c_void_p)
+        self._result_ptr = self._result.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+        return fast_config
+
+    def features(self, record):
+        """
+        Computes the model features of one record.
+
+        Parameters:
+        - record (dict): Raw input row, with the keys of test_json.
+
+        Returns:
+        - dict: Feature values keyed by the names used in create_features.
+        """
+        values = self._plan.run_record(record, job_salary_density=self.bundle.job_density)
+        with STAGE_METRICS.time('encode', 1):
+            for column, lookup in self._encoder_lookup.items():
+                values[column] = lookup.get(values[column], UNSEEN_CODE)
+        return values
+
+    def predict_one(self, record):
+        """
+        Predicts the salary of one record.
+
+        Parameters:
+        - record (dict): Raw input row, with the keys of test_json.
+
+        Returns:
+        - float: The predicted salary.
+        """
+        values = self.features(record)
+        with self._lock, STAGE_METRICS.time('model_predict', 1):
+            row = self._row
+            for i, name in enumerate(self.feature_names):
+                row[i] = values[SERVING_FEATURE_ALIASES.get(name, name)]
+
+            if self._fast_config is None:
+                return float(self.bundle.model.predict(row.reshape(1, -1))[0])
+
+            self._safe_call(self._lib.LGBM_BoosterPredictForMatSingleRowFast(
+                self._fast_config, self._row_ptr, ctypes.byref(self._out_len), self._result_ptr,
+            ))
+            return float(self._result[0])
+
+    def close(self):
+        """Releases LightGBM's single-row prediction buffers."""
+        if getattr(self, '_fast_config', None) is not None:
+            self._safe_call(self._lib.LGBM_FastConfigFree(self._fast_config))
+            self._fast_config = None
+
+    def __del__(self):
+        self.close()
@@ -1,4 +1,59 @@
-import joblib
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import STAGE_METRICS
+
+# Yearly inflation rates by region; add new years to this file, not to the code
+DEFAULT_INFLATION_RATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'data', 'inflation_rates.csv')
+# Region whose rates apply to every residence without rates of its own
+GLOBAL_REGION = 'Global'
+
+def map_values(values, mapping):
+    """
+    Maps every value of a column, like Series.map; a categorical column is mapped once per
+    category and the results are spread over the rows through their codes.
+
+    Parameters:
+    - values (pd.Series): The column.
+    - mapping (callable, dict or pd.Series): Applied to each value.
+
+    Returns:
+    - pd.Series: The mapped values (never categorical), with the index of values.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.map(mapping)
+    per_category = pd.Series(values.cat.categories, dtype=object).map(mapping)
+    codes = values.cat.codes.to_numpy()
+    if (codes < 0).any():
+        # Missing rows become NaN: their code -1 picks the trailing slot
+        per_category = pd.concat([per_category, pd.Series([np.nan])], ignore_index=True)
+    return pd.Series(per_category.to_numpy()[codes], index=values.index, name=values.name)
+
+
+def equal_values(left, right):
+    """
+    Compares two columns row by row; missing values are never equal. Two categorical columns
+    are compared by code, after translating the codes of right to the categories of left.
+
+    Parameters:
+    - left, right (pd.Series): Columns of the same length.
+
+    Returns:
+    - pd.Series: Boolean result, with the index of left.
+    """
+    if isinstance(left.dtype, pd.CategoricalDtype) and isinstance(right.dtype, pd.CategoricalDtype):
+        left_codes = left.cat.codes.to_numpy()
+        positions = np.append(left.cat.categories.get_indexer(right.cat.categories), -1)
+        right_codes = positions[right.cat.codes.to_numpy()]
+        return pd.Series((left_codes == right_codes) & (left_codes >= 0), index=left.index)
+    if isinstance(left.dtype, pd.CategoricalDtype) or isinstance(right.dtype, pd.CategoricalDtype):
+        left, right = left.astype(object), right.astype(object)
+    return left == right
+
+
 # Map experience levels to approximate numeric values
 def map_experience_level(level):
     """
@@ -22,6 +77,7 @@ def map_experience_level(level):
         return None  # Handle unexpected values
 
 
+@STAGE_METRICS.timed('add_job_title_frequency')
 def add_job_title_frequency(dataset, job_column='job_title'):
     """
     Adds a column with the frequency of each job title.
@@ -33,10 +89,11 @@ def add_job_title_frequency(dataset, job_column='job_title'):
     Returns:
     - pd.DataFrame: The DataFrame with the new column 'job_title_frequency'.
     """
-    dataset['job_title_frequency'] = dataset[job_column].map(dataset[job_column].value_counts())
+    dataset['job_title_frequency'] = map_values(dataset[job_column], dataset[job_column].value_counts())
     return dataset
 
 
+@STAGE_METRICS.timed('add_local_employee_feature')
 def add_local_employee_feature(dataset, employee_location_col='employee_residence', company_location_col='company_location'):
     """
     Adds a column indicating if the employee is working locally in the company's country (1 for local, 0 for foreign).” Cambialo por “Adds a column indicating if the employee is employed by a company in his/her home country (compares employee_residence with comany_location, 1 for local, 0 for foreign).
@@ -54,32 +111,112 @@ def add_local_employee_feature(dataset, employee_location_col='employee_residenc
         raise ValueError(f"The columns '{employee_location_col}' and/or '{company_location_col}' do not exist in the dataset.")
     
     # Create the 'is_local_employee' column
-    dataset['is_local_employee'] = (dataset[employee_location_col] == dataset[company_location_col]).astype(int)
+    dataset['is_local_employee'] = equal_values(dataset[employee_location_col], dataset[company_location_col]).astype(int)
     
     return dataset
 
 
-def add_inflation_index(dataset, year_column='work_year', residence_column='employee_residence'):
+class InflationTable:
     """
-    Adds an inflation adjustment index based on the work year and country.
+    Year x region lookup table of inflation indexes (1 + inflation rate).
+
+    Attributes:
+    - years (pd.Index): Years with known rates.
+    - regions (pd.Index): Regions with their own rates; GLOBAL_REGION is always the last one.
+    - index (np.ndarray): Array of shape (len(regions), len(years) + 1). The extra last column
+      holds 1.0 for years without a known rate.
+    """
+
+    def __init__(self, rates):
+        """
+        Parameters:
+        - rates (pd.DataFrame): Columns 'year', 'region' and 'rate'.
+        """
+        if GLOBAL_REGION not in set(rates['region']):
+            raise ValueError(f"The inflation rates must include rates for the '{GLOBAL_REGION}' region.")
+        if rates.duplicated(['year', 'region']).any():
+            raise ValueError("The inflation rates contain more than one rate for the same year and region.")
+
+        years = np.sort(rates['year'].unique())
+        regions = [region for region in pd.unique(rates['region']) if region != GLOBAL_REGION] + [GLOBAL_REGION]
+        self.years = pd.Index(years)
+        self.regions = pd.Index(regions)
+
+        # Missing (year, region) pairs and unknown years keep a rate of 0
+        self.index = np.ones((len(regions), len(years) + 1))
+        self.index[self.regions.get_indexer(rates['region']), self.years.get_indexer(rates['year'])] += rates['rate'].to_numpy()
+
+        # Plain dict positions for looking up one row at a time
+        self._region_positions = {region: i for i, region in enumerate(regions)}
+        self._year_positions = {year: i for i, year in enumerate(years)}
+
+    def lookup(self, years, residences):
+        """
+        Looks up the inflation index of many rows at once.
+
+        Parameters:
+        - years (array-like): Work year of each row.
+        - residences (array-like): Employee residence of each row.
+
+        Returns:
+        - np.ndarray: The inflation index of each row.
+        """
+        # get_indexer returns -1 when there is no match, which selects the last row (GLOBAL_REGION)
+        # and the last column (no known rate)
+        return self.index[self.regions.get_indexer(residences), self.years.get_indexer(years)]
+
+    def lookup_one(self, year, residence):
+        """
+        Looks up the inflation index of a single row without building any array.
+
+        Parameters:
+        - year (int): Work year.
+        - residence (str): Employee residence.
+
+        Returns:
+        - float: The inflation index.
+        """
+        return float(self.index[self._region_positions.get(residence, -1), self._year_positions.get(year, -1)])
+
+
+@lru_cache(maxsize=8)
+def load_inflation_table(rates_path=DEFAULT_INFLATION_RATES_PATH):
     """
-    us_inflation_rates = {2019: 0.0181, 2020: 0.0123, 2021: 0.0470, 2022: 0.065, 2023: 0.034}
-    global_inflation_rates = {2019: 0.0219, 2020: 0.0192, 2021: 0.0350, 2022: 0.088, 2023: 0.070}
+    Loads the inflation rates file into an InflationTable. Tables are cached by path.
 
-    def calculate_index(year, residence):
-        """Calculate the inflation rate for a specific year and residence."""
-        if residence == "United States":
-            inflation_rate = us_inflation_rates.get(year, 0)
-        else:
-            inflation_rate = global_inflation_rates.get(year, 0)
-        return 1 + inflation_rate
+    Parameters:
+    - rates_path (str): CSV file with the columns 'year', 'region' and 'rate'.
 
-    dataset['inflation_index'] = dataset.apply(
-        lambda row: calculate_index(row[year_column], row[residence_column]), axis=1
-    )
+    Returns:
+    - InflationTable: The lookup table.
+    """
+    try:
+        rates = pd.read_csv(rates_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The file '{rates_path}' does not exist. It must contain the columns year, region and rate.")
+    return InflationTable(rates)
+
+
+@STAGE_METRICS.timed('add_inflation_index')
+def add_inflation_index(dataset, year_column='work_year', residence_column='employee_residence', rates_path=DEFAULT_INFLATION_RATES_PATH):
+    """
+    Adds an inflation adjustment index based on the work year and country.
+
+    Parameters:
+    - dataset (pd.DataFrame): The DataFrame containing the data.
+    - year_column (str): Name of the column with the work year.
+    - residence_column (str): Name of the column with the employee residence (full country name).
+    - rates_path (str): CSV file with the inflation rates by year and region.
+
+    Returns:
+    - pd.DataFrame: The DataFrame with the new column 'inflation_index'.
+    """
+    table = load_inflation_table(rates_path)
+    dataset['inflation_index'] = table.lookup(dataset[year_column], dataset[residence_column])
     return dataset
 
 
+@STAGE_METRICS.timed('add_salary_density')
 def add_salary_density(dataset, salary_column='salary_in_usd', experience_column='years_of_experience'):
     """
     Adds a column measuring salary density (z-score) grouped by years of experience.
@@ -126,7 +263,7 @@ def save_salary_density_by_job(dataset, job_column='job_title', density_column='
     import joblib
 
     # Calculate average salary density by job title
-    job_salary_density = dataset.groupby(job_column)[density_column].mean().to_dict()
+    job_salary_density = dataset.groupby(job_column, observed=True)[density_column].mean().to_dict()
 
     # Save the stats as a pickle file
     joblib.dump(job_salary_density, stats_path)
@@ -137,7 +274,8 @@ def save_salary_density_by_job(dataset, job_column='job_title', density_column='
 
 
 
-def map_job_density(dataset, job_column='job_title', stats_path='salary_density_by_job.pkl'):
+@STAGE_METRICS.timed('map_job_density')
+def map_job_density(dataset, job_column='job_title', stats_path='salary_density_by_job.pkl', job_salary_density=None):
     """
     Maps precomputed salary density stats to a dataset based on job titles.
 
@@ -145,15 +283,22 @@ def map_job_density(dataset, job_column='job_title', stats_path='salary_density_
     - dataset (pd.DataFrame): The dataset to process.
     - job_column (str): The column containing job titles.
     - stats_path (str): Path to the saved salary_density_by_job.pkl file.
+    - job_salary_density (Mapping or None): Already loaded stats. When given, stats_path is not read.
 
     Returns:
     - pd.DataFrame: The dataset with a new column 'avg_salary_density_by_job'.
     """
+    if job_salary_density is not None:
+        dataset['salary_density'] = map_values(dataset[job_column], job_salary_density).fillna(0)
+        return dataset
+
+    import joblib
+
     try:
         # Load precomputed salary density stats
         job_salary_density = joblib.load(stats_path)
         # Map the stats to the dataset
-        dataset['salary_density'] = dataset[job_column].map(job_salary_density).fillna(0)
+        dataset['salary_density'] = map_values(dataset[job_column], job_salary_density).fillna(0)
     except FileNotFoundError:
         raise FileNotFoundError(f"The file '{stats_path}' does not exist. Ensure the stats are generated and saved during training.")
     except Exception as e:
@@ -163,19 +308,21 @@ def map_job_density(dataset, job_column='job_title', stats_path='salary_density_
 
 
 
-def create_features(dataset, stats_path='salary_density_by_job.pkl'):
+@STAGE_METRICS.timed('create_features')
+def create_features(dataset, stats_path='salary_density_by_job.pkl', job_salary_density=None):
     """
     Applies all feature creation steps to the dataset.
 
     Parameters:
     - dataset (pd.DataFrame): The dataset to process.
     - stats_path (str): Path to the saved salary_density_by_job.pkl file.
+    - job_salary_density (Mapping or None): Already loaded density stats, used instead of stats_path.
 
     Returns:
     - pd.DataFrame: The dataset with all new features added.
     """
     # Map experience levels to numeric values
-    dataset['years_of_experience'] = dataset['experience_level'].map(map_experience_level)
+    dataset['years_of_experience'] = map_values(dataset['experience_level'], map_experience_level)
 
     # Add local employee feature
     dataset = add_local_employee_feature(dataset, employee_location_col='employee_residence', company_location_col='company_location')
@@ -184,7 +331,8 @@ def create_features(dataset, stats_path='salary_density_by_job.pkl'):
     dataset = add_inflation_index(dataset, year_column='work_year', residence_column='employee_residence')
 
     # Map salary density by job title
-    dataset = map_job_density(dataset, job_column='job_title', stats_path=stats_path)
+    dataset = map_job_density(dataset, job_column='job_title', stats_path=stats_path,
+                              job_salary_density=job_salary_density)
 
     return dataset
 
@@ -0,0 +1,91 @@
+import pandas as pd
+
+# Compact dtypes of the aijobs.net salaries export. Text columns are categoricals (one int8 or
+# int16 code per row, each distinct string stored once); remote_ratio only takes 0, 50 and 100
+# and becomes a label in replace_abbreviations, so it is a categorical too. salary is in the
+# local currency and can exceed the int32 range (e.g. in IDR or VND).
+SALARIES_DTYPES = {
+    'work_year': 'int16',
+    'experience_level': 'category',
+    'employment_type': 'category',
+    'job_title': 'category',
+    'salary': 'int64',
+    'salary_currency': 'category',
+    'salary_in_usd': 'int32',
+    'employee_residence': 'category',
+    'remote_ratio': 'category',
+    'company_location': 'category',
+    'company_size': 'category',
+}
+# Categorical columns whose categories are numbers; read_csv parses categories as strings
+NUMERIC_CATEGORIES = ['remote_ratio']
+
+
+def read_salaries(path, usecols=None, nrows=None, chunksize=None, dtypes=None):
+    """
+    Reads a salaries CSV export straight into compact dtypes, without a Python string per row.
+
+    Empty fields are the only missing values ('NA' is Namibia). Integer columns cannot hold
+    missing values; pass dtypes to override the type of a column, e.g. {'salary': 'float64'}.
+
+    Parameters:
+    - path (str or file-like): CSV file.
+    - usecols (list or None): Columns to read. Defaults to all of them.
+    - nrows (int or None): Rows to read.
+    - chunksize (int or None): Read the file in chunks of this many rows; each chunk has its
+      own categories.
+    - dtypes (dict or None): dtypes used instead of those of SALARIES_DTYPES.
+
+    Returns:
+    - pd.DataFrame, or an iterator of DataFrames when chunksize is given.
+    """
+    dtypes = dict(SALARIES_DTYPES, **(dtypes or {}))
+    if usecols is not None:
+        dtypes = {column: dtype for column, dtype in dtypes.items() if column in usecols}
+    data = pd.read_csv(path, usecols=usecols, nrows=nrows, chunksize=chunksize, dtype=dtypes,
+                       keep_default_na=False, na_values=[''])
+    if chunksize is not None:
+        return (_numeric_categories(chunk) for chunk in data)
+    return _numeric_categories(data)
+
+
+def _numeric_categories(dataset):
+    # Turns the categories of NUMERIC_CATEGORIES columns back into numbers, once per category
+    for column in NUMERIC_CATEGORIES:
+        if column in dataset.columns and isinstance(dataset[column].dtype, pd.CategoricalDtype):
+            categories = dataset[column].cat.categories
+            if categories.dtype == object:
+                dataset[column] = dataset[column].cat.rename_categories(pd.to_numeric(categories))
+    return dataset
+
+
+def compact_dtypes(dataset, dtypes=None):
+    """
+    Converts the salaries columns of an already loaded DataFrame to compact dtypes.
+
+    Parameters:
+    - dataset (pd.DataFrame): Rows with the columns of the export (others are left as they are).
+    - dtypes (dict or None): dtypes used instead of those of SALARIES_DTYPES.
+
+    Returns:
+    - pd.DataFrame: A new DataFrame.
+    """
+    dtypes = dict(SALARIES_DTYPES, **(dtypes or {}))
+    return dataset.astype({column: dtype for column, dtype in dtypes.items() if column in dataset.columns})
+
+
+def memory_report(datasets):
+    """
+    Bytes per row of every column, counting the Python strings of object columns.
+
+    Parameters:
+    - datasets (dict): Label mapped to a DataFrame, e.g. {'object': ..., 'compact': ...}.
+
+    Returns:
+    - pd.DataFrame: One row per column plus a 'total' row, one column of bytes per row per label.
+    """
+    report = {}
+    for label, dataset in datasets.items():
+        usage = dataset.memory_usage(deep=True, index=False) / max(1, len(dataset))
+        report[label] = pd.concat([usage, pd.Series({'total': usage.sum()})])
+    return pd.DataFrame(report)
@@ -0,0 +1,294 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from functools import wraps
+
+# Upper bounds of the latency histogram buckets, in seconds (+Inf is implicit)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+METRIC_PREFIX = 'salary'
+
+
+class _NullTimer:
+    # Returned by StageMetrics.time while disabled: entering and leaving it does nothing
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 'rows', 'start')
+
+    def __init__(self, metrics, stage, rows):
+        self.metrics = metrics
+        self.stage = stage
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+class StageMetrics:
+    """
+    Latency histograms and row counters of the pipeline stages, exported in the Prometheus
+    text format.
+
+    Each stage (a preprocessing function, a feature plan step, encoding, the model call...)
+    has a histogram of its durations and a counter of the rows it processed, so a scraper
+    derives latency percentiles and rows per second with histogram_quantile() and rate().
+    Request outcomes are counted by endpoint and status code.
+
+    While disabled, time() returns a shared no-op context manager and timed() functions call
+    straight through, so the hooks cost one attribute check. Updates are thread safe.
+
+    Parameters:
+    - enabled (bool): Whether stages are recorded.
+    - buckets (tuple): Upper bounds of the histogram buckets, in seconds.
+    """
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # stage -> [bucket counts (one more for +Inf), sum of seconds, observations, rows]
+        self._stages = {}
+        self._requests = Counter()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._requests.clear()
+
+    def observe(self, stage, seconds, rows=None):
+        """
+        Records one run of a stage.
+
+        Parameters:
+        - stage (str): Stage name.
+        - seconds (float): Time the run took.
+        - rows (int or None): Rows it processed, if it is a row-wise stage.
+        """
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0]
+            entry[0][bisect_left(self.buckets, seconds)] += 1
+            entry[1] += seconds
+            entry[2] += 1
+            if rows:
+                entry[3] += rows
+
+    def time(self, stage, rows=None):
+        """
+        Returns a context manager timing the code it wraps as one run of a stage.
+
+        Parameters:
+        - stage (str): Stage name.
+        - rows (int or None): Rows processed by the wrapped code.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage, rows)
+
+    def timed(self, stage):
+        """
+        Decorator timing every call of a function as a run of a stage. The rows are the
+        length of the first argument (a DataFrame or a table), when it has one.
+
+        Parameters:
+        - stage (str): Stage name.
+        """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                rows = len(args[0]) if args and hasattr(args[0], '__len__') else None
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start, rows)
+            return wrapper
+        return decorator
+
+    def count_request(self, endpoint, status):
+        """
+        Counts one request by endpoint and response status code.
+        """
+        if self.enabled:
+            with self._lock:
+                self._requests[endpoint, int(status)] += 1
+
+    def snapshot(self):
+        """
+        Returns the totals of every stage.
+
+        Returns:
+        - dict: Stage mapped to its calls, total and mean seconds, rows and rows per second
+          of stage time.
+        """
+        with self._lock:
+            stages = {stage: (entry[1], entry[2], entry[3]) for stage, entry in self._stages.items()}
+        return {
+            stage: {
+                'calls': calls,
+                'seconds': seconds,
+                'mean_seconds': seconds / calls if calls else 0.0,
+                'rows': rows,
+                'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+            }
+            for stage, (seconds, calls, rows) in sorted(stages.items())
+        }
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            stages = {stage: (list(entry[0]), entry[1], entry[2], entry[3]) for stage, entry in self._stages.items()}
+            requests = dict(self._requests)
+
+        name = f'{METRIC_PREFIX}_stage_duration_seconds'
+        lines = [f'# HELP {name} Time spent in each pipeline stage.', f'# TYPE {name} histogram']
+        for stage, (counts, seconds, calls, _) in sorted(stages.items()):
+            label = _label_value(stage)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{label}",le="{bound!r}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {calls}')
+            lines.append(f'{name}_sum{{stage="{label}"}} {seconds!r}')
+            lines.append(f'{name}_count{{stage="{label}"}} {calls}')
+
+        name = f'{METRIC_PREFIX}_stage_rows_total'
+        lines += [f'# HELP {name} Rows processed by each pipeline stage.', f'# TYPE {name} counter']
+        for stage, (_, _, _, rows) in sorted(stages.items()):
+            lines.append(f'{name}{{stage="{_label_value(stage)}"}} {rows}')
+
+        name = f'{METRIC_PREFIX}_requests_total'
+        lines += [f'# HELP {name} Requests by endpoint and response status code.', f'# TYPE {name} counter']
+        for (endpoint, status), count in sorted(requests.items()):
+            lines.append(f'{name}{{endpoint="{_label_value(endpoint)}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label_value(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+# Stage metrics of this process, recorded by the preprocessing, feature and serving hooks.
+# Disabled unless SALARY_METRICS=1; the API enables it at startup (see app.py).
+STAGE_METRICS = StageMetrics(enabled=os.environ.get('SALARY_METRICS', '0') == '1')
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the Python stacks of every thread at a fixed interval.
+
+    A background thread reads sys._current_frames(), so the profiled code runs unchanged and
+    the cost is paid only while the profiler runs. Stacks are counted in the folded format
+    ('outer;inner;leaf count', one per line) read by flame graph tools.
+
+    Parameters:
+    - interval (float): Seconds between samples.
+    - max_depth (int): Innermost frames kept per stack.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts sampling, if the profiler is not running yet. Earlier samples are kept.
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, frame in frames.items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                stacks.append(';'.join(reversed(stack)))
+            del frames
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def folded(self):
+        """
+        Returns the sampled stacks in the folded format, most frequent first.
+        """
+        with self._lock:
+            return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+    def top(self, n=20):
+        """
+        Returns the functions most often on top of a stack.
+
+        Parameters:
+        - n (int): Functions returned.
+
+        Returns:
+        - list: (function, share of the samples) pairs.
+        """
+        with self._lock:
+            leaves = Counter()
+            for stack, count in self._stacks.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            total = sum(leaves.values())
+        return [(function, count / total) for function, count in leaves.most_common(n)]
@@ -1,10 +1,130 @@
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+METRIC_NAMES = ("RMSE", "MAE", "R^2", "MAPE (%)", "SMAPE (%)")
+
+# Per-row terms summed by MetricsAccumulator and bootstrap_metrics, in _row_terms order
+_TERMS = ("squared_error", "abs_error", "ape", "sape")
+
+# Row terms loaded once per worker process by _init_bootstrap_worker
+_worker_terms = None
+
+
+def _row_terms(y_true, y_pred):
+    # Squared error, absolute error, absolute percentage error and symmetric absolute percentage
+    # error of every row, from one residual
+    error = y_true - y_pred
+    abs_error = np.abs(error)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ape = abs_error / np.abs(y_true)
+        sape = 2 * abs_error / (np.abs(y_true) + np.abs(y_pred))
+    return error * error, abs_error, ape, sape
+
+
+def _metrics_from_sums(n, sums, sum_squares_total):
+    # Metrics of a set of rows from the sums of its row terms and its total sum of squares;
+    # works element-wise on arrays of sums
+    squared_error, abs_error, ape, sape = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(sum_squares_total > 0, 1 - squared_error / sum_squares_total,
+                      # Constant targets: 1 for a perfect fit, else 0 (as scikit-learn's r2_score)
+                      np.where(squared_error == 0, 1.0, 0.0))
+        return {
+            "RMSE": np.sqrt(squared_error / n),
+            "MAE": abs_error / n,
+            "R^2": r2,
+            "MAPE (%)": ape / n * 100,
+            "SMAPE (%)": sape / n * 100,
+        }
+
+
+class MetricsAccumulator:
+    """
+    Streaming regression metrics: RMSE, MAE, R^2, MAPE and SMAPE of rows seen in chunks.
+
+    Each chunk is reduced to a few sums (squared, absolute and percentage errors) and the
+    count, mean and M2 of its targets, so the rows never need to be in memory together.
+    Accumulators of disjoint rows merge exactly (M2 with the parallel form of Welford's
+    update, as in density_stats), e.g. one per fold, file or worker.
+
+    Attributes:
+    - n (int): Rows seen.
+    - sums (np.ndarray): Sums of the squared error, absolute error, absolute percentage error
+      and symmetric absolute percentage error.
+    - mean_true (float): Mean of the targets.
+    - m2_true (float): Sum of squared deviations of the targets from their mean.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sums = np.zeros(len(_TERMS))
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+
+    def update(self, y_true, y_pred):
+        """
+        Adds a chunk of rows.
+
+        Parameters:
+        - y_true (array-like): True target values.
+        - y_pred (array-like): Predicted target values.
+
+        Returns:
+        - MetricsAccumulator: The accumulator itself.
+        """
+        y_true = np.asarray(y_true, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"y_true and y_pred have different shapes: {y_true.shape} != {y_pred.shape}.")
+        if not len(y_true):
+            return self
+        chunk = MetricsAccumulator()
+        chunk.n = len(y_true)
+        chunk.sums = np.array([terms.sum() for terms in _row_terms(y_true, y_pred)])
+        chunk.mean_true = float(y_true.mean())
+        deviation = y_true - chunk.mean_true
+        chunk.m2_true = float(deviation @ deviation)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Adds the rows summarized by another accumulator.
+
+        Parameters:
+        - other (MetricsAccumulator): Accumulator of other rows.
+
+        Returns:
+        - MetricsAccumulator: The accumulator itself.
+        """
+        if not other.n:
+            return self
+        n = self.n + other.n
+        delta = other.mean_true - self.mean_true
+        self.m2_true += other.m2_true + delta * delta * self.n * other.n / n
+        self.mean_true += delta * other.n / n
+        self.sums = self.sums + other.sums
+        self.n = n
+        return self
+
+    def result(self):
+        """
+        Returns the metrics of every row added so far.
+
+        Returns:
+        - dict: RMSE, MAE, R^2, MAPE (%) and SMAPE (%); NaN before any row is added.
+        """
+        if not self.n:
+            return {name: float('nan') for name in METRIC_NAMES}
+        return {name: float(value) for name, value in _metrics_from_sums(self.n, self.sums, self.m2_true).items()}
+
+
 def calculate_regression_metrics(y_true, y_pred):
     """
     Calculates common regression metrics: RMSE, MAE, R^2, MAPE, SMAPE.
 
+    Every metric comes from one residual vector computed once, without scikit-learn.
+
     Parameters:
     - y_true (array-like): True target values.
     - y_pred (array-like): Predicted target values.
@@ -12,25 +132,80 @@ def calculate_regression_metrics(y_true, y_pred):
     Returns:
     - dict: A dictionary containing the calculated metrics.
     """
-    # RMSE
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+    return MetricsAccumulator().update(y_true, y_pred).result()
+
+
+def _bootstrap_terms(y_true, y_pred):
+    # Row terms plus the centered target and its square, whose weighted sums give each
+    # resample's total sum of squares
+    centered = y_true - y_true.mean()
+    return np.column_stack(_row_terms(y_true, y_pred) + (centered, centered * centered))
+
+
+def _bootstrap_chunk(terms, seed_sequence, n_resamples):
+    # Metrics of n_resamples resamples: each resample is a vector of row counts, and one matrix
+    # product sums the terms of all of them
+    n = len(terms)
+    rng = np.random.default_rng(seed_sequence)
+    draws = rng.integers(0, n, size=(n_resamples, n)) + np.arange(n_resamples)[:, None] * n
+    weights = np.bincount(draws.ravel(), minlength=n_resamples * n).reshape(n_resamples, n).astype(np.float64)
+    finite = np.isfinite(terms)
+    sums = weights @ np.where(finite, terms, 0.0)
+    # A resample drawing a row whose percentage error is undefined (a zero target) gets an
+    # undefined metric, like the estimate on all the rows
+    term_sums = np.where(weights @ ~finite[:, :len(_TERMS)] > 0, np.nan, sums[:, :len(_TERMS)])
+    centered_sum, centered_squares = sums[:, len(_TERMS)], sums[:, len(_TERMS) + 1]
+    sum_squares_total = np.maximum(centered_squares - centered_sum * centered_sum / n, 0.0)
+    metrics = _metrics_from_sums(n, term_sums.T, sum_squares_total)
+    return np.column_stack([metrics[name] for name in METRIC_NAMES])
+
+
+def _init_bootstrap_worker(terms):
+    global _worker_terms
+    _worker_terms = terms
+
+
+def _worker_bootstrap_chunk(seed_sequence, n_resamples):
+    return _bootstrap_chunk(_worker_terms, seed_sequence, n_resamples)
+
+
+def bootstrap_metrics(y_true, y_pred, n_resamples=1000, confidence=0.95, seed=42, n_workers=1, chunk_size=50):
+    """
+    Percentile bootstrap confidence intervals of the regression metrics.
 
-    # MAE
-    mae = mean_absolute_error(y_true, y_pred)
+    Resamples are drawn in chunks of chunk_size, each from its own seed derived from seed, so
+    the intervals do not depend on n_workers. With n_workers > 1 the chunks are computed in
+    worker processes, which receive the per-row error terms once.
 
-    # R^2 Score
-    r2 = r2_score(y_true, y_pred)
+    Parameters:
+    - y_true (array-like): True target values, e.g. all the out-of-fold targets.
+    - y_pred (array-like): Predicted target values.
+    - n_resamples (int): Bootstrap resamples.
+    - confidence (float): Coverage of the intervals.
+    - seed (int): Random seed.
+    - n_workers (int): Worker processes; 1 computes every chunk in this process.
+    - chunk_size (int): Resamples per chunk; a chunk holds chunk_size x rows float64 weights.
 
-    # MAPE
-    mape = np.mean(np.abs((y_true - y_pred) / y_true)) * 100
+    Returns:
+    - dict: Metric mapped to its estimate on all the rows, and the lower and upper bounds of
+      its interval.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    estimate = calculate_regression_metrics(y_true, y_pred)
+    terms = _bootstrap_terms(y_true, y_pred)
+    sizes = [min(chunk_size, n_resamples - start) for start in range(0, n_resamples, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
 
-    # SMAPE
-    smape = np.mean(2 * np.abs(y_true - y_pred) / (np.abs(y_true) + np.abs(y_pred))) * 100
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_bootstrap_worker,
+                                 initargs=(terms,)) as executor:
+            chunks = list(executor.map(_worker_bootstrap_chunk, seeds, sizes))
+    else:
+        chunks = [_bootstrap_chunk(terms, seed_sequence, size) for seed_sequence, size in zip(seeds, sizes)]
+    samples = np.vstack(chunks)
 
-    return {
-        "RMSE": rmse,
-        "MAE": mae,
-        "R^2": r2,
-        "MAPE (%)": mape,
-        "SMAPE (%)": smape
-    }
+    alpha = (1 - confidence) / 2
+    lower, upper = np.percentile(samples, [alpha * 100, (1 - alpha) * 100], axis=0)
+    return {name: {'estimate': estimate[name], 'lower': float(lower[i]), 'upper': float(upper[i])}
+            for i, name in enumerate(METRIC_NAMES)}
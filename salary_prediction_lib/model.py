@@ -1,8 +1,20 @@
-import lightgbm as lgb
-from sklearn.metrics import mean_squared_error
 import numpy as np
 
-def train_and_predict_lgb(X_train, y_train, X_test, y_test, params=None, num_boost_round=100):
+# Base parameters of the library's LightGBM models
+DEFAULT_PARAMS = {
+    'objective': 'regression',
+    'metric': 'rmse',
+    'boosting_type': 'gbdt',
+    'learning_rate': 0.1,
+    'num_leaves': 31,
+    'max_depth': -1,
+    'feature_fraction': 0.9,
+    'bagging_fraction': 0.8,
+    'bagging_freq': 5,
+    'seed': 42
+}
+
+def train_and_predict_lgb(X_train, y_train, X_test, y_test, params=None, num_boost_round=100, dataset_cache=None):
     """
     Trains a LightGBM model and makes predictions on test data.
 
@@ -13,28 +25,23 @@ def train_and_predict_lgb(X_train, y_train, X_test, y_test, params=None, num_boo
     - y_test (pd.Series or np.array): Test target.
     - params (dict): Dictionary of LightGBM hyperparameters.
     - num_boost_round (int): Number of boosting iterations.
+    - dataset_cache (DatasetCache or None): Cache to reuse the binned datasets of earlier runs.
 
     Returns:
     - model (lgb.Booster): Trained LightGBM model.
     - y_pred (np.array): Predictions on the test set.
     - rmse (float): Root Mean Squared Error of the predictions.
     """
+    import lightgbm as lgb
+
+    params = dict(DEFAULT_PARAMS)
+
     # Create LightGBM datasets
-    train_data = lgb.Dataset(X_train, label=y_train)
-    test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
-    
-    params = {
-    'objective': 'regression', 
-    'metric': 'rmse',         
-    'boosting_type': 'gbdt',   
-    'learning_rate': 0.1,
-    'num_leaves': 31,
-    'max_depth': -1,
-    'feature_fraction': 0.9,
-    'bagging_fraction': 0.8,
-    'bagging_freq': 5,
-    'seed': 42
-}
+    if dataset_cache is None:
+        train_data = lgb.Dataset(X_train, label=y_train)
+        test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+    else:
+        train_data, test_data = dataset_cache.train_valid(X_train, y_train, X_test, y_test, params)
 
     # Train the model
     model = lgb.train(
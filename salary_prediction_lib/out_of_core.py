@@ -0,0 +1,310 @@
+"""
+Out-of-core training: builds the notebook's training data from a CSV export of any size and
+trains LightGBM on it without loading the file into memory.
+
+1. A first streaming pass collects the global statistics: the salary quantiles of the outlier
+   filter (QuantileSketch) and the salary statistics by years of experience (SalaryDensityStore).
+2. A second pass engineers the features of each chunk with the feature plan, drops the outliers,
+   adds salary_density_by_experience from the global statistics and writes the model matrix to
+   .npy shards, split into train and validation rows.
+3. lgb.Dataset reads the shards through memory-mapped ShardSequence objects, batch by batch.
+
+Chunk sizes are derived from memory_budget_mb, so the memory used by the passes does not grow
+with the file. LightGBM's own state is not part of the budget: its binned copy of the data
+(about one byte per feature and row) plus the labels, gradients and scores it keeps while
+training, about 60 bytes per row in total.
+"""
+import json
+import os
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from density_stats import SalaryDensityStore
+from encoding import CATEGORICAL_COLUMNS, CategoricalEncoders
+from model import DEFAULT_PARAMS
+from pre_processing import remove_outliers_iqr
+from quantile_sketch import QuantileSketch
+from transforms import compile_plan
+
+# Steps run on every chunk; the train-only features need global statistics and are computed here
+SHARD_STEPS = [
+    'employee_residence_name', 'company_location_name',
+    'experience_level_description', 'employment_type_description', 'company_size_description',
+    'remote_ratio_description',
+    'years_of_experience', 'is_local_employee', 'inflation_index',
+]
+
+# Model input, in the order the notebook trains on
+FEATURE_COLUMNS = ['work_year', 'experience_level', 'employment_type', 'job_title', 'employee_residence',
+                   'remote_ratio', 'company_location', 'company_size', 'years_of_experience',
+                   'is_local_employee', 'inflation_index', 'salary_density_by_experience']
+LABEL_COLUMN = 'salary_in_usd'
+
+DEFAULT_MEMORY_BUDGET_MB = 512
+
+# Memory of a chunk while it is transformed, relative to its size as a raw DataFrame
+_CHUNK_EXPANSION = 6
+_SAMPLE_ROWS = 1000
+_SHARDS_MANIFEST = 'shards.json'
+
+
+def chunk_rows(path, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, usecols=None):
+    """
+    Estimates how many rows of a CSV file can be transformed at once within a memory budget.
+
+    Parameters:
+    - path (str): CSV file.
+    - memory_budget_mb (float): Memory allowed for one chunk, in MB.
+    - usecols (list or None): Columns that will be read.
+
+    Returns:
+    - int: Rows per chunk.
+    """
+    sample = pd.read_csv(path, usecols=usecols, nrows=_SAMPLE_ROWS)
+    row_bytes = max(1.0, sample.memory_usage(deep=True, index=False).sum() / max(1, len(sample)))
+    return max(_SAMPLE_ROWS, int(memory_budget_mb * 2 ** 20 / (row_bytes * _CHUNK_EXPANSION)))
+
+
+class ShardSequence(lgb.Sequence):
+    """
+    Rows of one .npy shard, memory-mapped, for building an lgb.Dataset without loading them.
+
+    Categorical columns are written with provisional codes (order of first appearance) and
+    mapped to the encoder's codes as rows are read.
+
+    Parameters:
+    - path (str): Shard written by prepare_shards.
+    - remaps (dict): Column position mapped to an array from provisional to final codes.
+    - batch_size (int): Rows handed to LightGBM at a time.
+    """
+
+    def __init__(self, path, remaps, batch_size=lgb.Sequence.batch_size):
+        self.path = path
+        self.remaps = remaps
+        self.batch_size = batch_size
+        self._matrix = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return self._matrix.shape[0]
+
+    def __getitem__(self, idx):
+        rows = np.array(self._matrix[idx], dtype=np.float64)
+        for position, remap in self.remaps.items():
+            rows[..., position] = remap[rows[..., position].astype(np.int64)]
+        return rows
+
+
+class ShardSet:
+    """
+    Train and validation shards written by prepare_shards, with what is needed to serve the model.
+
+    Attributes:
+    - shard_dir (str): Folder holding the shards.
+    - train_shards, valid_shards (list): Shard file names.
+    - classes (dict): Categorical column mapped to its categories, in order of provisional code.
+    - encoders (CategoricalEncoders): Encoders fitted on the kept rows.
+    - store (SalaryDensityStore): Salary statistics; store.job_density(encoders) gives salary_density_by_job.pkl.
+    - salary_bounds (tuple): Salaries kept by the outlier filter.
+    - rows (int): Rows read from the CSV file.
+    """
+
+    def __init__(self, shard_dir, train_shards, valid_shards, classes, store, rows):
+        self.shard_dir = shard_dir
+        self.train_shards = train_shards
+        self.valid_shards = valid_shards
+        self.classes = {column: np.asarray(values, dtype=object) for column, values in classes.items()}
+        self.encoders = CategoricalEncoders({column: np.sort(values) for column, values in self.classes.items()})
+        self.store = store
+        self.salary_bounds = store.salary_bounds
+        self.rows = rows
+
+    def remaps(self):
+        return {FEATURE_COLUMNS.index(column): self.encoders.transform_column(column, values).astype(np.float64)
+                for column, values in self.classes.items()}
+
+    def sequences(self, split='train', batch_size=lgb.Sequence.batch_size):
+        """
+        Returns one ShardSequence per shard of a split.
+
+        Parameters:
+        - split (str): 'train' or 'valid'.
+        - batch_size (int): Rows handed to LightGBM at a time.
+
+        Returns:
+        - list: ShardSequence objects.
+        """
+        shards = self.train_shards if split == 'train' else self.valid_shards
+        remaps = self.remaps()
+        return [ShardSequence(os.path.join(self.shard_dir, name), remaps, batch_size) for name in shards]
+
+    def labels(self, split='train'):
+        """
+        Returns the labels of a split as float32, the type LightGBM stores them in.
+        """
+        shards = self.train_shards if split == 'train' else self.valid_shards
+        parts = [np.load(os.path.join(self.shard_dir, _label_name(name)), mmap_mode='r') for name in shards]
+        labels = np.empty(sum(len(part) for part in parts), dtype=np.float32)
+        start = 0
+        for part in parts:
+            labels[start:start + len(part)] = part
+            start += len(part)
+        return labels
+
+    def save(self):
+        """
+        Writes the shard list and statistics next to the shards, so load can reuse them.
+        """
+        self.store.save(os.path.join(self.shard_dir, 'salary_density_store.pkl'))
+        manifest = {'train': self.train_shards, 'valid': self.valid_shards, 'rows': self.rows,
+                    'classes': {column: values.tolist() for column, values in self.classes.items()}}
+        with open(os.path.join(self.shard_dir, _SHARDS_MANIFEST), 'w') as file:
+            json.dump(manifest, file, indent=2)
+
+    @classmethod
+    def load(cls, shard_dir):
+        """
+        Loads shards written by an earlier prepare_shards call.
+
+        Parameters:
+        - shard_dir (str): Folder holding the shards.
+
+        Returns:
+        - ShardSet: The shards.
+        """
+        with open(os.path.join(shard_dir, _SHARDS_MANIFEST)) as file:
+            manifest = json.load(file)
+        store = SalaryDensityStore.load(os.path.join(shard_dir, 'salary_density_store.pkl'))
+        return cls(shard_dir, manifest['train'], manifest['valid'], manifest['classes'], store, manifest['rows'])
+
+
+def _label_name(shard_name):
+    return shard_name.replace('.npy', '.label.npy')
+
+
+def _provisional_codes(categories, column, values):
+    # Categories get codes in order of first appearance, so earlier shards never change
+    known = categories[column]
+    new = pd.Index(pd.unique(values)).difference(known, sort=False)
+    if len(new):
+        known = categories[column] = known.append(new)
+    return known.get_indexer(values)
+
+
+def prepare_shards(path, shard_dir, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, test_size=0.2, seed=42,
+                   multiplier=1.5, sketch_capacity=100_000):
+    """
+    Writes the encoded training data of a raw aijobs.net export as train and validation shards.
+
+    Parameters:
+    - path (str): CSV file with the original columns.
+    - shard_dir (str): Folder for the shards; created if needed.
+    - memory_budget_mb (float): Memory allowed for the chunk being transformed, in MB.
+    - test_size (float): Fraction of the rows written to the validation shards.
+    - seed (int): Random seed of the split.
+    - multiplier (float): The IQR multiplier of the outlier filter.
+    - sketch_capacity (int): Distinct salaries kept exactly by the quantile sketch.
+
+    Returns:
+    - ShardSet: The written shards.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    plan = compile_plan(SHARD_STEPS)
+    experience_plan = compile_plan(['experience_level_description', 'years_of_experience'])
+
+    # First pass: salary quantiles and salary statistics by years of experience
+    first_pass_columns = [LABEL_COLUMN, 'experience_level']
+    sketch = QuantileSketch(sketch_capacity)
+    store = SalaryDensityStore()
+    rows = 0
+    for chunk in pd.read_csv(path, usecols=first_pass_columns,
+                             chunksize=chunk_rows(path, memory_budget_mb, first_pass_columns)):
+        sketch.update(chunk[LABEL_COLUMN])
+        store.update_experience(experience_plan.run_frame(chunk))
+        rows += len(chunk)
+    store.salary_bounds = sketch.iqr_bounds(multiplier)
+    store.rows = rows
+
+    # Second pass: features of the kept rows, written as shards
+    rng = np.random.default_rng(seed)
+    categories = {column: pd.Index([], dtype=object) for column in CATEGORICAL_COLUMNS}
+    shards = {'train': [], 'valid': []}
+    for number, chunk in enumerate(pd.read_csv(path, chunksize=chunk_rows(path, memory_budget_mb))):
+        chunk = remove_outliers_iqr(chunk, column=LABEL_COLUMN, bounds={LABEL_COLUMN: store.salary_bounds})
+        data = plan.run_frame(chunk, training=True)
+        data['salary_density_by_experience'] = store.salary_density(data).to_numpy()
+        store.update_jobs(data)
+
+        matrix = np.empty((len(data), len(FEATURE_COLUMNS)), dtype=np.float64)
+        for i, column in enumerate(FEATURE_COLUMNS):
+            if column in categories:
+                matrix[:, i] = _provisional_codes(categories, column, data[column])
+            else:
+                matrix[:, i] = data[column].to_numpy(dtype=np.float64)
+        labels = data[LABEL_COLUMN].to_numpy(dtype=np.float64)
+
+        valid = rng.random(len(data)) < test_size
+        for split, rows_in_split in (('train', ~valid), ('valid', valid)):
+            name = f'{split}-{number:05d}.npy'
+            np.save(os.path.join(shard_dir, name), matrix[rows_in_split])
+            np.save(os.path.join(shard_dir, _label_name(name)), labels[rows_in_split])
+            shards[split].append(name)
+
+    shard_set = ShardSet(shard_dir, shards['train'], shards['valid'],
+                         {column: index.to_numpy() for column, index in categories.items()}, store, rows)
+    shard_set.save()
+    return shard_set
+
+
+def build_datasets(shard_set, params=None, batch_size=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """
+    Builds the train and validation lgb.Dataset from shards, reading them batch by batch.
+
+    Parameters:
+    - shard_set (ShardSet): Shards written by prepare_shards.
+    - params (dict or None): Training parameters (the binning ones apply).
+    - batch_size (int or None): Rows handed to LightGBM at a time; derived from the budget by default.
+    - memory_budget_mb (float): Memory allowed for one batch, in MB.
+
+    Returns:
+    - tuple: (train lgb.Dataset, valid lgb.Dataset).
+    """
+    batch_size = batch_size or max(1024, int(memory_budget_mb * 2 ** 20 / (len(FEATURE_COLUMNS) * 8 * 2)))
+    params = dict(params or DEFAULT_PARAMS, verbosity=-1)
+    train_set = lgb.Dataset(shard_set.sequences('train', batch_size), label=shard_set.labels('train'),
+                            feature_name=FEATURE_COLUMNS, params=params, free_raw_data=True).construct()
+    valid_set = lgb.Dataset(shard_set.sequences('valid', batch_size), label=shard_set.labels('valid'),
+                            reference=train_set, params=params, free_raw_data=True).construct()
+    return train_set, valid_set
+
+
+def train_out_of_core(path, shard_dir, params=None, num_boost_round=100, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                      test_size=0.2, seed=42, reuse_shards=False):
+    """
+    Trains LightGBM on a CSV export that does not fit in memory.
+
+    Parameters:
+    - path (str): CSV file with the original columns.
+    - shard_dir (str): Folder for the shards.
+    - params (dict or None): LightGBM parameters; defaults to those of train_and_predict_lgb.
+    - num_boost_round (int): Number of boosting iterations.
+    - memory_budget_mb (float): Memory allowed for the data being transformed or read, in MB.
+    - test_size (float): Fraction of the rows held out for validation.
+    - seed (int): Random seed of the split.
+    - reuse_shards (bool): Train on the shards already in shard_dir instead of writing them again.
+
+    Returns:
+    - model (lgb.Booster): Trained LightGBM model.
+    - rmse (float): Root Mean Squared Error on the validation rows.
+    - shard_set (ShardSet): Shards, encoders and salary statistics of the training data.
+    """
+    params = dict(params or DEFAULT_PARAMS)
+    if reuse_shards and os.path.exists(os.path.join(shard_dir, _SHARDS_MANIFEST)):
+        shard_set = ShardSet.load(shard_dir)
+    else:
+        shard_set = prepare_shards(path, shard_dir, memory_budget_mb, test_size, seed)
+    train_set, valid_set = build_datasets(shard_set, params, memory_budget_mb=memory_budget_mb)
+    model = lgb.train(params, train_set, valid_sets=[valid_set], valid_names=['valid'],
+                      num_boost_round=num_boost_round)
+    return model, float(model.best_score['valid']['rmse']), shard_set
@@ -1,5 +1,127 @@
-import country_converter as coco
+import os
+import re
+from functools import lru_cache, partial
 
+import numpy as np
+import pandas as pd
+
+from instrumentation import STAGE_METRICS
+
+# ISO2 code -> country name table, precomputed from country_converter with build_country_names
+DEFAULT_COUNTRY_NAMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'data', 'country_names.csv')
+
+
+def build_country_names(path=DEFAULT_COUNTRY_NAMES_PATH):
+    """
+    Regenerates the ISO2 code -> country name table from country_converter.
+
+    Run it again after upgrading country_converter so the table matches coco.convert.
+
+    Parameters:
+    - path (str): Where to write the table (CSV with the columns 'code' and 'name').
+
+    Returns:
+    - pd.DataFrame: The table that was written.
+    """
+    import country_converter as coco
+
+    countries = coco.CountryConverter().data[['ISO2', 'name_short']].dropna()
+    rows = []
+    for iso2, name in countries.itertuples(index=False):
+        # A few entries are regexes listing aliases, e.g. '^GB$|^UK$'
+        for code in re.findall(r'[A-Z]{2}', iso2):
+            rows.append((code, name))
+    table = pd.DataFrame(rows, columns=['code', 'name']).drop_duplicates('code')
+    table.to_csv(path, index=False)
+    return table
+
+
+@lru_cache(maxsize=4)
+def load_country_names(path=DEFAULT_COUNTRY_NAMES_PATH):
+    """
+    Loads the ISO2 code -> country name table. Tables are cached by path.
+
+    Parameters:
+    - path (str): CSV file with the columns 'code' and 'name'.
+
+    Returns:
+    - dict: Country names keyed by ISO2 code.
+    """
+    # keep_default_na=False: 'NA' is Namibia, not a missing value
+    table = pd.read_csv(path, keep_default_na=False)
+    return dict(zip(table['code'], table['name']))
+
+
+@lru_cache(maxsize=1024)
+def convert_country_code(code, names_path=DEFAULT_COUNTRY_NAMES_PATH):
+    """
+    Converts one country code to its full name, memoized in a bounded LRU cache.
+
+    Codes missing from the precomputed table fall back to country_converter, which
+    is only imported when that happens.
+
+    Parameters:
+    - code (str): Country code.
+    - names_path (str): Path of the precomputed ISO2 code -> name table.
+
+    Returns:
+    - str: The country name ('not found' if country_converter does not know it either), or
+      NaN for a missing code, as in convert_country_column.
+    """
+    if code is None or code != code:
+        return np.nan
+    name = load_country_names(names_path).get(code)
+    if name is None:
+        import country_converter as coco
+        name = coco.convert(names=code, to="name")
+    return name
+
+
+def map_categories(values, mapping):
+    """
+    Maps each category of a categorical column once; the rows keep their codes.
+
+    Categories mapped to the same value are merged, and categories mapped to a missing value
+    become missing rows.
+
+    Parameters:
+    - values (pd.Series): Categorical column.
+    - mapping (callable or dict): Applied to each category. Categories missing from a dict
+      are kept, like Series.replace.
+
+    Returns:
+    - pd.Series: Categorical column of the mapped values, with the index of values.
+    """
+    if isinstance(mapping, dict):
+        mapped = [mapping.get(category, category) for category in values.cat.categories]
+    else:
+        mapped = [mapping(category) for category in values.cat.categories]
+    category_codes, categories = pd.factorize(np.asarray(mapped, dtype=object))
+    # Missing rows have code -1, which picks the trailing -1
+    codes = np.append(category_codes, -1)[values.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=values.index, name=values.name)
+
+
+def convert_country_column(values, names_path=DEFAULT_COUNTRY_NAMES_PATH):
+    """
+    Converts a column of country codes, looking up each distinct code only once.
+
+    Parameters:
+    - values (pd.Series or array-like): Country codes. Missing values are kept as they are.
+    - names_path (str): Path of the precomputed ISO2 code -> name table.
+
+    Returns:
+    - np.ndarray: The country names; a categorical Series for a categorical column.
+    """
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        return map_categories(values, partial(convert_country_code, names_path=names_path))
+    codes, uniques = pd.factorize(values)
+    names = np.array([convert_country_code(code, names_path) for code in uniques] + [np.nan], dtype=object)
+    # factorize gives -1 to missing values, which picks the trailing NaN
+    return names[codes]
+
+
+@STAGE_METRICS.timed('convert_country_codes')
 def convert_country_codes(dataset, employee_column='employee_residence', company_column='company_location'):
     """
     Converts country codes to full country names for specified columns.
@@ -12,11 +134,21 @@ def convert_country_codes(dataset, employee_column='employee_residence', company
     Returns:
     - pd.DataFrame: The dataset with updated country names.
     """
-    dataset[employee_column] = coco.convert(names=dataset[employee_column], to="name")
-    dataset[company_column] = coco.convert(names=dataset[company_column], to="name")
+    dataset[employee_column] = convert_country_column(dataset[employee_column])
+    dataset[company_column] = convert_country_column(dataset[company_column])
     return dataset
 
 
+# Full descriptions of the abbreviations used in the aijobs.net data
+ABBREVIATIONS = {
+    "experience_level": {"EN": "Entry Level", "MI": "Mid Level", "EX": "Expert Level", "SE": "Senior Level"},
+    "employment_type": {"PT": "Part Time", "FT": "Full Time", "CT": "Contractual", "FL": "Freelance"},
+    "company_size": {"M": "Medium", "L": "Large", "S": "Small"},
+    "remote_ratio": {100: "Fully Remote", 0: "Non Remote Work", 50: "Partially Remote"},
+}
+
+
+@STAGE_METRICS.timed('replace_abbreviations')
 def replace_abbreviations(dataset):
     """
     Replaces abbreviations in columns with their full descriptions.
@@ -27,18 +159,12 @@ def replace_abbreviations(dataset):
     Returns:
     - pd.DataFrame: The dataset with replaced values.
     """
-    dataset["experience_level"].replace(
-        {"EN": "Entry Level", "MI": "Mid Level", "EX": "Expert Level", "SE": "Senior Level"}, inplace=True
-    )
-    dataset["employment_type"].replace(
-        {"PT": "Part Time", "FT": "Full Time", "CT": "Contractual", "FL": "Freelance"}, inplace=True
-    )
-    dataset["company_size"].replace(
-        {"M": "Medium", "L": "Large", "S": "Small"}, inplace=True
-    )
-    dataset["remote_ratio"].replace(
-        {100: "Fully Remote", 0: "Non Remote Work", 50: "Partially Remote"}, inplace=True
-    )
+    for column, descriptions in ABBREVIATIONS.items():
+        if isinstance(dataset[column].dtype, pd.CategoricalDtype):
+            # Only the categories are replaced, not the rows
+            dataset[column] = map_categories(dataset[column], descriptions)
+        else:
+            dataset[column] = dataset[column].replace(descriptions)
     return dataset
 
 
@@ -58,49 +184,76 @@ def drop_unnecessary_columns(dataset, columns_to_drop=None):
     dataset.drop(columns=columns_to_drop, axis=1, inplace=True)
     return dataset
 
-import pandas as pd
 
-def remove_outliers_iqr(dataframe, column=None, multiplier=1.5):
+def iqr_bounds(dataframe, columns, multiplier=1.5, by=None):
+    """
+    Computes the IQR outlier bounds of several columns with one quantile call.
+
+    Parameters:
+    - dataframe (pd.DataFrame): The DataFrame to process.
+    - columns (list): Numeric columns.
+    - multiplier (float): The IQR multiplier to define outliers.
+    - by (str, list or None): Columns to group by; each group gets its own bounds.
+
+    Returns:
+    - tuple: (lower, upper) Series indexed by column, or DataFrames indexed by group when by is given.
+    """
+    if by is None:
+        quantiles = dataframe[columns].quantile([0.25, 0.75])
+    else:
+        # groupby quantile is vectorized over every group at once
+        quantiles = dataframe.groupby(by, observed=True)[columns].quantile([0.25, 0.75])
+    q1 = quantiles.xs(0.25, level=-1) if by is not None else quantiles.loc[0.25]
+    q3 = quantiles.xs(0.75, level=-1) if by is not None else quantiles.loc[0.75]
+    iqr = q3 - q1
+    return q1 - multiplier * iqr, q3 + multiplier * iqr
+
+
+def remove_outliers_iqr(dataframe, column=None, multiplier=1.5, by=None, bounds=None):
     """
     Removes outliers from a dataset using the IQR technique.
 
+    The bounds of every column are computed on the whole input, then rows are filtered once with
+    a single combined mask.
+
     Parameters:
     - dataframe (pd.DataFrame): The DataFrame to process.
-    - column (str or None): The column to filter outliers from. If None, applies to all numerical columns.
+    - column (str, list or None): The column(s) to filter outliers from. If None, applies to all numerical columns.
     - multiplier (float): The IQR multiplier to define outliers. Default is 1.5.
+    - by (str, list or None): Columns to group by, e.g. 'job_title', to compare each row with the
+      quartiles of its own group. Rows with a missing group are kept.
+    - bounds (dict or None): Precomputed (lower, upper) bounds by column, e.g. from
+      QuantileSketch.iqr_bounds when the data is filtered chunk by chunk. Not used with by.
 
     Returns:
     - pd.DataFrame: The filtered DataFrame with outliers removed.
     """
-    if column:
-        # Compute IQR for the specific column
-        Q1 = dataframe[column].quantile(0.25)
-        Q3 = dataframe[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - multiplier * IQR
-        upper_bound = Q3 + multiplier * IQR
+    if column is None:
+        by_columns = [] if by is None else [by] if isinstance(by, str) else list(by)
+        columns = [col for col in dataframe.select_dtypes(include='number').columns if col not in by_columns]
+    else:
+        columns = [column] if isinstance(column, str) else list(column)
+    values = dataframe[columns].to_numpy(dtype=np.float64)
 
-        # Filter rows within the bounds
-        return dataframe[(dataframe[column] >= lower_bound) & (dataframe[column] <= upper_bound)]
+    if bounds is not None:
+        lower = np.array([bounds[col][0] for col in columns], dtype=np.float64)
+        upper = np.array([bounds[col][1] for col in columns], dtype=np.float64)
+    elif by is None:
+        lower, upper = (bound.to_numpy(dtype=np.float64) for bound in iqr_bounds(dataframe, columns, multiplier))
     else:
-        # Compute IQR for all numerical columns
-        filtered_data = dataframe.copy()
-        for col in dataframe.select_dtypes(include='number').columns:
-            Q1 = dataframe[col].quantile(0.25)
-            Q3 = dataframe[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - multiplier * IQR
-            upper_bound = Q3 + multiplier * IQR
-
-            # Filter rows for the current column
-            filtered_data = filtered_data[(filtered_data[col] >= lower_bound) & (filtered_data[col] <= upper_bound)]
-        
-        return filtered_data
-
-
-    
-import pandas as pd
+        lower, upper = iqr_bounds(dataframe, columns, multiplier, by)
+        # ngroup numbers the groups in the order of the quantiles; -1 (missing group) picks the
+        # appended row, which keeps everything
+        groups = dataframe.groupby(by, observed=True).ngroup().to_numpy()
+        lower = np.vstack([lower.to_numpy(dtype=np.float64), np.full(len(columns), -np.inf)])[groups]
+        upper = np.vstack([upper.to_numpy(dtype=np.float64), np.full(len(columns), np.inf)])[groups]
+
+    # NaN compares False, so rows with missing values are dropped as before
+    mask = ((values >= lower) & (values <= upper)).all(axis=1)
+    return dataframe[mask]
+
 
+@STAGE_METRICS.timed('preprocess_data')
 def preprocess_data(dataset):
     """
     Preprocess the dataset by applying all necessary transformations.
@@ -0,0 +1,210 @@
+import numbers
+import threading
+import time
+from collections import OrderedDict
+
+# Stands for a field missing from the request, so it never collides with a real value
+_MISSING = '<missing>'
+
+
+def canonical_row(record, columns):
+    """
+    Returns the values of a request row that the prediction depends on, in a fixed order.
+
+    Fields outside the feature plan's inputs are ignored, and numbers are compared by value
+    (2024 and 2024.0 give the same features, so they share an entry). Strings are kept as
+    sent, since 'US' and 'us' are not the same country for the model.
+
+    Parameters:
+    - record (dict): Request row.
+    - columns (list): Columns the feature plan reads.
+
+    Returns:
+    - tuple: Canonical values.
+    """
+    row = []
+    for column in columns:
+        value = record.get(column, _MISSING)
+        kind = type(value)
+        # Exact type checks first: the ABC check of numbers.Number is slow
+        if kind is int or kind is float:
+            value = float(value)
+        elif kind is not str and isinstance(value, numbers.Number) and kind is not bool:
+            value = float(value)
+        row.append(value)
+    return tuple(row)
+
+
+def row_key(record, columns):
+    """
+    Returns the cache key of a request row.
+
+    The canonical values themselves are the key, so the dict hashes them and two different rows
+    never share an entry, even if their hashes collide.
+    """
+    return canonical_row(record, columns)
+
+
+class PredictionCache:
+    """
+    Bounded cache of predictions, in a hash table keyed by the canonical request row.
+
+    Entries are evicted least recently used first once max_entries is reached, and expire
+    ttl_seconds after they were stored. The cache belongs to one model version: looking up
+    rows for a bundle of another version empties it. Lookups and stores are thread safe.
+
+    Parameters:
+    - max_entries (int): Most predictions kept; 0 disables the cache.
+    - ttl_seconds (float or None): Lifetime of an entry; None keeps entries until evicted.
+    - clock (callable): Returns the current time in seconds.
+    """
+
+    def __init__(self, max_entries=100_000, ttl_seconds=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.version = None
+        self.columns = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _use_bundle(self, bundle):
+        # Called with the lock held
+        if bundle.version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = bundle.version
+            self.columns = bundle.plan.source_columns()
+
+    def lookup(self, bundle, records):
+        """
+        Looks up the prediction of every record.
+
+        Parameters:
+        - bundle (ArtifactBundle): Artifacts the predictions must come from.
+        - records (list): Request rows.
+
+        Returns:
+        - tuple: (predictions, missing). predictions has one value per record, None for the
+          misses; missing lists the positions of the misses.
+        """
+        if not self.enabled:
+            return [None] * len(records), list(range(len(records)))
+        predictions, missing = [], []
+        with self._lock:
+            self._use_bundle(bundle)
+            now = self.clock()
+            for i, record in enumerate(records):
+                key = row_key(record, self.columns)
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    predictions.append(None)
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    predictions.append(entry[0])
+            self.hits += len(records) - len(missing)
+            self.misses += len(missing)
+        return predictions, missing
+
+    def fill(self, bundle, records, score):
+        """
+        Scores records, each distinct row once, and stores the predictions.
+
+        Predictions are only stored while bundle is the version the cache holds, so a batch
+        finishing after a model swap does not mix versions.
+
+        Parameters:
+        - bundle (ArtifactBundle): Artifacts used by score.
+        - records (list): Request rows.
+        - score (callable): Takes a list of rows and returns one prediction per row.
+
+        Returns:
+        - list: One prediction per record.
+        """
+        if not self.enabled:
+            return list(score(records))
+        with self._lock:
+            columns = self.columns if bundle.version == self.version else bundle.plan.source_columns()
+        keys = [row_key(record, columns) for record in records]
+        positions = {}
+        for i, key in enumerate(keys):
+            positions.setdefault(key, i)
+        unique = list(positions)
+        scored = dict(zip(unique, score([records[positions[key]] for key in unique])))
+
+        with self._lock:
+            if bundle.version == self.version:
+                expires = None if self.ttl_seconds is None else self.clock() + self.ttl_seconds
+                for key, value in scored.items():
+                    self._entries[key] = (value, expires)
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return [scored[key] for key in keys]
+
+    def predict(self, bundle, records, score):
+        """
+        Serves records from the cache and scores only the misses.
+
+        Parameters:
+        - bundle (ArtifactBundle): Artifacts used by score.
+        - records (list): Request rows.
+        - score (callable): Takes a list of rows and returns one prediction per row.
+
+        Returns:
+        - list: One prediction per record.
+        """
+        predictions, missing = self.lookup(bundle, records)
+        if missing:
+            for i, value in zip(missing, self.fill(bundle, [records[i] for i in missing], score)):
+                predictions[i] = value
+        return predictions
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the cache metrics.
+
+        Returns:
+        - dict: Size, hit and miss counts, hit rate, evictions, expirations and invalidations.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
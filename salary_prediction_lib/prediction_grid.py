@@ -0,0 +1,294 @@
+import itertools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarTable, DictColumn, predict_columnar
+from prediction_cache import canonical_row
+
+GRID_FORMAT = 1
+DEFAULT_GRID_DIR = 'prediction_grid'
+
+# Low-cardinality columns crossed with every observed combination of the others by the CLI
+DEFAULT_CARTESIAN_COLUMNS = ['experience_level', 'employment_type', 'company_size', 'remote_ratio', 'work_year']
+
+_KEYS_FILE = 'keys.npy'
+_PREDICTIONS_FILE = 'predictions.npy'
+_META_FILE = 'grid.json'
+
+
+def _canonical_values(values):
+    # Same canonical form as the prediction cache: numbers as floats, anything else as is
+    return [canonical_row({'value': value}, ['value'])[0] for value in values]
+
+
+class PredictionGrid:
+    """
+    Precomputed predictions for a grid of raw input combinations, looked up instead of
+    running the model.
+
+    Each input column has a vocabulary of values; a row's key packs the positions of its
+    values in mixed radix into one int64. The keys are sorted and stored with their
+    predictions as .npy files that are memory-mapped on load, so processes serving the same
+    grid share one copy in the page cache. Rows with a value outside a vocabulary, or a
+    combination that was not precomputed, are misses and go to the live model.
+
+    Attributes:
+    - version (str): Model version the predictions were computed with.
+    - columns (list): Input columns, the feature plan's source columns.
+    - vocabularies (dict): Column mapped to its list of canonical values.
+    - keys (np.ndarray): Sorted packed keys.
+    - predictions (np.ndarray): Prediction of each key.
+    """
+
+    def __init__(self, version, columns, vocabularies, keys, predictions):
+        self.version = version
+        self.columns = list(columns)
+        self.vocabularies = {column: list(vocabularies[column]) for column in self.columns}
+        self.keys = keys
+        self.predictions = predictions
+
+        sizes = [len(self.vocabularies[column]) for column in self.columns]
+        if np.prod([float(size) for size in sizes]) >= 2 ** 63:
+            raise ValueError("The grid vocabularies are too large to pack a row into one int64 key.")
+        self._strides = np.array([int(np.prod(sizes[i + 1:], dtype=np.int64)) for i in range(len(sizes))], dtype=np.int64)
+        self._positions = {column: {value: code for code, value in enumerate(self.vocabularies[column])}
+                           for column in self.columns}
+        self._index = {column: pd.Index(self.vocabularies[column]) for column in self.columns}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _find(self, keys, valid):
+        # Position of each key in the table, or -1
+        if not len(self.keys):
+            return np.full(len(keys), -1)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = valid & (np.asarray(self.keys)[positions] == keys)
+        return np.where(found, positions, -1)
+
+    def lookup(self, records):
+        """
+        Looks up the prediction of every record.
+
+        Parameters:
+        - records (list): Request rows (dicts with the raw input values).
+
+        Returns:
+        - tuple: (predictions, missing). predictions has one value per record, None for the
+          misses; missing lists the positions of the misses.
+        """
+        keys = np.zeros(len(records), dtype=np.int64)
+        valid = np.ones(len(records), dtype=bool)
+        for i, record in enumerate(records):
+            key = 0
+            for value, stride, positions in zip(canonical_row(record, self.columns), self._strides,
+                                                self._positions.values()):
+                code = positions.get(value) if value == value else None
+                if code is None:
+                    valid[i] = False
+                    break
+                key += code * int(stride)
+            keys[i] = key
+        found = self._find(keys, valid)
+        predictions = [float(self.predictions[position]) if position >= 0 else None for position in found]
+        missing = np.flatnonzero(found < 0).tolist()
+        self.hits += len(records) - len(missing)
+        self.misses += len(missing)
+        return predictions, missing
+
+    def lookup_frame(self, dataset):
+        """
+        Looks up the predictions of a DataFrame of raw input rows, fully vectorized.
+
+        Parameters:
+        - dataset (pd.DataFrame): Raw input rows.
+
+        Returns:
+        - np.ndarray: The predictions, NaN for the misses.
+        """
+        keys = np.zeros(len(dataset), dtype=np.int64)
+        valid = np.ones(len(dataset), dtype=bool)
+        for column, stride in zip(self.columns, self._strides):
+            codes = self._index[column].get_indexer(dataset[column])
+            valid &= codes >= 0
+            keys += codes.astype(np.int64) * stride
+        found = self._find(keys, valid)
+        predictions = np.asarray(self.predictions)[np.maximum(found, 0)].astype(np.float64)
+        predictions[found < 0] = np.nan
+        return predictions
+
+    def lookup_table(self, table):
+        """
+        Looks up the predictions of a ColumnarTable, e.g. a decoded column batch.
+
+        Dictionary-encoded columns are looked up once per distinct value, and the positions are
+        spread over the rows through their codes.
+
+        Parameters:
+        - table (ColumnarTable): Raw input rows.
+
+        Returns:
+        - np.ndarray: The predictions, NaN for the misses.
+        """
+        keys = np.zeros(len(table), dtype=np.int64)
+        valid = np.ones(len(table), dtype=bool)
+        for column, stride in zip(self.columns, self._strides):
+            values = table[column]
+            if isinstance(values, DictColumn):
+                codes = values.take(self._index[column].get_indexer(values.values), missing=-1, dtype=np.int64)
+            else:
+                codes = self._index[column].get_indexer(values)
+            valid &= codes >= 0
+            keys += codes.astype(np.int64) * stride
+        found = self._find(keys, valid)
+        predictions = np.asarray(self.predictions)[np.maximum(found, 0)].astype(np.float64)
+        predictions[found < 0] = np.nan
+        missing = int((found < 0).sum())
+        self.hits += len(found) - missing
+        self.misses += missing
+        return predictions
+
+    def predict(self, records, score):
+        """
+        Serves records from the grid and scores only the misses.
+
+        Parameters:
+        - records (list): Request rows.
+        - score (callable): Takes a list of rows and returns one prediction per row.
+
+        Returns:
+        - list: One prediction per record.
+        """
+        predictions, missing = self.lookup(records)
+        if missing:
+            for i, value in zip(missing, score([records[i] for i in missing])):
+                predictions[i] = value
+        return predictions
+
+    def stats(self):
+        """
+        Returns the grid metrics.
+
+        Returns:
+        - dict: Rows in the grid, model version, hits and misses.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'rows': len(self),
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, path=DEFAULT_GRID_DIR):
+        """
+        Writes the grid to a folder (keys.npy, predictions.npy and grid.json).
+
+        Parameters:
+        - path (str): Destination folder.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, _KEYS_FILE), np.asarray(self.keys))
+        np.save(os.path.join(path, _PREDICTIONS_FILE), np.asarray(self.predictions))
+        meta = {'format': GRID_FORMAT, 'model_version': self.version, 'columns': self.columns,
+                'vocabularies': self.vocabularies, 'rows': len(self)}
+        with open(os.path.join(path, _META_FILE), 'w') as file:
+            json.dump(meta, file, indent=2)
+
+
+def load_grid(path=DEFAULT_GRID_DIR, mmap=True):
+    """
+    Loads a grid written by PredictionGrid.save.
+
+    Parameters:
+    - path (str): Folder of the grid.
+    - mmap (bool): Memory-map the arrays instead of reading them.
+
+    Returns:
+    - PredictionGrid: The grid.
+    """
+    try:
+        with open(os.path.join(path, _META_FILE)) as file:
+            meta = json.load(file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The folder '{path}' does not contain a prediction grid. Build it with build_grid.")
+    if meta.get('format') != GRID_FORMAT:
+        raise ValueError(f"Unsupported prediction grid format {meta.get('format')!r}; expected {GRID_FORMAT}.")
+    mmap_mode = 'r' if mmap else None
+    keys = np.load(os.path.join(path, _KEYS_FILE), mmap_mode=mmap_mode)
+    predictions = np.load(os.path.join(path, _PREDICTIONS_FILE), mmap_mode=mmap_mode)
+    return PredictionGrid(meta['model_version'], meta['columns'], meta['vocabularies'], keys, predictions)
+
+
+def grid_rows(dataset, columns, cartesian=None, extra_values=None):
+    """
+    Enumerates the input combinations of a grid.
+
+    Parameters:
+    - dataset (pd.DataFrame): Observed raw rows, e.g. data/salaries.csv.
+    - columns (list): Input columns.
+    - cartesian (list or None): Columns whose every value is combined with each observed
+      combination of the other columns. None keeps only the observed combinations.
+    - extra_values (dict or None): Values added to the vocabulary of cartesian columns, e.g.
+      {'work_year': [2026]} for a year that is not in the data yet.
+
+    Returns:
+    - pd.DataFrame: One row per combination.
+    """
+    cartesian = [column for column in (cartesian or []) if column in columns]
+    extra_values = extra_values or {}
+    fixed = [column for column in columns if column not in cartesian]
+    # Missing values never match a lookup, so rows with them are left out
+    dataset = dataset[columns].dropna()
+    observed = dataset[fixed].drop_duplicates()
+    if not cartesian:
+        return observed.reset_index(drop=True)
+
+    values = []
+    for column in cartesian:
+        observed_values = list(pd.unique(dataset[column]))
+        values.append(observed_values + [value for value in extra_values.get(column, []) if value not in observed_values])
+    crossed = pd.DataFrame(list(itertools.product(*values)), columns=cartesian)
+    rows = observed.merge(crossed, how='cross') if fixed else crossed
+    return rows[columns]
+
+
+def build_grid(bundle, dataset, cartesian=None, extra_values=None, block_rows=65_536):
+    """
+    Precomputes the predictions of a grid of input combinations with the bundle's model.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to serve with.
+    - dataset (pd.DataFrame): Observed raw rows the combinations are taken from.
+    - cartesian (list or None): Columns crossed with every observed combination (see grid_rows).
+    - extra_values (dict or None): Extra values of cartesian columns.
+    - block_rows (int): Rows predicted at a time.
+
+    Returns:
+    - PredictionGrid: The grid, with its arrays in memory.
+    """
+    columns = bundle.plan.source_columns()
+    rows = grid_rows(dataset, columns, cartesian, extra_values)
+    vocabularies = {column: sorted(set(_canonical_values(pd.unique(rows[column]))), key=repr) for column in columns}
+    grid = PredictionGrid(bundle.version, columns, vocabularies, np.empty(0, dtype=np.int64), np.empty(0))
+
+    predictions = np.empty(len(rows), dtype=np.float64)
+    for start in range(0, len(rows), block_rows):
+        block = rows.iloc[start:start + block_rows].reset_index(drop=True)
+        predictions[start:start + block_rows] = predict_columnar(bundle, ColumnarTable.from_pandas(block))
+
+    keys = np.zeros(len(rows), dtype=np.int64)
+    for column, stride in zip(columns, grid._strides):
+        keys += grid._index[column].get_indexer(_canonical_values(rows[column])).astype(np.int64) * stride
+    # Values that canonicalize alike (2024 and 2024.0) give the same key and the same prediction
+    keys, first = np.unique(keys, return_index=True)
+    grid.keys, grid.predictions = keys, predictions[first]
+    return grid
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable summary of a numeric column for computing quantiles in one pass.
+
+    Distinct values are kept with their counts, so quantiles are exact (and equal to pandas'
+    linear interpolation) while there are at most `capacity` distinct values. Beyond that,
+    neighbouring values are merged into weighted centroids of about equal weight, and the
+    error of a quantile stays within about 2 / capacity of its rank.
+
+    Parameters:
+    - capacity (int): Most values or centroids kept.
+    """
+
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = True
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """
+        Adds values to the sketch. Missing values are ignored.
+
+        Parameters:
+        - values (array-like): New values.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+        self._add(values, counts.astype(np.float64))
+
+    def merge(self, other):
+        """
+        Adds the values summarized by another sketch.
+
+        Parameters:
+        - other (QuantileSketch): Sketch of other rows.
+        """
+        self._add(other.values, other.weights)
+        self.exact = self.exact and other.exact
+
+    def _add(self, values, weights):
+        values, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        self.values = values
+        self.weights = np.bincount(inverse, weights=np.concatenate([self.weights, weights]), minlength=len(values))
+        if len(self.values) > self.capacity:
+            self._compress()
+
+    def _compress(self):
+        # Half the capacity is freed, so compressions are rare
+        midpoints = np.cumsum(self.weights) - self.weights / 2
+        groups = np.floor(midpoints / self.count * (self.capacity // 2)).astype(np.int64)
+        weights = np.bincount(groups, weights=self.weights)
+        kept = weights > 0
+        self.values = np.bincount(groups, weights=self.values * self.weights)[kept] / weights[kept]
+        self.weights = weights[kept]
+        self.exact = False
+
+    def quantile(self, q):
+        """
+        Returns a quantile, interpolating linearly between the values around it like pandas.
+
+        Parameters:
+        - q (float): Quantile between 0 and 1.
+
+        Returns:
+        - float: The quantile.
+        """
+        if not len(self.values):
+            return np.nan
+        position = (self.count - 1) * q
+        cumulative = np.cumsum(self.weights)
+        lower = self.values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = self.values[min(np.searchsorted(cumulative, np.ceil(position), side='right'), len(self.values) - 1)]
+        return float(lower + (position - np.floor(position)) * (upper - lower))
+
+    def iqr_bounds(self, multiplier=1.5):
+        """
+        Returns the bounds remove_outliers_iqr keeps values within.
+
+        Parameters:
+        - multiplier (float): The IQR multiplier to define outliers.
+
+        Returns:
+        - tuple: (lower bound, upper bound).
+        """
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        return q1 - multiplier * (q3 - q1), q3 + multiplier * (q3 - q1)
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import threading
+from types import MappingProxyType
+
+import joblib
+
+from compiled_model import load_compiled_model
+from encoding import load_encoders
+from transforms import compile_plan, load_plan
+
+DEFAULT_MANIFEST = 'artifacts.json'
+ARTIFACT_KEYS = ('model', 'encoder', 'job_density')
+# Artifacts that older manifests may not list
+OPTIONAL_ARTIFACT_KEYS = ('feature_plan', 'compiled_model')
+
+
+class ArtifactVersionError(RuntimeError):
+    """Raised when the artifacts on disk do not match the versions recorded in the manifest."""
+
+
+class ArtifactBundle:
+    """
+    Read-only set of serving artifacts that were trained together.
+
+    Attributes:
+    - version (str): Version recorded in the manifest.
+    - model (lgb.Booster or CompiledModel): Trained LightGBM booster, or its compiled trees.
+    - encoder (CategoricalEncoders): Categorical encoders fitted at training time.
+    - job_density (Mapping): Salary density stats by job title name (read-only view).
+    - plan (TransformPlan): Feature plan the model was trained with. Defaults to compile_plan().
+    """
+    __slots__ = ('version', 'model', 'encoder', 'job_density', 'plan')
+
+    def __init__(self, version, model, encoder, job_density, plan=None):
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'model', model)
+        object.__setattr__(self, 'encoder', encoder)
+        object.__setattr__(self, 'job_density', MappingProxyType(dict(job_density)))
+        object.__setattr__(self, 'plan', compile_plan() if plan is None else plan)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ArtifactBundle is read-only; load a new bundle instead.")
+
+    def __repr__(self):
+        return f"ArtifactBundle(version={self.version!r})"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 digest of a file.
+
+    Parameters:
+    - path (str): Path of the file to hash.
+    - chunk_size (int): Number of bytes read per iteration.
+
+    Returns:
+    - str: Hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(version, model_path, encoder_path, job_density_path, manifest_path=DEFAULT_MANIFEST,
+                   feature_plan_path=None, compiled_model_path=None):
+    """
+    Writes a manifest pinning the model, encoder, density stats, feature plan and compiled model
+    to one version.
+
+    Parameters:
+    - version (str): Version label for this set of artifacts.
+    - model_path (str): Path to the saved LightGBM model.
+    - encoder_path (str): Path to the saved categorical encoder.
+    - job_density_path (str): Path to the saved salary_density_by_job.pkl file.
+    - manifest_path (str): Where to write the manifest. Artifact paths are stored relative to it.
+    - feature_plan_path (str or None): Path to the feature plan saved with save_plan.
+    - compiled_model_path (str or None): Path to the model saved with CompiledModel.save.
+
+    Returns:
+    - dict: The manifest that was written.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = {'model': model_path, 'encoder': encoder_path, 'job_density': job_density_path,
+             'feature_plan': feature_plan_path, 'compiled_model': compiled_model_path}
+
+    manifest = {'version': str(version)}
+    for key in ARTIFACT_KEYS + OPTIONAL_ARTIFACT_KEYS:
+        if paths[key] is None:
+            continue
+        manifest[key] = _manifest_entry(paths[key], base_dir)
+    _write_json(manifest, manifest_path)
+    return manifest
+
+
+def pin_artifact(key, path, manifest_path=DEFAULT_MANIFEST):
+    """
+    Adds an artifact to an existing manifest, or updates its entry, keeping the version.
+
+    Parameters:
+    - key (str): Artifact name, one of OPTIONAL_ARTIFACT_KEYS.
+    - path (str): Path to the artifact.
+    - manifest_path (str): Manifest to update.
+
+    Returns:
+    - dict: The manifest that was written.
+    """
+    if key not in OPTIONAL_ARTIFACT_KEYS:
+        raise ValueError(f"Only the optional artifacts {list(OPTIONAL_ARTIFACT_KEYS)} can be added to a manifest.")
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    manifest[key] = _manifest_entry(path, os.path.dirname(os.path.abspath(manifest_path)))
+    _write_json(manifest, manifest_path)
+    return manifest
+
+
+def _manifest_entry(path, base_dir):
+    return {'path': os.path.relpath(os.path.abspath(path), base_dir), 'sha256': file_sha256(path)}
+
+
+def _write_json(manifest, manifest_path):
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+        file.write('\n')
+
+
+def load_artifacts(manifest_path=DEFAULT_MANIFEST, compiled=False):
+    """
+    Loads every artifact listed in a manifest after checking that they all belong to its version.
+
+    Parameters:
+    - manifest_path (str): Path to the artifacts manifest.
+    - compiled (bool): Serve the compiled model (cli.py compile-model) instead of the LightGBM
+      booster, so LightGBM is never imported. The booster file is then not needed.
+
+    Returns:
+    - ArtifactBundle: The loaded artifacts.
+    """
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The manifest '{manifest_path}' does not exist. Generate it with write_manifest after training.")
+
+    model_key = 'compiled_model' if compiled else 'model'
+    required = ('version', model_key) + tuple(key for key in ARTIFACT_KEYS if key != 'model')
+    missing = [key for key in required if key not in manifest]
+    if missing:
+        raise ArtifactVersionError(f"The manifest '{manifest_path}' is missing the entries: {missing}")
+
+    # Check every file before unpickling anything, so a half-updated directory is never loaded
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    paths = {}
+    for key in required[1:] + tuple(key for key in ('feature_plan',) if key in manifest):
+        path = os.path.join(base_dir, manifest[key]['path'])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"The artifact '{path}' listed in '{manifest_path}' does not exist.")
+        if file_sha256(path) != manifest[key]['sha256']:
+            raise ArtifactVersionError(
+                f"The artifact '{path}' does not match version {manifest['version']} of '{manifest_path}'."
+            )
+        paths[key] = path
+
+    plan = None
+    if 'feature_plan' in paths:
+        try:
+            plan = load_plan(paths['feature_plan'])
+        except ValueError as e:
+            raise ArtifactVersionError(f"The feature plan '{paths['feature_plan']}' cannot be served: {e}")
+
+    encoder = load_encoders(paths['encoder'])
+    return ArtifactBundle(
+        version=manifest['version'],
+        model=load_compiled_model(paths['compiled_model']) if compiled else joblib.load(paths['model']),
+        encoder=encoder,
+        job_density=decode_job_density(joblib.load(paths['job_density']), encoder),
+        plan=plan,
+    )
+
+
+def decode_job_density(job_salary_density, encoder, job_column='job_title'):
+    """
+    Re-keys salary density stats by job title name.
+
+    save_salary_density_by_job is run on the encoded training data, so the saved stats are
+    keyed by job title code. Serving maps them before encoding, so it needs the names.
+
+    Parameters:
+    - job_salary_density (dict): Stats keyed by job title code or name.
+    - encoder (CategoricalEncoders): Encoders fitted on the same training data.
+    - job_column (str): The column containing job titles.
+
+    Returns:
+    - dict: Stats keyed by job title name.
+    """
+    classes = encoder.classes[job_column]
+    decoded = {}
+    for key, value in job_salary_density.items():
+        if isinstance(key, str):
+            decoded[key] = value
+        elif 0 <= key < len(classes):
+            decoded[classes[key]] = value
+        else:
+            raise ArtifactVersionError(
+                f"The salary density stats reference job title code {key}, but the encoder only knows {len(classes)} titles."
+            )
+    return decoded
+
+
+class ArtifactRegistry:
+    """
+    Keeps one ArtifactBundle resident and shares it with every request.
+
+    Requests should call current() once and use the returned bundle for the whole request,
+    so a concurrent swap never mixes artifacts from two versions.
+
+    Parameters:
+    - manifest_path (str): Manifest of the artifacts to serve.
+    - compiled (bool): Serve the compiled model instead of the LightGBM booster (see load_artifacts).
+    """
+
+    def __init__(self, manifest_path=DEFAULT_MANIFEST, compiled=False):
+        self._lock = threading.Lock()
+        self._manifest_path = manifest_path
+        self._compiled = compiled
+        self._bundle = load_artifacts(manifest_path, compiled)
+
+    @property
+    def manifest_path(self):
+        return self._manifest_path
+
+    def current(self):
+        """
+        Returns the bundle currently being served.
+
+        Returns:
+        - ArtifactBundle: The active artifacts.
+        """
+        return self._bundle
+
+    def swap(self, manifest_path=None):
+        """
+        Loads a new set of artifacts and atomically replaces the active bundle.
+
+        The new bundle is fully loaded and validated before it is published, so a failed
+        load leaves the current bundle in place.
+
+        Parameters:
+        - manifest_path (str or None): Manifest to load. Defaults to the one used last.
+
+        Returns:
+        - ArtifactBundle: The bundle now being served.
+        """
+        manifest_path = manifest_path or self._manifest_path
+        bundle = load_artifacts(manifest_path, self._compiled)
+        with self._lock:
+            self._bundle = bundle
+            self._manifest_path = manifest_path
+        return bundle
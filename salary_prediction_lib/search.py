@@ -0,0 +1,292 @@
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import lightgbm as lgb
+
+from dataset_cache import binning_params, content_hash
+
+BASE_PARAMS = {'objective': 'regression', 'metric': 'rmse', 'boosting_type': 'gbdt'}
+
+PARAM_GRID = {
+    'learning_rate': [0.01, 0.05, 0.1, 0.2],
+    'num_leaves': [15, 31, 63, 127],
+    'max_depth': [-1, 5, 10, 15],
+    'feature_fraction': [0.6, 0.7, 0.8, 0.9],
+    'bagging_fraction': [0.6, 0.7, 0.8, 0.9],
+    'bagging_freq': [1, 5, 10],
+    'lambda_l1': [0.0, 0.1, 0.5, 1.0],
+    'lambda_l2': [0.0, 0.1, 0.5, 1.0]
+}
+
+# Keys added to every trial's params that do not change the model
+_RUNTIME_PARAMS = ('num_threads', 'verbosity')
+
+# Datasets loaded once per worker process by _init_worker
+_worker_datasets = None
+
+
+def sample_params(n_iter, seed=42, param_grid=PARAM_GRID, rng=None):
+    """
+    Samples random hyperparameter combinations from a grid.
+
+    Parameters:
+    - n_iter (int): Number of combinations.
+    - seed (int): Random seed, also set as LightGBM's seed.
+    - param_grid (dict): Candidate values by parameter.
+    - rng (random.Random or None): Generator to draw from, to continue an earlier sequence.
+
+    Returns:
+    - list: LightGBM parameter dicts.
+    """
+    rng = rng or random.Random(seed)
+    configs = []
+    for _ in range(n_iter):
+        params = dict(BASE_PARAMS, seed=seed)
+        for name, values in param_grid.items():
+            params[name] = rng.choice(values)
+        configs.append(params)
+    return configs
+
+
+def trial_id(params):
+    """
+    Returns a short stable identifier of a parameter combination.
+    """
+    params = {key: value for key, value in params.items() if key not in _RUNTIME_PARAMS}
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class TrialJournal:
+    """
+    Append-only JSON Lines record of finished trials.
+
+    Every result is written as soon as it is known, so an interrupted search started again
+    with the same journal skips the trials it already ran.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line cut short by an interruption
+                        continue
+                    self.entries[self._key(entry)] = entry
+
+    @staticmethod
+    def _key(entry):
+        return entry['data'], entry['trial'], entry['rounds'], entry['early_stopping_rounds']
+
+    def get(self, data, trial, rounds, early_stopping_rounds):
+        return self.entries.get((data, trial, rounds, early_stopping_rounds))
+
+    def record(self, entry):
+        self.entries[self._key(entry)] = entry
+        if self.path:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(entry) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+
+
+def _train_trial(datasets, params, rounds, early_stopping_rounds):
+    train_set, valid_set = datasets
+    callbacks = [lgb.early_stopping(early_stopping_rounds, verbose=False)] if early_stopping_rounds else []
+    start = time.perf_counter()
+    model = lgb.train(params, train_set, num_boost_round=rounds, valid_sets=[valid_set], valid_names=['valid'],
+                      callbacks=callbacks)
+    return {
+        'rmse': float(model.best_score['valid']['rmse']),
+        'best_iteration': model.best_iteration or model.current_iteration(),
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _load_binary_datasets(train_path, valid_path):
+    train_set = lgb.Dataset(train_path, params={'verbosity': -1}).construct()
+    valid_set = lgb.Dataset(valid_path, reference=train_set, params={'verbosity': -1}).construct()
+    return train_set, valid_set
+
+
+def _init_worker(train_path, valid_path):
+    global _worker_datasets
+    _worker_datasets = _load_binary_datasets(train_path, valid_path)
+
+
+def _worker_trial(params, rounds, early_stopping_rounds):
+    return _train_trial(_worker_datasets, params, rounds, early_stopping_rounds)
+
+
+class HyperparameterSearch:
+    """
+    Evaluates LightGBM parameter combinations on one train/validation split.
+
+    The training data is binned once: in-process runs reuse the same lgb.Dataset for every
+    trial, and worker processes load it from a LightGBM binary file instead of binning the
+    raw data again. Trials run with early stopping, and successive_halving / hyperband stop
+    poor combinations after a few boosting rounds.
+
+    Use it as a context manager, or call close() to stop the workers.
+
+    Parameters:
+    - X_train, y_train: Training features and labels.
+    - X_valid, y_valid: Validation features and labels.
+    - n_workers (int): Worker processes; 1 runs the trials in this process.
+    - threads_per_worker (int or None): LightGBM threads per trial. Defaults to the CPU count
+      divided by n_workers, so the workers do not oversubscribe the machine.
+    - journal_path (str or None): JSON Lines file recording every trial; reusing it resumes a search.
+    - early_stopping_rounds (int or None): Rounds without improvement before a trial stops.
+    - dataset_cache (DatasetCache or None): Cache to load the binned datasets from; workers
+      then read the cached files directly.
+    - dataset_params (dict or None): Parameters shared by every trial that affect binning,
+      e.g. {'seed': 42}.
+    """
+
+    def __init__(self, X_train, y_train, X_valid, y_valid, n_workers=1, threads_per_worker=None,
+                 journal_path=None, early_stopping_rounds=10, dataset_cache=None, dataset_params=None):
+        self.n_workers = max(1, n_workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.n_workers)
+        self.early_stopping_rounds = early_stopping_rounds
+        self.journal = TrialJournal(journal_path)
+        self.data = content_hash(X_train, y_train, X_valid, y_valid)[:16]
+        self.results = []
+
+        self._work_dir = None
+        self._executor = None
+        if dataset_cache is not None:
+            train_set, train_key = dataset_cache.dataset(X_train, y_train, dataset_params)
+            valid_set, valid_key = dataset_cache.dataset(X_valid, y_valid, dataset_params, reference=train_set,
+                                                         reference_key=train_key)
+            train_path, valid_path = dataset_cache.path(train_key), dataset_cache.path(valid_key)
+        else:
+            params = dict(binning_params(dataset_params), verbosity=-1)
+            train_set = lgb.Dataset(X_train, label=y_train, params=params).construct()
+            valid_set = lgb.Dataset(X_valid, label=y_valid, reference=train_set, params=params).construct()
+            train_path = valid_path = None
+
+        if self.n_workers == 1:
+            self._datasets = (train_set, valid_set)
+        else:
+            if train_path is None:
+                self._work_dir = tempfile.mkdtemp(prefix='lgb-search-')
+                train_path = os.path.join(self._work_dir, 'train.bin')
+                valid_path = os.path.join(self._work_dir, 'valid.bin')
+                train_set.save_binary(train_path)
+                valid_set.save_binary(valid_path)
+            self._datasets = None
+            self._executor = ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                                 initargs=(train_path, valid_path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops the worker processes and removes the binary datasets."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def evaluate(self, configs, rounds):
+        """
+        Trains every combination for up to `rounds` boosting rounds, in parallel.
+
+        Combinations already in the journal for the same data are not trained again.
+
+        Parameters:
+        - configs (list): LightGBM parameter dicts.
+        - rounds (int): Maximum boosting rounds.
+
+        Returns:
+        - list: One result dict per combination (trial, params, rounds, rmse, best_iteration, seconds).
+        """
+        results = [None] * len(configs)
+        pending = {}
+        for i, params in enumerate(configs):
+            entry = self.journal.get(self.data, trial_id(params), rounds, self.early_stopping_rounds)
+            if entry is not None:
+                results[i] = dict(entry, resumed=True)
+                continue
+            run_params = dict(params, num_threads=self.threads_per_worker, verbosity=-1)
+            if self._executor is None:
+                pending[i] = _train_trial(self._datasets, run_params, rounds, self.early_stopping_rounds)
+            else:
+                pending[i] = self._executor.submit(_worker_trial, run_params, rounds, self.early_stopping_rounds)
+
+        for i, outcome in pending.items():
+            outcome = outcome if isinstance(outcome, dict) else outcome.result()
+            entry = {'data': self.data, 'trial': trial_id(configs[i]), 'rounds': rounds,
+                     'early_stopping_rounds': self.early_stopping_rounds, 'params': configs[i], **outcome}
+            self.journal.record(entry)
+            results[i] = entry
+        self.results.extend(results)
+        return results
+
+    def successive_halving(self, configs, min_rounds, max_rounds, eta=3):
+        """
+        Trains every combination for about min_rounds, keeps the best 1/eta, multiplies the
+        rounds by eta, and repeats until max_rounds.
+
+        The rungs are counted back from max_rounds (max_rounds / eta**k, the first one being
+        the closest to min_rounds), so the last rung is exactly max_rounds.
+
+        Parameters:
+        - configs (list): LightGBM parameter dicts.
+        - min_rounds (int): Rounds of the first rung.
+        - max_rounds (int): Rounds of the last rung.
+        - eta (int): Fraction of combinations kept and growth of the rounds at each rung.
+
+        Returns:
+        - dict: Result of the best combination of the last rung.
+        """
+        survivors = list(configs)
+        n_rungs = max(0, int(math.floor(math.log(max_rounds / min_rounds, eta) + 1e-9))) + 1
+        for rung in range(n_rungs):
+            rounds = max(1, int(round(max_rounds / eta ** (n_rungs - 1 - rung))))
+            results = sorted(self.evaluate(survivors, rounds), key=lambda result: result['rmse'])
+            if rung == n_rungs - 1 or len(survivors) == 1:
+                return results[0]
+            survivors = [result['params'] for result in results[:max(1, len(results) // eta)]]
+
+    def hyperband(self, max_rounds=100, min_rounds=None, eta=3, seed=42, param_grid=PARAM_GRID):
+        """
+        Runs successive halving brackets that trade the number of combinations against the
+        rounds each one gets first.
+
+        Parameters:
+        - max_rounds (int): Most rounds any combination is trained for.
+        - min_rounds (int or None): Fewest rounds; defaults to max_rounds / eta**2.
+        - eta (int): Halving factor.
+        - seed (int): Random seed for sampling combinations.
+        - param_grid (dict): Candidate values by parameter.
+
+        Returns:
+        - dict: Result of the best combination.
+        """
+        min_rounds = min_rounds or max(1, max_rounds // eta ** 2)
+        s_max = int(math.floor(math.log(max_rounds / min_rounds, eta) + 1e-9))
+        rng = random.Random(seed)
+        best = None
+        for s in range(s_max, -1, -1):
+            n_configs = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            configs = sample_params(n_configs, seed, param_grid, rng=rng)
+            result = self.successive_halving(configs, max_rounds / eta ** s, max_rounds, eta)
+            if best is None or result['rmse'] < best['rmse']:
+                best = result
+        return best
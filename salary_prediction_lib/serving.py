@@ -0,0 +1,39 @@
+import pandas as pd
+
+from columnar import ColumnarTable, model_matrix, predict_columnar
+from instrumentation import STAGE_METRICS
+
+# The model was trained on the per-row salary density; at serving time the salary is unknown,
+# so the job title average computed by map_job_density takes its place.
+SERVING_FEATURE_ALIASES = {'salary_density_by_experience': 'salary_density'}
+
+
+def build_model_input(bundle, dataset):
+    """
+    Runs the bundle's feature plan (preprocessing and feature creation) and encoding on raw request data.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts used to serve the request.
+    - dataset (pd.DataFrame): Raw input rows, with the columns of test_json.
+
+    Returns:
+    - pd.DataFrame: The model features, in the order the model was trained with.
+    """
+    table = bundle.plan.run(ColumnarTable.from_pandas(dataset), job_salary_density=bundle.job_density)
+    with STAGE_METRICS.time('encode', len(table)):
+        matrix = model_matrix(bundle, table, SERVING_FEATURE_ALIASES)
+    return pd.DataFrame(matrix, columns=bundle.model.feature_name())
+
+
+def predict_records(bundle, records):
+    """
+    Predicts salaries for a list of raw input rows.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts used to serve the request.
+    - records (list): List of dictionaries with the input data.
+
+    Returns:
+    - np.ndarray: The predicted salaries.
+    """
+    return predict_columnar(bundle, ColumnarTable.from_pandas(pd.DataFrame(records)))
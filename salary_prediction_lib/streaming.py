@@ -0,0 +1,162 @@
+import os
+
+import pandas as pd
+
+from columnar import ColumnarTable, predict_columnar
+
+FORMATS = ('ndjson', 'csv', 'parquet')
+FORMAT_EXTENSIONS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson', '.csv': 'csv', '.parquet': 'parquet'}
+DEFAULT_CHUNK_SIZE = 50_000
+PREDICTION_COLUMN = 'prediction'
+
+
+def infer_format(path):
+    """
+    Infers the file format from its extension.
+
+    Parameters:
+    - path (str): File path.
+
+    Returns:
+    - str: One of FORMATS.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Cannot infer the format of '{path}'; use one of {FORMATS}.")
+    return FORMAT_EXTENSIONS[extension]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet support requires pyarrow. Install it with 'pip install pyarrow'.")
+    return pyarrow
+
+
+def iter_chunks(source, input_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Reads a dataset in fixed-size chunks, so memory does not grow with the file.
+
+    Parameters:
+    - source (str or file-like): Path or binary file object. Parquet needs a seekable file.
+    - input_format (str): One of 'ndjson', 'csv' or 'parquet'.
+    - chunk_size (int): Rows per chunk.
+
+    Yields:
+    - pd.DataFrame: The next chunk of raw rows.
+    """
+    if input_format == 'ndjson':
+        # dtype=False keeps codes such as 'NA' (Namibia) as strings
+        with pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False) as reader:
+            yield from reader
+    elif input_format == 'csv':
+        # Only empty fields are missing values; 'NA' is a country code
+        with pd.read_csv(source, chunksize=chunk_size, keep_default_na=False, na_values=['']) as reader:
+            yield from reader
+    elif input_format == 'parquet':
+        pyarrow = _require_pyarrow()
+        parquet_file = pyarrow.parquet.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unknown format '{input_format}'; use one of {FORMATS}.")
+
+
+def score_chunks(bundle, chunks):
+    """
+    Runs the preprocess/feature/predict pipeline on each chunk, in columnar mode so the
+    raw rows are not copied.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to score with.
+    - chunks (iterable): Chunks of raw rows, e.g. from iter_chunks.
+
+    Yields:
+    - pd.DataFrame: Each chunk's raw rows with a new 'prediction' column.
+    """
+    for chunk in chunks:
+        chunk[PREDICTION_COLUMN] = predict_columnar(bundle, ColumnarTable.from_pandas(chunk))
+        yield chunk
+
+
+def format_chunk(chunk, output_format, first=False):
+    """
+    Serializes one scored chunk.
+
+    Parameters:
+    - chunk (pd.DataFrame): Scored rows.
+    - output_format (str): 'ndjson' or 'csv'.
+    - first (bool): Whether this is the first chunk (the CSV header is only written once).
+
+    Returns:
+    - str: The serialized rows.
+    """
+    if output_format == 'ndjson':
+        return chunk.to_json(orient='records', lines=True).rstrip('\n') + '\n'
+    if output_format == 'csv':
+        return chunk.to_csv(index=False, header=first)
+    raise ValueError(f"Cannot stream the format '{output_format}'; use 'ndjson' or 'csv'.")
+
+
+def write_chunks(chunks, output, output_format):
+    """
+    Writes scored chunks as they arrive.
+
+    Parameters:
+    - chunks (iterable): Scored chunks, e.g. from score_chunks.
+    - output (str or text file-like): Path, or open text stream for 'ndjson' and 'csv'.
+    - output_format (str): One of 'ndjson', 'csv' or 'parquet'.
+
+    Returns:
+    - int: Number of rows written.
+    """
+    n_rows = 0
+    if output_format == 'parquet':
+        pyarrow = _require_pyarrow()
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(output, table.schema)
+                writer.write_table(table.cast(writer.schema))
+                n_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return n_rows
+
+    stream = open(output, 'w', newline='') if isinstance(output, str) else output
+    try:
+        for i, chunk in enumerate(chunks):
+            stream.write(format_chunk(chunk, output_format, first=i == 0))
+            n_rows += len(chunk)
+    finally:
+        if isinstance(output, str):
+            stream.close()
+    return n_rows
+
+
+def score_file(bundle, source, output, input_format=None, output_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Scores a whole file chunk by chunk.
+
+    Parameters:
+    - bundle (ArtifactBundle): The artifacts to score with.
+    - source (str): Input file path.
+    - output (str or text file-like): Output path or stream.
+    - input_format (str or None): Input format, inferred from the extension if None.
+    - output_format (str or None): Output format, inferred from the output path if None
+      (NDJSON for streams).
+    - chunk_size (int): Rows per chunk.
+
+    Returns:
+    - int: Number of rows scored.
+    """
+    input_format = input_format or infer_format(source)
+    if output_format is None:
+        output_format = infer_format(output) if isinstance(output, str) else 'ndjson'
+    chunks = iter_chunks(source, input_format, chunk_size)
+    return write_chunks(score_chunks(bundle, chunks), output, output_format)
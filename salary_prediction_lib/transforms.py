@@ -0,0 +1,436 @@
+import json
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarTable, DictColumn
+from feature_creation import load_inflation_table, map_experience_level
+from instrumentation import STAGE_METRICS
+from pre_processing import ABBREVIATIONS, convert_country_code
+
+PLAN_FORMAT = 1
+DEFAULT_PLAN_PATH = 'feature_plan.json'
+MODES = ('both', 'train', 'serve')
+
+# Registered steps by name, filled by register_transform
+TRANSFORMS = {}
+
+
+class TransformStep:
+    """
+    One declared transform: the columns it reads and writes, and how to compute them.
+
+    Per-value steps read one column and write one column, and are applied to each distinct
+    value of a dictionary-encoded column (or to the value of a single record). Table steps
+    receive the whole ColumnarTable.
+
+    Attributes:
+    - name (str): Unique name, stored in serialized plans.
+    - inputs (tuple): Columns read.
+    - outputs (tuple): Columns written.
+    - func (callable): func(value, **resources) for per-value steps, func(table, **resources)
+      returning the table for table steps.
+    - per_value (bool): Whether func works on single values.
+    - mode (str): 'both', or 'train' / 'serve' for steps that only run when fitting or serving.
+    - requires (tuple): Names of the resources passed to func as keyword arguments.
+    - missing: Output of per-value steps for missing rows.
+    - dtype: dtype of the values written by per-value steps.
+    - record_func (callable or None): record_func(values, **resources) returning a dict of
+      outputs for one record; only needed by table steps used by run_record.
+    """
+    __slots__ = ('name', 'inputs', 'outputs', 'func', 'per_value', 'mode', 'requires', 'missing', 'dtype',
+                 'record_func')
+
+    def __init__(self, name, inputs, outputs, func, per_value=False, mode='both', requires=(), missing=np.nan,
+                 dtype=object, record_func=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}'; use one of {MODES}.")
+        if per_value and (len(inputs) != 1 or len(outputs) != 1):
+            raise ValueError(f"The per-value step '{name}' must read one column and write one column.")
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.func = func
+        self.per_value = per_value
+        self.mode = mode
+        self.requires = tuple(requires)
+        self.missing = missing
+        self.dtype = dtype
+        self.record_func = record_func
+
+    def runs(self, training):
+        return self.mode == 'both' or self.mode == ('train' if training else 'serve')
+
+    def signature(self):
+        """
+        Returns what a serialized plan records about the step.
+        """
+        return {'inputs': list(self.inputs), 'outputs': list(self.outputs), 'per_value': self.per_value,
+                'mode': self.mode}
+
+    def __repr__(self):
+        return f"TransformStep({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+def register_transform(name, inputs, outputs, per_value=False, mode='both', requires=(), missing=np.nan,
+                       dtype=object, record_func=None):
+    """
+    Decorator registering a function as a transform step.
+
+    Parameters:
+    - name (str): Unique step name, referenced by plans.
+    - inputs, outputs, per_value, mode, requires, missing, dtype, record_func: See TransformStep.
+
+    Returns:
+    - callable: Decorator returning the function unchanged.
+    """
+    def decorator(func):
+        if name in TRANSFORMS:
+            raise ValueError(f"A transform named '{name}' is already registered.")
+        TRANSFORMS[name] = TransformStep(name, inputs, outputs, func, per_value, mode, requires, missing, dtype,
+                                         record_func)
+        return func
+    return decorator
+
+
+class TransformPlan:
+    """
+    Compiled, ordered list of step groups.
+
+    Consecutive per-value steps that transform the same column are fused into one group, which
+    walks the distinct values of that column once and writes every output as a DictColumn
+    sharing its codes. Build plans with compile_plan, or load the one stored with the artifacts.
+
+    Attributes:
+    - groups (list): Lists of TransformStep, in execution order.
+    """
+
+    def __init__(self, groups):
+        self.groups = [list(group) for group in groups]
+        self._record_steps = {training: [step for group in self.groups for step in group if step.runs(training)]
+                              for training in (False, True)}
+
+    @property
+    def steps(self):
+        return [step for group in self.groups for step in group]
+
+    def source_columns(self, training=False):
+        """
+        Returns the columns the plan reads from its input.
+
+        Parameters:
+        - training (bool): Whether the plan runs in training mode.
+
+        Returns:
+        - list: Column names, in the order they are first read.
+        """
+        produced, sources = set(), []
+        for step in self._record_steps[training]:
+            for column in step.inputs:
+                if column not in produced and column not in sources:
+                    sources.append(column)
+            produced.update(step.outputs)
+        return sources
+
+    def run(self, table, training=False, **resources):
+        """
+        Runs the plan on a ColumnarTable.
+
+        Parameters:
+        - table (ColumnarTable): Input rows.
+        - training (bool): Runs the 'train' steps instead of the 'serve' ones.
+        - resources: Objects required by the steps, e.g. job_salary_density.
+
+        Returns:
+        - ColumnarTable: The table with every output column.
+        """
+        missing = [column for column in self.source_columns(training) if column not in table]
+        if missing:
+            raise ValueError(f"The dataset is missing the columns: {missing}")
+        for group in self.groups:
+            steps = [step for step in group if step.runs(training)]
+            if not steps:
+                continue
+            if steps[0].per_value:
+                self._run_chain(table, steps, resources)
+            else:
+                for step in steps:
+                    with STAGE_METRICS.time(f'plan.{step.name}', len(table)):
+                        table = step.func(table, **_resources_for(step, resources))
+        return table
+
+    def run_frame(self, dataset, training=False, **resources):
+        """
+        Runs the plan on a DataFrame.
+
+        Parameters:
+        - dataset (pd.DataFrame): Input rows.
+        - training (bool): Runs the 'train' steps instead of the 'serve' ones.
+        - resources: Objects required by the steps.
+
+        Returns:
+        - pd.DataFrame: A new DataFrame with the input and output columns.
+        """
+        return self.run(ColumnarTable.from_pandas(dataset), training, **resources).to_pandas()
+
+    def run_record(self, record, training=False, **resources):
+        """
+        Runs the plan on one record.
+
+        Parameters:
+        - record (dict): Input values by column.
+        - training (bool): Runs the 'train' steps instead of the 'serve' ones.
+        - resources: Objects required by the steps.
+
+        Returns:
+        - dict: A new dict with the input and output values.
+        """
+        with STAGE_METRICS.time('plan.record', 1):
+            return self._run_record(record, training, resources)
+
+    def _run_record(self, record, training, resources):
+        values = dict(record)
+        for step in self._record_steps[training]:
+            if step.per_value:
+                values[step.outputs[0]] = step.func(values[step.inputs[0]], **_resources_for(step, resources))
+            elif step.record_func is None:
+                raise ValueError(f"The step '{step.name}' cannot run on a single record.")
+            else:
+                values.update(step.record_func(values, **_resources_for(step, resources)))
+        return values
+
+    @staticmethod
+    def _run_chain(table, steps, resources):
+        root = table[steps[0].inputs[0]]
+        if not isinstance(root, DictColumn):
+            root = DictColumn.from_array(root)
+        values = {steps[0].inputs[0]: root.values}
+        for step in steps:
+            with STAGE_METRICS.time(f'plan.{step.name}', len(table)):
+                step_resources = _resources_for(step, resources)
+                output = np.asarray([step.func(value, **step_resources) for value in values[step.inputs[0]]],
+                                    dtype=step.dtype)
+                values[step.outputs[0]] = output
+                table[step.outputs[0]] = DictColumn(root.codes, output, step.missing)
+
+    def to_dict(self):
+        """
+        Returns the plan as JSON-serializable data.
+        """
+        return {
+            'format': PLAN_FORMAT,
+            'groups': [[step.name for step in group] for group in self.groups],
+            'steps': {step.name: step.signature() for step in self.steps},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a plan from to_dict() output, checking that every step still has the
+        inputs, outputs and mode it was saved with.
+        """
+        if data.get('format') != PLAN_FORMAT:
+            raise ValueError(f"Unsupported plan format {data.get('format')!r}; expected {PLAN_FORMAT}.")
+        groups = []
+        for names in data['groups']:
+            group = []
+            for name in names:
+                if name not in TRANSFORMS:
+                    raise ValueError(f"The plan uses the step '{name}', which is not registered.")
+                step = TRANSFORMS[name]
+                if step.signature() != data['steps'][name]:
+                    raise ValueError(f"The step '{name}' changed since the plan was saved: "
+                                     f"{data['steps'][name]} != {step.signature()}")
+                group.append(step)
+            groups.append(group)
+        return cls(groups)
+
+    def __eq__(self, other):
+        return isinstance(other, TransformPlan) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"TransformPlan({[[step.name for step in group] for group in self.groups]})"
+
+
+def _resources_for(step, resources):
+    try:
+        return {name: resources[name] for name in step.requires}
+    except KeyError as e:
+        raise ValueError(f"The step '{step.name}' requires the resource {e.args[0]!r}.")
+
+
+def compile_plan(step_names=None):
+    """
+    Orders and fuses registered steps into a plan.
+
+    Parameters:
+    - step_names (list or None): Steps in execution order. Defaults to DEFAULT_STEPS.
+
+    Returns:
+    - TransformPlan: The compiled plan.
+    """
+    if step_names is None:
+        step_names = DEFAULT_STEPS
+    unknown = [name for name in step_names if name not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Unknown transform steps: {unknown}")
+
+    groups = []
+    group_columns = []  # Columns read or written by each group
+    last_writer = {}    # Column -> index of the group that wrote it last
+    for step in (TRANSFORMS[name] for name in step_names):
+        target = None
+        if step.per_value and step.inputs[0] in last_writer:
+            index = last_writer[step.inputs[0]]
+            producer = groups[index][0]
+            # Running the step earlier, with its producer's group, must not change what the
+            # groups in between read, and it needs to run in the same mode
+            if (producer.per_value and producer.mode in ('both', step.mode)
+                    and not any(step.outputs[0] in columns for columns in group_columns[index + 1:])):
+                target = index
+        if target is None:
+            groups.append([])
+            group_columns.append(set())
+            target = len(groups) - 1
+        groups[target].append(step)
+        group_columns[target].update(step.inputs + step.outputs)
+        for column in step.outputs:
+            last_writer[column] = target
+    return TransformPlan(groups)
+
+
+def save_plan(plan, path=DEFAULT_PLAN_PATH):
+    """
+    Saves a plan as JSON, to be pinned in the artifacts manifest next to the model.
+
+    Parameters:
+    - plan (TransformPlan): The plan used to train the model.
+    - path (str): Where to save it.
+    """
+    with open(path, 'w') as file:
+        json.dump(plan.to_dict(), file, indent=2)
+        file.write('\n')
+
+
+def load_plan(path=DEFAULT_PLAN_PATH):
+    """
+    Loads a plan saved by save_plan.
+
+    Parameters:
+    - path (str): Path of the saved plan.
+
+    Returns:
+    - TransformPlan: The plan.
+    """
+    with open(path) as file:
+        return TransformPlan.from_dict(json.load(file))
+
+
+# Steps of preprocess_data
+
+def _describe(value, descriptions):
+    return descriptions.get(value, value)
+
+
+for _column in ('employee_residence', 'company_location'):
+    register_transform(f'{_column}_name', inputs=(_column,), outputs=(_column,), per_value=True)(convert_country_code)
+
+for _column, _descriptions in ABBREVIATIONS.items():
+    register_transform(f'{_column}_description', inputs=(_column,), outputs=(_column,),
+                       per_value=True)(partial(_describe, descriptions=_descriptions))
+
+
+# Steps of create_features
+
+@register_transform('years_of_experience', inputs=('experience_level',), outputs=('years_of_experience',),
+                    per_value=True, dtype=np.float64)
+def years_of_experience(level):
+    years = map_experience_level(level)
+    return np.nan if years is None else years
+
+
+def _is_local_employee_record(values):
+    # A missing location is never local, like the valid code check of the columnar comparison
+    residence = values['employee_residence']
+    is_local = residence is not None and residence == values['company_location']
+    return {'is_local_employee': int(is_local)}
+
+
+@register_transform('is_local_employee', inputs=('employee_residence', 'company_location'),
+                    outputs=('is_local_employee',), record_func=_is_local_employee_record)
+def is_local_employee(table):
+    # Compares dictionary positions instead of strings
+    residence = table['employee_residence']
+    location = table['company_location']
+    # Position of each company location value in the residence dictionary (-1 if absent)
+    positions = pd.Index(residence.values).get_indexer(location.values)
+    location_in_residence = location.take(positions, missing=-2, dtype=np.int32)
+    is_local = location_in_residence == residence.codes
+    is_local &= residence.codes >= 0
+    table['is_local_employee'] = is_local.view(np.int8)
+    return table
+
+
+@register_transform('inflation_index', inputs=('work_year', 'employee_residence'), outputs=('inflation_index',),
+                    record_func=lambda values: {'inflation_index': load_inflation_table().lookup_one(
+                        values['work_year'], values['employee_residence'])})
+def inflation_index(table):
+    # Looks up each distinct year and residence once
+    inflation = load_inflation_table()
+    years = table['work_year']
+    residences = table['employee_residence']
+    year_positions = years.take(inflation.years.get_indexer(years.values), missing=-1, dtype=np.int32)
+    region_positions = residences.take(inflation.regions.get_indexer(residences.values), missing=-1, dtype=np.int32)
+    table['inflation_index'] = inflation.index[region_positions, year_positions]
+    return table
+
+
+@register_transform('job_salary_density', inputs=('job_title',), outputs=('salary_density',), per_value=True,
+                    mode='serve', requires=('job_salary_density',), missing=0.0, dtype=np.float64)
+def job_salary_density(job_title, job_salary_density):
+    # Same as map_job_density: unknown titles and missing stats become 0
+    value = job_salary_density.get(job_title)
+    return 0.0 if value is None or value != value else float(value)
+
+
+@register_transform('job_title_frequency', inputs=('job_title',), outputs=('job_title_frequency',), mode='train')
+def job_title_frequency(table):
+    # Counts the codes instead of the strings
+    jobs = table['job_title']
+    counts = np.bincount(jobs.codes[jobs.codes >= 0], minlength=len(jobs.values))
+    table['job_title_frequency'] = DictColumn(jobs.codes, counts.astype(float))
+    return table
+
+
+@register_transform('salary_density_by_experience', inputs=('salary_in_usd', 'years_of_experience'),
+                    outputs=('salary_density_by_experience',), mode='train')
+def salary_density_by_experience(table):
+    # Group means and stds from bincount, without the merge of add_salary_density
+    salary = table.dense('salary_in_usd', dtype=float)
+    groups, group_values = pd.factorize(table.dense('years_of_experience', dtype=float))
+    # Missing salaries are left out of their group's stats, like groupby mean and std
+    valid = (groups >= 0) & ~np.isnan(salary)
+    counts = np.bincount(groups[valid], minlength=len(group_values))
+    sums = np.bincount(groups[valid], weights=salary[valid], minlength=len(group_values))
+    means = sums / counts
+    squares = np.bincount(groups[valid], weights=(salary[valid] - means[groups[valid]]) ** 2, minlength=len(group_values))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stds = np.sqrt(squares / (counts - 1))
+
+    means = np.append(means, np.nan)
+    stds = np.append(stds, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        density = (salary - means[groups]) / stds[groups]
+    table['salary_density_by_experience'] = np.nan_to_num(density, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    return table
+
+
+# Order of preprocess_data followed by create_features, plus the training-only features
+DEFAULT_STEPS = [
+    'employee_residence_name', 'company_location_name',
+    'experience_level_description', 'employment_type_description', 'company_size_description',
+    'remote_ratio_description',
+    'years_of_experience', 'is_local_employee', 'inflation_index', 'job_salary_density',
+    'job_title_frequency', 'salary_density_by_experience',
+]
@@ -0,0 +1,217 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarTable, DictColumn
+
+# Type of each request column: 'number' columns take ints or floats, 'string' columns take
+# strings; null is a missing value in both
+COLUMN_TYPES = {
+    'work_year': 'number',
+    'experience_level': 'string',
+    'employment_type': 'string',
+    'job_title': 'string',
+    'employee_residence': 'string',
+    'remote_ratio': 'number',
+    'company_location': 'string',
+    'company_size': 'string',
+    'salary_currency': 'string',
+}
+
+# Content types of column batches
+WIRE_FORMATS = ('json', 'msgpack', 'arrow')
+CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/msgpack': 'msgpack',
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.apache.arrow.stream': 'arrow',
+}
+MEDIA_TYPES = {'json': 'application/json', 'msgpack': 'application/msgpack',
+               'arrow': 'application/vnd.apache.arrow.stream'}
+PREDICTION_COLUMN = 'prediction'
+
+
+def _require_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("The msgpack format requires msgpack. Install it with 'pip install msgpack'.")
+    return msgpack
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("The Arrow format requires pyarrow. Install it with 'pip install pyarrow'.")
+    return pyarrow
+
+
+def _check_values(name, values):
+    # Checks the distinct values of a column against its declared type
+    kind = COLUMN_TYPES.get(name)
+    for value in values:
+        if value is None or (kind == 'number' and type(value) in (int, float) and not isinstance(value, bool)):
+            continue
+        if kind == 'string' and isinstance(value, str):
+            continue
+        if kind is None:
+            continue
+        raise TypeError(f"The column '{name}' holds {kind}s, got {value!r}.")
+
+
+def _column_from_list(name, values):
+    if not isinstance(values, list):
+        raise TypeError(f"The column '{name}' must be an array, got {type(values).__name__}.")
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    _check_values(name, uniques)
+    return DictColumn(codes.astype(np.int32, copy=False), uniques)
+
+
+def _decode_mapping(payload, columns):
+    if not isinstance(payload, dict) or not isinstance(payload.get('columns'), dict):
+        raise ValueError("The body must be an object with a 'columns' object of arrays, one per field.")
+    fields = payload['columns']
+    missing = [column for column in columns if column not in fields]
+    if missing:
+        raise ValueError(f"The batch is missing the columns: {missing}")
+    return ColumnarTable({column: _column_from_list(column, fields[column]) for column in columns})
+
+
+def _decode_arrow(body, columns):
+    pyarrow = _require_pyarrow()
+    try:
+        table = pyarrow.ipc.open_stream(body).read_all()
+    except pyarrow.ArrowInvalid as e:
+        raise ValueError(f"The body is not an Arrow IPC stream: {e}")
+    missing = [column for column in columns if column not in table.column_names]
+    if missing:
+        raise ValueError(f"The batch is missing the columns: {missing}")
+    table = table.select(columns)
+    for field in table.schema:
+        value_type = field.type.value_type if pyarrow.types.is_dictionary(field.type) else field.type
+        kind = COLUMN_TYPES.get(field.name)
+        if pyarrow.types.is_null(value_type):
+            continue
+        if kind == 'number' and not (pyarrow.types.is_integer(value_type) or pyarrow.types.is_floating(value_type)):
+            raise TypeError(f"The column '{field.name}' holds numbers, got Arrow type {field.type}.")
+        if kind == 'string' and not (pyarrow.types.is_string(value_type) or pyarrow.types.is_large_string(value_type)):
+            raise TypeError(f"The column '{field.name}' holds strings, got Arrow type {field.type}.")
+    return ColumnarTable.from_arrow(table, dictionary_columns=columns)
+
+
+def decode_columns(body, wire_format, columns):
+    """
+    Decodes a column batch straight into dictionary-encoded columns.
+
+    A batch holds one array per field instead of one object per row: in JSON and msgpack the
+    body is {"columns": {"work_year": [2024, ...], "job_title": ["Data Scientist", ...], ...}};
+    in Arrow it is an IPC stream of a table with those columns. Values are checked against
+    COLUMN_TYPES once per distinct value, and fields other than columns are ignored.
+
+    Parameters:
+    - body (bytes): Request body.
+    - wire_format (str): 'json', 'msgpack' or 'arrow'.
+    - columns (list): Columns to read, e.g. the feature plan's source columns.
+
+    Returns:
+    - ColumnarTable: One DictColumn per column.
+    """
+    if wire_format == 'json':
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise ValueError(f"The body is not valid JSON: {e}")
+        table = _decode_mapping(payload, columns)
+    elif wire_format == 'msgpack':
+        msgpack = _require_msgpack()
+        try:
+            payload = msgpack.unpackb(body, raw=False)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise ValueError(f"The body is not valid msgpack: {e}")
+        table = _decode_mapping(payload, columns)
+    elif wire_format == 'arrow':
+        table = _decode_arrow(body, columns)
+    else:
+        raise ValueError(f"Unknown wire format '{wire_format}'; use one of {WIRE_FORMATS}.")
+
+    lengths = {column: len(table[column]) for column in columns}
+    if len(set(lengths.values())) > 1:
+        raise ValueError(f"The columns have different lengths: {lengths}")
+    return table
+
+
+def encode_columns(dataset, wire_format):
+    """
+    Encodes rows as a column batch, e.g. to build a request to /predict/columns.
+
+    Parameters:
+    - dataset (pd.DataFrame): Raw input rows.
+    - wire_format (str): 'json', 'msgpack' or 'arrow'.
+
+    Returns:
+    - bytes: The body.
+    """
+    if wire_format == 'arrow':
+        pyarrow = _require_pyarrow()
+        table = pyarrow.Table.from_pandas(dataset, preserve_index=False)
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    # Missing values become null
+    payload = {'columns': {column: dataset[column].astype(object).where(dataset[column].notna(), None).tolist()
+                           for column in dataset.columns}}
+    if wire_format == 'json':
+        return json.dumps(payload).encode()
+    if wire_format == 'msgpack':
+        return _require_msgpack().packb(payload)
+    raise ValueError(f"Unknown wire format '{wire_format}'; use one of {WIRE_FORMATS}.")
+
+
+def encode_predictions(predictions, model_version, wire_format):
+    """
+    Encodes predictions in the format of the request.
+
+    JSON and msgpack give {"predictions": [...], "model_version": "..."}, as /predict; Arrow
+    gives a stream of one 'prediction' float64 column, with the version in the schema metadata.
+
+    Parameters:
+    - predictions (np.ndarray): One prediction per row.
+    - model_version (str): Version of the model that made them.
+    - wire_format (str): 'json', 'msgpack' or 'arrow'.
+
+    Returns:
+    - bytes: The response body.
+    """
+    if wire_format == 'arrow':
+        pyarrow = _require_pyarrow()
+        table = pyarrow.table({PREDICTION_COLUMN: np.asarray(predictions, dtype=np.float64)})
+        table = table.replace_schema_metadata({'model_version': model_version})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    payload = {'predictions': np.asarray(predictions, dtype=np.float64).tolist(), 'model_version': model_version}
+    if wire_format == 'json':
+        return json.dumps(payload).encode()
+    if wire_format == 'msgpack':
+        return _require_msgpack().packb(payload)
+    raise ValueError(f"Unknown wire format '{wire_format}'; use one of {WIRE_FORMATS}.")
+
+
+def decode_predictions(body, wire_format):
+    """
+    Decodes a response of encode_predictions.
+
+    Returns:
+    - tuple: (predictions as np.ndarray, model version).
+    """
+    if wire_format == 'arrow':
+        table = _require_pyarrow().ipc.open_stream(body).read_all()
+        return table[PREDICTION_COLUMN].to_numpy(), table.schema.metadata[b'model_version'].decode()
+    payload = json.loads(body) if wire_format == 'json' else _require_msgpack().unpackb(body, raw=False)
+    return np.asarray(payload['predictions'], dtype=np.float64), payload['model_version']
@@ -0,0 +1,211 @@
+"""
+Multi-process launcher for the prediction API.
+
+The artifacts are loaded once, in this process: the compiled model's tree arrays are moved to
+shared memory, the prediction grid is memory-mapped, and the encoders, feature plan tables and
+country lookups are built by a warm-up prediction. The Python objects are then frozen out of
+the garbage collector, so it never writes to their pages. Workers are forked after that and
+serve on one shared listening socket, each pinned to its own core; they read the model and
+lookup tables from the same physical pages, so an extra worker costs little memory.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+
+Send SIGHUP to this process to load the manifest again (e.g. after pinning a new model) and
+replace the workers; SIGTERM or Ctrl+C stops them gracefully. /admin/reload only swaps the
+artifacts of the worker that receives it.
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.join(ROOT_DIR, 'salary_prediction_lib')
+if LIB_DIR not in sys.path:
+    sys.path.insert(0, LIB_DIR)
+
+# Seconds a stopping worker gets to finish its requests
+GRACEFUL_TIMEOUT = 30
+
+
+def log(message):
+    print(f"[serve {os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+
+def prepare_artifacts(app_module):
+    """
+    Builds every shared table in this process, before the workers are forked.
+    """
+    import pandas as pd
+    from serving import build_model_input
+
+    bundle = app_module.registry.current()
+    if hasattr(bundle.model, 'share_memory'):
+        bundle.model.share_memory()
+
+    with open(os.path.join(ROOT_DIR, 'test_json')) as file:
+        records = json.load(file)['data']
+    # Builds the encoders' hash tables, the feature plan's lookup tables and the single-row
+    # predictor once, here. LightGBM itself is not called: its OpenMP threads do not survive fork
+    app_module.get_single_row_predictor(bundle).features(dict(records[0]))
+    build_model_input(bundle, pd.DataFrame(records * 2))
+    if hasattr(bundle.model, 'share_memory'):
+        app_module.score_records(bundle, records * 2)
+
+    gc.collect()
+    gc.freeze()
+    return bundle
+
+
+def bind_socket(host, port, backlog=2048):
+    # IPPROTO_TCP, not the default 0: asyncio only sets TCP_NODELAY on accepted sockets whose
+    # protocol is TCP, and without it small responses wait 40 ms for delayed ACKs
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app_module, sock, cpu, args):
+    # Runs in the forked child and never returns
+    for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+    status = 0
+    try:
+        if cpu is not None:
+            os.sched_setaffinity(0, {cpu})
+        import uvicorn
+
+        config = uvicorn.Config(app_module.app, log_level=args.log_level, timeout_graceful_shutdown=GRACEFUL_TIMEOUT)
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        log(f"worker failed: {e!r}")
+        status = 1
+    finally:
+        sys.stderr.flush()
+        os._exit(status)
+
+
+class Supervisor:
+    """
+    Forks the workers, restarts the ones that die and replaces them all on SIGHUP.
+    """
+
+    def __init__(self, app_module, sock, args):
+        self.app_module = app_module
+        self.sock = sock
+        self.args = args
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        self.cpus = cpus if args.pin and cpus else None
+        # pid -> worker slot
+        self.workers = {}
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self, slot):
+        cpu = self.cpus[slot % len(self.cpus)] if self.cpus else None
+        pid = os.fork()
+        if pid == 0:
+            run_worker(self.app_module, self.sock, cpu, self.args)
+        self.workers[pid] = slot
+        log(f"worker {slot} started, pid {pid}" + (f", cpu {cpu}" if cpu is not None else ""))
+
+    def stop(self, pids, timeout=GRACEFUL_TIMEOUT + 5):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    remaining.discard(pid)
+                    self.workers.pop(pid, None)
+            time.sleep(0.05)
+        for pid in remaining:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid, None)
+
+    def reload(self):
+        """
+        Loads the manifest again in this process, then forks new workers before stopping the
+        old ones, so the socket is always served.
+        """
+        gc.unfreeze()
+        try:
+            bundle = self.app_module.registry.swap()
+            prepare_artifacts(self.app_module)
+        except Exception as e:
+            gc.freeze()
+            log(f"reload failed, keeping the current workers: {e}")
+            return
+        log(f"loaded model version {bundle.version}, replacing the workers")
+        old = list(self.workers)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+        self.stop(old)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGHUP, self._request_reload)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            pid, status = os.waitpid(-1, os.WNOHANG) if self.workers else (0, 0)
+            if pid and pid in self.workers:
+                slot = self.workers.pop(pid)
+                if not self.stopping:
+                    log(f"worker {slot} (pid {pid}) exited with status {status}, restarting it")
+                    time.sleep(1)
+                    self.spawn(slot)
+            else:
+                time.sleep(0.2)
+        log("stopping the workers")
+        self.stop(list(self.workers))
+
+    def _request_stop(self, signum, frame):
+        self.stopping = True
+
+    def _request_reload(self, signum, frame):
+        self.reload_requested = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes (default: one per core).')
+    parser.add_argument('--model', choices=['compiled', 'booster'], default='compiled',
+                        help='Serve the compiled trees from shared memory (default) or the LightGBM booster.')
+    parser.add_argument('--no-pin', dest='pin', action='store_false', help='Do not pin each worker to a core.')
+    parser.add_argument('--log-level', default='warning')
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers must be at least 1.')
+
+    os.environ['SALARY_COMPILED_MODEL'] = '1' if args.model == 'compiled' else '0'
+    import app as app_module
+
+    bundle = prepare_artifacts(app_module)
+    sock = bind_socket(args.host, args.port)
+    log(f"serving model version {bundle.version} on http://{args.host}:{args.port} with {args.workers} workers")
+    Supervisor(app_module, sock, args).run()
+
+
+if __name__ == '__main__':
+    main()
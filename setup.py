@@ -5,6 +5,9 @@ setup(
     version="0.1",
     packages=find_packages(),
     install_requires=['country_converter', 'lightgbm', 'numpy', 'pandas'],  
+    entry_points={
+        'console_scripts': ['salary_prediction_lib = salary_prediction_lib.__main__:main'],
+    },
     author="Matias Borrell, Nastia Chernavskaia, Soledad Monge.",
     author_email="anastasiia.chernavskaia@bse.eu, matias.borrell@bse.eu, soledad.monge@bse.eu",
     description="Library for data related roles salary prediction.",